@@ -6,8 +6,9 @@ from sqlalchemy import pool
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config
 
-from core.config import settings
+from core.config import get_settings
 from core.models import Base
+from core.models.types import BinaryUUID, IntEnumType
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -28,7 +29,21 @@ target_metadata = Base.metadata
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
 # ... etc.
-config.set_main_option("sqlalchemy.url", settings.db.url)
+# Callers migrating some other database (benchmark datasets) pass its URL
+# in `Config.attributes`, otherwise the configured database is migrated
+config.set_main_option(
+    "sqlalchemy.url",
+    config.attributes.get("url") or get_settings().db.url,
+)
+
+
+def render_item(type_, obj, autogen_context):
+    """Render custom column types as the plain types they are stored as."""
+    if type_ == "type" and isinstance(obj, BinaryUUID):
+        return "sa.LargeBinary(length=16)"
+    if type_ == "type" and isinstance(obj, IntEnumType):
+        return "sa.SmallInteger()"
+    return False
 
 
 def run_migrations_offline() -> None:
@@ -47,6 +62,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        render_item=render_item,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -56,7 +72,11 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_item=render_item,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
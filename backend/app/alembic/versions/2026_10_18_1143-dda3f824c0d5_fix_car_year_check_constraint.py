@@ -0,0 +1,40 @@
+"""fix car year check constraint
+
+Revision ID: dda3f824c0d5
+Revises: 17c4722ffefa
+Create Date: 2026-10-18 11:43:15.156311
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "dda3f824c0d5"
+down_revision: Union[str, Sequence[str], None] = "17c4722ffefa"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite refuses non-deterministic functions in CHECK constraints,
+    # so the old constraint made every insert into "cars" fail
+    with op.batch_alter_table("cars", recreate="always") as batch_op:
+        batch_op.drop_constraint(op.f("ck_cars_car_year_valid"), type_="check")
+        batch_op.create_check_constraint(
+            op.f("ck_cars_car_year_valid"),
+            "year >= 1930",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("cars", recreate="always") as batch_op:
+        batch_op.drop_constraint(op.f("ck_cars_car_year_valid"), type_="check")
+        batch_op.create_check_constraint(
+            op.f("ck_cars_car_year_valid"),
+            "year >= 1930 AND year <= CAST(strftime('%Y','now') AS INTEGER)",
+        )
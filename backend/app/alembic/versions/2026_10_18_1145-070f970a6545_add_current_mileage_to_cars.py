@@ -0,0 +1,104 @@
+"""add current mileage to cars
+
+Revision ID: 070f970a6545
+Revises: dda3f824c0d5
+Create Date: 2026-10-18 11:45:40.132622
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "070f970a6545"
+down_revision: Union[str, Sequence[str], None] = "dda3f824c0d5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRIGGERS = {
+    "trg_mileage_logs_after_insert": """
+    CREATE TRIGGER trg_mileage_logs_after_insert
+    AFTER INSERT ON mileage_logs
+    BEGIN
+        UPDATE cars SET
+            current_mileage = max(coalesce(current_mileage, NEW.mileage), NEW.mileage),
+            last_mileage_at = max(
+                coalesce(last_mileage_at, NEW.created_at), NEW.created_at
+            )
+        WHERE id = NEW.car_id;
+    END
+    """,
+    "trg_mileage_logs_after_update": """
+    CREATE TRIGGER trg_mileage_logs_after_update
+    AFTER UPDATE OF car_id, mileage, created_at ON mileage_logs
+    BEGIN
+        UPDATE cars SET
+            current_mileage = (
+                SELECT max(mileage) FROM mileage_logs WHERE car_id = cars.id
+            ),
+            last_mileage_at = (
+                SELECT max(created_at) FROM mileage_logs WHERE car_id = cars.id
+            )
+        WHERE id IN (OLD.car_id, NEW.car_id);
+    END
+    """,
+    "trg_mileage_logs_after_delete": """
+    CREATE TRIGGER trg_mileage_logs_after_delete
+    AFTER DELETE ON mileage_logs
+    BEGIN
+        UPDATE cars SET
+            current_mileage = (
+                SELECT max(mileage) FROM mileage_logs WHERE car_id = cars.id
+            ),
+            last_mileage_at = (
+                SELECT max(created_at) FROM mileage_logs WHERE car_id = cars.id
+            )
+        WHERE id = OLD.car_id;
+    END
+    """,
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "cars",
+        sa.Column(
+            "current_mileage",
+            sa.Integer(),
+            nullable=True,
+            comment="Max logged mileage, maintained by mileage_logs triggers",
+        ),
+    )
+    op.add_column(
+        "cars",
+        sa.Column(
+            "last_mileage_at",
+            sa.DateTime(timezone=True),
+            nullable=True,
+            comment="Date of the latest mileage log",
+        ),
+    )
+    op.execute("""
+        UPDATE cars SET
+            current_mileage = (
+                SELECT max(mileage) FROM mileage_logs WHERE car_id = cars.id
+            ),
+            last_mileage_at = (
+                SELECT max(created_at) FROM mileage_logs WHERE car_id = cars.id
+            )
+        """)
+    for trigger in TRIGGERS.values():
+        op.execute(trigger)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    with op.batch_alter_table("cars") as batch_op:
+        batch_op.drop_column("last_mileage_at")
+        batch_op.drop_column("current_mileage")
@@ -0,0 +1,40 @@
+"""add id to reminders car active index
+
+Revision ID: 759fa462cb65
+Revises: 070f970a6545
+Create Date: 2026-10-18 11:48:03.994230
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "759fa462cb65"
+down_revision: Union[str, Sequence[str], None] = "070f970a6545"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index("ix_reminders_car_active", table_name="reminders")
+    op.create_index(
+        "ix_reminders_car_active",
+        "reminders",
+        ["car_id", "is_active", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_reminders_car_active", table_name="reminders")
+    op.create_index(
+        "ix_reminders_car_active",
+        "reminders",
+        ["car_id", "is_active"],
+        unique=False,
+    )
@@ -0,0 +1,110 @@
+"""add next due to reminders
+
+Revision ID: 70f99ef5d392
+Revises: 759fa462cb65
+Create Date: 2026-10-18 11:50:33.766992
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "70f99ef5d392"
+down_revision: Union[str, Sequence[str], None] = "759fa462cb65"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+NEXT_DUE_SET = """
+    next_due_at = (
+        SELECT datetime(
+            service_items.last_service_date,
+            (reminders.interval_days - coalesce(reminders.warning_days_before, 0))
+            || ' days'
+        )
+        FROM service_items WHERE service_items.id = reminders.service_item_id
+    ),
+    next_due_mileage = (
+        SELECT service_items.last_service_mileage + reminders.interval_mileage
+            - coalesce(reminders.warning_mileage_before, 0)
+        FROM service_items WHERE service_items.id = reminders.service_item_id
+    )
+"""
+
+TRIGGERS = {
+    "trg_reminders_after_insert": f"""
+    CREATE TRIGGER trg_reminders_after_insert
+    AFTER INSERT ON reminders
+    BEGIN
+        UPDATE reminders SET {NEXT_DUE_SET} WHERE id = NEW.id;
+    END
+    """,
+    "trg_reminders_after_update": f"""
+    CREATE TRIGGER trg_reminders_after_update
+    AFTER UPDATE OF
+        service_item_id,
+        interval_mileage,
+        interval_days,
+        warning_mileage_before,
+        warning_days_before
+    ON reminders
+    BEGIN
+        UPDATE reminders SET {NEXT_DUE_SET} WHERE id = NEW.id;
+    END
+    """,
+    "trg_service_items_after_update": f"""
+    CREATE TRIGGER trg_service_items_after_update
+    AFTER UPDATE OF last_service_date, last_service_mileage ON service_items
+    BEGIN
+        UPDATE reminders SET {NEXT_DUE_SET} WHERE service_item_id = NEW.id;
+    END
+    """,
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "reminders",
+        sa.Column(
+            "next_due_at",
+            sa.DateTime(timezone=True),
+            nullable=True,
+            comment="Date the reminder triggers at, maintained by triggers",
+        ),
+    )
+    op.add_column(
+        "reminders",
+        sa.Column(
+            "next_due_mileage",
+            sa.Integer(),
+            nullable=True,
+            comment="Mileage the reminder triggers at, maintained by triggers",
+        ),
+    )
+    op.create_index(
+        "ix_reminders_next_due_at", "reminders", ["next_due_at"], unique=False
+    )
+    op.create_index(
+        "ix_reminders_service_item",
+        "reminders",
+        ["service_item_id"],
+        unique=False,
+    )
+    op.execute(f"UPDATE reminders SET {NEXT_DUE_SET}")
+    for trigger in TRIGGERS.values():
+        op.execute(trigger)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.drop_index("ix_reminders_service_item", table_name="reminders")
+    op.drop_index("ix_reminders_next_due_at", table_name="reminders")
+    with op.batch_alter_table("reminders") as batch_op:
+        batch_op.drop_column("next_due_mileage")
+        batch_op.drop_column("next_due_at")
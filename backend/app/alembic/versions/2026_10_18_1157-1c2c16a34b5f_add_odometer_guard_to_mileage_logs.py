@@ -0,0 +1,78 @@
+"""add odometer guard to mileage logs
+
+Revision ID: 1c2c16a34b5f
+Revises: 70f99ef5d392
+Create Date: 2026-10-18 11:57:00.660326
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "1c2c16a34b5f"
+down_revision: Union[str, Sequence[str], None] = "70f99ef5d392"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRIGGERS = {
+    "trg_mileage_logs_before_insert": """
+    CREATE TRIGGER trg_mileage_logs_before_insert
+    BEFORE INSERT ON mileage_logs
+    BEGIN
+        SELECT RAISE(ABORT, 'odometer must not decrease')
+        WHERE NEW.mileage < coalesce(
+            (SELECT max(mileage) FROM mileage_logs WHERE car_id = NEW.car_id),
+            (SELECT first_mileage FROM cars WHERE id = NEW.car_id)
+        );
+    END
+    """,
+    "trg_mileage_logs_before_update": """
+    CREATE TRIGGER trg_mileage_logs_before_update
+    BEFORE UPDATE OF car_id, mileage, created_at ON mileage_logs
+    BEGIN
+        SELECT RAISE(ABORT, 'odometer must not decrease')
+        WHERE NEW.mileage < coalesce(
+            (
+                SELECT mileage FROM mileage_logs
+                WHERE car_id = NEW.car_id
+                    AND created_at <= NEW.created_at
+                    AND id != NEW.id
+                ORDER BY created_at DESC
+                LIMIT 1
+            ),
+            (SELECT first_mileage FROM cars WHERE id = NEW.car_id)
+        )
+        OR NEW.mileage > (
+            SELECT mileage FROM mileage_logs
+            WHERE car_id = NEW.car_id
+                AND created_at > NEW.created_at
+                AND id != NEW.id
+            ORDER BY created_at
+            LIMIT 1
+        );
+    END
+    """,
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_mileage_logs_car_mileage",
+        "mileage_logs",
+        ["car_id", sa.text("mileage DESC")],
+        unique=False,
+    )
+    for trigger in TRIGGERS.values():
+        op.execute(trigger)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.drop_index("ix_mileage_logs_car_mileage", table_name="mileage_logs")
@@ -0,0 +1,93 @@
+"""store uuids as binary
+
+Revision ID: c8e6c51f495d
+Revises: 1c2c16a34b5f
+Create Date: 2026-10-18 12:00:49.377070
+
+"""
+
+from typing import Sequence, Union
+from uuid import UUID
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c8e6c51f495d"
+down_revision: Union[str, Sequence[str], None] = "1c2c16a34b5f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+UUID_COLUMNS = {
+    "cars": ["id"],
+    "service_items": ["id", "car_id"],
+    "mileage_logs": ["id", "car_id"],
+    "reminders": ["id", "car_id", "service_item_id"],
+}
+
+
+def to_bytes(value: str | bytes | None) -> bytes | None:
+    if isinstance(value, str):
+        return UUID(hex=value).bytes
+    return value
+
+
+def to_hex(value: str | bytes | None) -> str | None:
+    if isinstance(value, bytes):
+        return UUID(bytes=value).hex
+    return value
+
+
+def convert(function, type_: sa.types.TypeEngine, existing_type) -> None:
+    bind = op.get_bind()
+    # Recreating a parent table with foreign keys enabled would cascade
+    # the DROP TABLE to its children
+    if bind.exec_driver_sql("PRAGMA foreign_keys").scalar():
+        raise RuntimeError("Run this migration with PRAGMA foreign_keys=OFF")
+
+    # Triggers reference the tables being recreated, SQLite refuses
+    # to rename a table while a trigger points to a missing one
+    triggers = bind.exec_driver_sql(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger'"
+    ).all()
+    for name, _ in triggers:
+        op.execute(f"DROP TRIGGER {name}")
+
+    # SQLite 3.40 has no unhex(), convert the values in Python
+    dbapi_connection = bind.connection.dbapi_connection
+    assert dbapi_connection is not None
+    dbapi_connection.create_function(function.__name__, 1, function, deterministic=True)
+    for table, columns in UUID_COLUMNS.items():
+        assignments = ", ".join(f"{c} = {function.__name__}({c})" for c in columns)
+        op.execute(f"UPDATE {table} SET {assignments}")
+        with op.batch_alter_table(table, recreate="always") as batch_op:
+            for column in columns:
+                batch_op.alter_column(
+                    column,
+                    type_=type_,
+                    existing_type=existing_type,
+                    existing_nullable=False,
+                )
+
+    # Reflection loses the DESC of the index column
+    op.drop_index("ix_mileage_logs_car_mileage", table_name="mileage_logs")
+    op.create_index(
+        "ix_mileage_logs_car_mileage",
+        "mileage_logs",
+        ["car_id", sa.text("mileage DESC")],
+        unique=False,
+    )
+
+    for _, sql in triggers:
+        op.execute(sql)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    convert(to_bytes, sa.LargeBinary(16), sa.Uuid())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    convert(to_hex, sa.Uuid(), sa.LargeBinary(16))
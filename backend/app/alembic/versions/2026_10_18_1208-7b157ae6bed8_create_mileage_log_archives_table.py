@@ -0,0 +1,73 @@
+"""create mileage log archives table
+
+Revision ID: 7b157ae6bed8
+Revises: c8e6c51f495d
+Create Date: 2026-10-18 12:08:32.100822
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7b157ae6bed8"
+down_revision: Union[str, Sequence[str], None] = "c8e6c51f495d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "mileage_log_archives",
+        sa.Column(
+            "id",
+            sa.LargeBinary(length=16),
+            nullable=False,
+            comment="ID of the original mileage log",
+        ),
+        sa.Column(
+            "car_id",
+            sa.LargeBinary(length=16),
+            nullable=False,
+            comment="ID of the car",
+        ),
+        sa.Column("mileage", sa.Integer(), nullable=False, comment="Mileage"),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            comment="Date and time of the original log",
+        ),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+            comment="Date and time of archiving",
+        ),
+        sa.ForeignKeyConstraint(
+            ["car_id"],
+            ["cars.id"],
+            name=op.f("fk_mileage_log_archives_car_id_cars"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_mileage_log_archives")),
+    )
+    op.create_index(
+        "ix_mileage_log_archives_car_created_at",
+        "mileage_log_archives",
+        ["car_id", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_mileage_log_archives_car_created_at",
+        table_name="mileage_log_archives",
+    )
+    op.drop_table("mileage_log_archives")
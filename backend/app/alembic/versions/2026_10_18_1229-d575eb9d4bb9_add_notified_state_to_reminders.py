@@ -0,0 +1,139 @@
+"""add notified state to reminders
+
+Revision ID: d575eb9d4bb9
+Revises: 7b157ae6bed8
+Create Date: 2026-10-18 12:29:52.383975
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d575eb9d4bb9"
+down_revision: Union[str, Sequence[str], None] = "7b157ae6bed8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+NEXT_DUE_SET = """
+    next_due_at = (
+        SELECT datetime(
+            service_items.last_service_date,
+            (reminders.interval_days - coalesce(reminders.warning_days_before, 0))
+            || ' days'
+        )
+        FROM service_items WHERE service_items.id = reminders.service_item_id
+    ),
+    next_due_mileage = (
+        SELECT service_items.last_service_mileage + reminders.interval_mileage
+            - coalesce(reminders.warning_mileage_before, 0)
+        FROM service_items WHERE service_items.id = reminders.service_item_id
+    )
+"""
+
+NOTIFIED_RESET = """
+    notified_state = 0,
+    notified_at = NULL,
+    snoozed_until = NULL
+"""
+
+
+def reminder_triggers(reset: str) -> dict[str, str]:
+    """Triggers keeping next_due_* current, `reset` is added to the updates."""
+    return {
+        "trg_reminders_after_insert": f"""
+        CREATE TRIGGER trg_reminders_after_insert
+        AFTER INSERT ON reminders
+        BEGIN
+            UPDATE reminders SET {NEXT_DUE_SET} WHERE id = NEW.id;
+        END
+        """,
+        "trg_reminders_after_update": f"""
+        CREATE TRIGGER trg_reminders_after_update
+        AFTER UPDATE OF
+            service_item_id,
+            interval_mileage,
+            interval_days,
+            warning_mileage_before,
+            warning_days_before
+        ON reminders
+        BEGIN
+            UPDATE reminders SET {NEXT_DUE_SET}{reset} WHERE id = NEW.id;
+        END
+        """,
+        "trg_service_items_after_update": f"""
+        CREATE TRIGGER trg_service_items_after_update
+        AFTER UPDATE OF last_service_date, last_service_mileage ON service_items
+        BEGIN
+            UPDATE reminders SET {NEXT_DUE_SET}{reset}
+            WHERE service_item_id = NEW.id;
+        END
+        """,
+    }
+
+
+TRIGGERS = reminder_triggers(reset=f", {NOTIFIED_RESET}")
+PREVIOUS_TRIGGERS = reminder_triggers(reset="")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "reminders",
+        sa.Column(
+            "notified_state",
+            sa.SmallInteger(),
+            server_default=sa.text("0"),
+            nullable=False,
+            comment="Last state the owner was notified about, reset by triggers",
+        ),
+    )
+    op.add_column(
+        "reminders",
+        sa.Column(
+            "notified_at",
+            sa.DateTime(timezone=True),
+            nullable=True,
+            comment="Date of the last notification",
+        ),
+    )
+    op.add_column(
+        "reminders",
+        sa.Column(
+            "snoozed_until",
+            sa.DateTime(timezone=True),
+            nullable=True,
+            comment="No notifications before this date",
+        ),
+    )
+    op.create_index(
+        "ix_reminders_car_pending",
+        "reminders",
+        ["car_id", "id"],
+        unique=False,
+        sqlite_where=sa.text("is_active IS NOT 0 AND notified_state < 2"),
+    )
+    for name, trigger in TRIGGERS.items():
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute(trigger)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_reminders_car_pending",
+        table_name="reminders",
+        sqlite_where=sa.text("is_active IS NOT 0 AND notified_state < 2"),
+    )
+    # The table rebuild would drop them anyway
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    with op.batch_alter_table("reminders") as batch_op:
+        batch_op.drop_column("snoozed_until")
+        batch_op.drop_column("notified_at")
+        batch_op.drop_column("notified_state")
+    for trigger in PREVIOUS_TRIGGERS.values():
+        op.execute(trigger)
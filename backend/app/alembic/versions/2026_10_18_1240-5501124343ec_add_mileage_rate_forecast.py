@@ -0,0 +1,155 @@
+"""add mileage rate forecast
+
+Revision ID: 5501124343ec
+Revises: d575eb9d4bb9
+Create Date: 2026-10-18 12:40:19.428971
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5501124343ec"
+down_revision: Union[str, Sequence[str], None] = "d575eb9d4bb9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TAU_DAYS = 30.0
+
+DAYS_SINCE_ANCHOR = (
+    "julianday(NEW.created_at) - julianday(coalesce(last_mileage_at, created_at))"
+)
+KM_SINCE_ANCHOR = "NEW.mileage - coalesce(current_mileage, first_mileage)"
+
+MILEAGE_RATE_SET = f"""
+    mileage_rate = CASE
+        WHEN {DAYS_SINCE_ANCHOR} < 0 THEN mileage_rate
+        WHEN mileage_rate IS NULL
+            THEN ({KM_SINCE_ANCHOR}) / max({DAYS_SINCE_ANCHOR}, 1.0)
+        ELSE ({TAU_DAYS} * mileage_rate + {KM_SINCE_ANCHOR})
+            / ({TAU_DAYS} + {DAYS_SINCE_ANCHOR})
+    END
+"""
+
+CAR_MILEAGE_SET = """
+    current_mileage = max(coalesce(current_mileage, NEW.mileage), NEW.mileage),
+    last_mileage_at = max(
+        coalesce(last_mileage_at, NEW.created_at), NEW.created_at
+    )
+"""
+
+MILEAGE_DUE_AT_SET = """
+    mileage_due_at = (
+        SELECT CASE WHEN cars.mileage_rate > 0 THEN datetime(
+            coalesce(cars.last_mileage_at, cars.created_at),
+            (
+                (
+                    reminders.next_due_mileage
+                    - coalesce(cars.current_mileage, cars.first_mileage)
+                ) / cars.mileage_rate
+            ) || ' days'
+        ) END
+        FROM cars WHERE cars.id = reminders.car_id
+    )
+"""
+
+
+def mileage_logs_after_insert(rate: str) -> str:
+    return f"""
+    CREATE TRIGGER trg_mileage_logs_after_insert
+    AFTER INSERT ON mileage_logs
+    BEGIN
+        UPDATE cars SET {rate}{CAR_MILEAGE_SET}
+        WHERE id = NEW.car_id;
+    END
+    """
+
+
+TRIGGERS = {
+    "trg_reminders_after_update_next_due_mileage": f"""
+    CREATE TRIGGER trg_reminders_after_update_next_due_mileage
+    AFTER UPDATE OF next_due_mileage ON reminders
+    BEGIN
+        UPDATE reminders SET {MILEAGE_DUE_AT_SET} WHERE id = NEW.id;
+    END
+    """,
+    "trg_cars_after_update_mileage": f"""
+    CREATE TRIGGER trg_cars_after_update_mileage
+    AFTER UPDATE OF current_mileage, last_mileage_at, mileage_rate ON cars
+    BEGIN
+        UPDATE reminders SET {MILEAGE_DUE_AT_SET}
+        WHERE car_id = NEW.id AND next_due_mileage IS NOT NULL;
+    END
+    """,
+    "trg_mileage_logs_after_insert": mileage_logs_after_insert(f"{MILEAGE_RATE_SET},"),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "cars",
+        sa.Column(
+            "mileage_rate",
+            sa.Double(),
+            nullable=True,
+            comment="Smoothed km per day, maintained by mileage_logs triggers",
+        ),
+    )
+    op.add_column(
+        "reminders",
+        sa.Column(
+            "mileage_due_at",
+            sa.DateTime(timezone=True),
+            nullable=True,
+            comment="Projected date next_due_mileage is reached, maintained by triggers",
+        ),
+    )
+    op.create_index(
+        "ix_reminders_mileage_due_at",
+        "reminders",
+        ["mileage_due_at"],
+        unique=False,
+    )
+    # Seed the rate with the average since the car was added
+    op.execute("""
+        UPDATE cars SET mileage_rate = (current_mileage - first_mileage)
+            / max(julianday(last_mileage_at) - julianday(created_at), 1.0)
+        WHERE current_mileage IS NOT NULL
+        """)
+    op.execute(
+        f"UPDATE reminders SET {MILEAGE_DUE_AT_SET} WHERE next_due_mileage IS NOT NULL"
+    )
+    for name, trigger in TRIGGERS.items():
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute(trigger)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.drop_index("ix_reminders_mileage_due_at", table_name="reminders")
+
+    bind = op.get_bind()
+    # Recreating a parent table with foreign keys enabled would cascade
+    # the DROP TABLE to its children
+    if bind.exec_driver_sql("PRAGMA foreign_keys").scalar():
+        raise RuntimeError("Run this migration with PRAGMA foreign_keys=OFF")
+    # SQLite refuses to rename a table while a trigger points to a missing one
+    triggers = bind.exec_driver_sql(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger'"
+    ).all()
+    for name, _ in triggers:
+        op.execute(f"DROP TRIGGER {name}")
+    with op.batch_alter_table("reminders") as batch_op:
+        batch_op.drop_column("mileage_due_at")
+    with op.batch_alter_table("cars") as batch_op:
+        batch_op.drop_column("mileage_rate")
+    for _, sql in triggers:
+        op.execute(sql)
+    op.execute(mileage_logs_after_insert(""))
@@ -0,0 +1,90 @@
+"""skip unchanged car mileage updates
+
+Revision ID: 87ba16fabfd9
+Revises: 5501124343ec
+Create Date: 2026-10-18 14:30:12.518204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "87ba16fabfd9"
+down_revision: Union[str, Sequence[str], None] = "5501124343ec"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+MILEAGE_DUE_AT_SET = """
+    mileage_due_at = (
+        SELECT CASE WHEN cars.mileage_rate > 0 THEN datetime(
+            coalesce(cars.last_mileage_at, cars.created_at),
+            (
+                (
+                    reminders.next_due_mileage
+                    - coalesce(cars.current_mileage, cars.first_mileage)
+                ) / cars.mileage_rate
+            ) || ' days'
+        ) END
+        FROM cars WHERE cars.id = reminders.car_id
+    )
+"""
+
+
+def mileage_logs_after_delete(condition: str) -> str:
+    return f"""
+    CREATE TRIGGER trg_mileage_logs_after_delete
+    AFTER DELETE ON mileage_logs
+    BEGIN
+        UPDATE cars SET
+            current_mileage = (
+                SELECT max(mileage) FROM mileage_logs WHERE car_id = cars.id
+            ),
+            last_mileage_at = (
+                SELECT max(created_at) FROM mileage_logs WHERE car_id = cars.id
+            )
+        WHERE id = OLD.car_id{condition};
+    END
+    """
+
+
+def cars_after_update_mileage(condition: str) -> str:
+    return f"""
+    CREATE TRIGGER trg_cars_after_update_mileage
+    AFTER UPDATE OF current_mileage, last_mileage_at, mileage_rate ON cars{condition}
+    BEGIN
+        UPDATE reminders SET {MILEAGE_DUE_AT_SET}
+        WHERE car_id = NEW.id AND next_due_mileage IS NOT NULL;
+    END
+    """
+
+
+# A log below the maximum and before the latest reading changes neither
+DELETED_LOG_MOVES_CAR = """
+            AND NOT (
+                OLD.mileage < current_mileage AND OLD.created_at < last_mileage_at
+            )"""
+
+CAR_MILEAGE_CHANGED = """
+    WHEN OLD.current_mileage IS NOT NEW.current_mileage
+        OR OLD.last_mileage_at IS NOT NEW.last_mileage_at
+        OR OLD.mileage_rate IS NOT NEW.mileage_rate"""
+
+
+def replace_triggers(delete_condition: str, update_condition: str) -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_mileage_logs_after_delete")
+    op.execute(mileage_logs_after_delete(delete_condition))
+    op.execute("DROP TRIGGER IF EXISTS trg_cars_after_update_mileage")
+    op.execute(cars_after_update_mileage(update_condition))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    replace_triggers(DELETED_LOG_MOVES_CAR, CAR_MILEAGE_CHANGED)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    replace_triggers("", "")
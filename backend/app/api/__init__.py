@@ -0,0 +1,8 @@
+__all__ = ["router"]
+
+from fastapi import APIRouter
+
+from .metrics import router as metrics_router
+
+router = APIRouter()
+router.include_router(metrics_router)
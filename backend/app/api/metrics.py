@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Response
+
+from core.db_helper import get_db_helper
+from core.metrics import CONTENT_TYPE, render
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics")
+async def metrics() -> Response:
+    """Database and cache metrics in the Prometheus text format."""
+    return Response(render(get_db_helper().metrics), media_type=CONTENT_TYPE)
@@ -0,0 +1,229 @@
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterator, TypeVar
+from uuid import UUID
+
+from sqlalchemy import Insert, event, select
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.orm.util import identity_key
+
+from core.config import get_settings
+from core.metrics import Counter, Gauge, Metric
+from core.models import Car, MileageLog, Reminder, ServiceItem
+
+T = TypeVar("T")
+
+# Rows of these models belong to a user through their car
+CAR_CHILDREN = (MileageLog, Reminder, ServiceItem)
+
+# Marker for "invalidate every user", used for statements without row values
+ALL_USERS = object()
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class UserCache:
+    """
+    Size-bounded LRU cache with TTL for per-user read models.
+
+    Values are keyed by `User.tg_id` and a view name ("cars", "due", ...).
+    Session events below drop every view of a user after a transaction that
+    changed one of the user's cars, mileage logs, items or reminders commits.
+    Cached values are shared between requests and must be treated as read-only.
+
+    Only writes that go through an ORM `Session` are seen; statements run on
+    a bare `Connection` must invalidate the cache themselves.
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl: float = 300) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries: OrderedDict[tuple[int, str], tuple[float, Any]] = OrderedDict()
+        self._views: dict[int, set[str]] = {}
+        # Loads in flight per user, and the user's invalidations since the
+        # first of them started: a load that raced one is not stored
+        self._loading: dict[int, int] = {}
+        self._generations: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, key: tuple[int, str]) -> None:
+        del self._entries[key]
+        views = self._views[key[0]]
+        views.discard(key[1])
+        if not views:
+            del self._views[key[0]]
+
+    def get(self, user_tg_id: int, view: str, default: Any = None) -> Any:
+        key = (user_tg_id, view)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._drop(key)
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set(self, user_tg_id: int, view: str, value: Any) -> None:
+        key = (user_tg_id, view)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        self._views.setdefault(user_tg_id, set()).add(view)
+        while len(self._entries) > self.max_size:
+            self._drop(next(iter(self._entries)))
+            self.stats.evictions += 1
+
+    async def get_or_load(
+        self,
+        user_tg_id: int,
+        view: str,
+        loader: Callable[[], Awaitable[T]],
+    ) -> T:
+        missing = object()
+        value = self.get(user_tg_id, view, missing)
+        if value is not missing:
+            return value
+        self._loading[user_tg_id] = self._loading.get(user_tg_id, 0) + 1
+        generation = self._generations.setdefault(user_tg_id, 0)
+        try:
+            value = await loader()
+            if generation == self._generations[user_tg_id]:
+                self.set(user_tg_id, view, value)
+        finally:
+            self._loading[user_tg_id] -= 1
+            if not self._loading[user_tg_id]:
+                del self._loading[user_tg_id]
+                del self._generations[user_tg_id]
+        return value
+
+    def invalidate(self, user_tg_id: int) -> None:
+        if user_tg_id in self._generations:
+            self._generations[user_tg_id] += 1
+        for view in list(self._views.get(user_tg_id, ())):
+            self._drop((user_tg_id, view))
+            self.stats.invalidations += 1
+
+    def collect(self) -> Iterator[Metric]:
+        """Current counters as metrics, for `Registry.register_collector`."""
+        for field in ("hits", "misses", "evictions", "expirations", "invalidations"):
+            counter = Counter(f"user_cache_{field}_total", f"User cache {field}")
+            counter.inc(getattr(self.stats, field))
+            yield counter
+        size = Gauge("user_cache_entries", "Entries in the user cache")
+        size.set(len(self))
+        yield size
+
+    def clear(self) -> None:
+        for user_tg_id in self._generations:
+            self._generations[user_tg_id] += 1
+        self.stats.invalidations += len(self._entries)
+        self._entries.clear()
+        self._views.clear()
+
+
+_user_cache: UserCache | None = None
+
+
+def get_user_cache() -> UserCache:
+    """The process-wide user cache, created from the settings on first call."""
+    global _user_cache
+    if _user_cache is None:
+        settings = get_settings()
+        _user_cache = UserCache(
+            max_size=settings.cache.max_size,
+            ttl=settings.cache.ttl_seconds,
+        )
+    return _user_cache
+
+
+PENDING_KEY = "user_cache_invalidate"
+
+
+def _pending(session: Session) -> set:
+    return session.info.setdefault(PENDING_KEY, set())
+
+
+@event.listens_for(Session, "after_flush")
+def collect_changed_users(session: Session, flush_context) -> None:
+    """Remember whose read models the flushed rows belong to."""
+    # Nothing to invalidate, and no owner lookups, before the cache exists
+    if _user_cache is None:
+        return
+    pending = _pending(session)
+    car_ids: set[UUID] = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Car):
+            pending.add(obj.user_tg_id)
+        elif isinstance(obj, CAR_CHILDREN):
+            car = session.identity_map.get(identity_key(Car, obj.car_id))
+            if car is not None:
+                pending.add(car.user_tg_id)
+            else:
+                car_ids.add(obj.car_id)
+    if car_ids:
+        stmt = select(Car.user_tg_id).where(Car.id.in_(car_ids))
+        pending.update(session.execute(stmt).scalars())
+
+
+@event.listens_for(Session, "do_orm_execute")
+def collect_bulk_changes(state: ORMExecuteState) -> None:
+    """ORM-enabled INSERT/UPDATE/DELETE statements bypass the flush."""
+    if _user_cache is None or state.is_select:
+        return
+    mapper = state.bind_mapper
+    if mapper is None or not issubclass(mapper.class_, (Car, *CAR_CHILDREN)):
+        return
+    params = state.parameters
+    rows = [params] if isinstance(params, Mapping) else list(params or ())
+    if not rows and isinstance(state.statement, Insert):
+        # insert(...).values(...) carries its values in the statement
+        rows = [state.statement.compile().params]
+    column = "user_tg_id" if mapper.class_ is Car else "car_id"
+    if state.is_insert and rows and all(column in row for row in rows):
+        if column == "user_tg_id":
+            _pending(state.session).update(row[column] for row in rows)
+            return
+        stmt = select(Car.user_tg_id).where(Car.id.in_({row[column] for row in rows}))
+        _pending(state.session).update(state.session.execute(stmt).scalars())
+        return
+    # Criteria statements do not say which rows they touch
+    _pending(state.session).add(ALL_USERS)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_changed_users(session: Session) -> None:
+    pending = session.info.pop(PENDING_KEY, set())
+    if _user_cache is None:
+        return
+    if ALL_USERS in pending:
+        _user_cache.clear()
+        return
+    for user_tg_id in pending:
+        _user_cache.invalidate(user_tg_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_changed_users(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
@@ -1,6 +1,7 @@
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
-from typing import ClassVar
+from typing import ClassVar, Literal
 
 from pydantic import BaseModel, FilePath, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -20,23 +21,69 @@ class ApiPrefix(BaseModel):
     prefix: str = "/api"
 
 
+class SqliteProfile(BaseModel):
+    """PRAGMAs applied to every new SQLite connection."""
+
+    journal_mode: Literal["DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL"] = "WAL"
+    synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    # Negative values are KiB, positive values are pages
+    cache_size: int = -16_000
+    mmap_size: int = 0
+    temp_store: Literal["DEFAULT", "FILE", "MEMORY"] = "MEMORY"
+    # Milliseconds to wait for a lock before "database is locked"
+    busy_timeout: int = 5_000
+    foreign_keys: bool = True
+
+    def pragmas(self, read_only: bool = False) -> list[tuple[str, str | int]]:
+        # busy_timeout goes first, switching journal_mode may wait for a lock
+        pragmas: list[tuple[str, str | int]] = [("busy_timeout", self.busy_timeout)]
+        if not read_only:
+            # Persistent, and a read-only connection can't change it
+            pragmas.append(("journal_mode", self.journal_mode))
+        return pragmas + [
+            ("synchronous", self.synchronous),
+            ("cache_size", self.cache_size),
+            ("mmap_size", self.mmap_size),
+            ("temp_store", self.temp_store),
+            ("foreign_keys", "ON" if self.foreign_keys else "OFF"),
+        ]
+
+
+SQLITE_PROFILES: dict[AppMode, SqliteProfile] = {
+    AppMode.dev: SqliteProfile(),
+    AppMode.prod: SqliteProfile(
+        cache_size=-64_000,
+        mmap_size=256 * 1024 * 1024,
+        busy_timeout=10_000,
+    ),
+}
+
+
 class DatabaseConfig(BaseModel):
     file_path: FilePath
     echo: bool = False
     echo_pool: bool = False
-
-    naming_conventions: dict[str, str] = {
-        "ix": "ix_%(column_0_label)s",
-        "uq": "uq_%(table_name)s_%(column_0_N_name)s",
-        "ck": "ck_%(table_name)s_%(constraint_name)s",
-        "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
-        "pk": "pk_%(table_name)s",
-    }
+    # Overrides the preset of the current mode
+    sqlite: SqliteProfile | None = None
+    read_pool_size: int = 5
+    write_batch_size: int = 100
+    write_queue_size: int = 10_000
+    # Transactions held longer than this are logged with their origin
+    long_transaction_seconds: float = 1.0
+    # Stack of every session's creation for those logs, costs a stack walk
+    # per session. Unset: on in dev mode only
+    capture_session_stacks: bool | None = None
+    # Statements slower than this are logged with their parameters
+    slow_query_seconds: float = 0.2
 
     @property
     def url(self) -> str:
         return f"sqlite+aiosqlite:///{self.file_path}"
 
+    @property
+    def read_only_url(self) -> str:
+        return f"sqlite+aiosqlite:///file:{self.file_path}?mode=ro&uri=true"
+
     @field_validator("file_path", mode="before")
     @classmethod
     def ensure_sqlite_file(cls, v):
@@ -49,6 +96,41 @@ class DatabaseConfig(BaseModel):
         return p
 
 
+class SweepConfig(BaseModel):
+    chunk_size: int = 1000
+    interval_seconds: float = 3600
+
+
+class SchedulerConfig(BaseModel):
+    horizon_seconds: float = 86400
+
+
+class CacheConfig(BaseModel):
+    max_size: int = 10_000
+    ttl_seconds: float = 300
+
+
+class CompactionConfig(BaseModel):
+    # Logs younger than this stay at full resolution
+    keep_days: int = 180
+    bucket: Literal["week", "month"] = "month"
+    cars_per_batch: int = 100
+    interval_seconds: float = 86400
+
+
+class NotificationConfig(BaseModel):
+    bot_token: str = ""
+    api_url: str = "https://api.telegram.org"
+    workers: int = 4
+    queue_size: int = 10_000
+    # Bot API limits: ~30 messages/s overall, 1 message/s per chat
+    global_rate: float = 30.0
+    chat_rate: float = 1.0
+    max_retries: int = 3
+    backoff_seconds: float = 0.5
+    timeout_seconds: float = 10.0
+
+
 class Settings(BaseSettings):
     model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(
         env_file=(".env.template", ".env"),
@@ -60,6 +142,29 @@ class Settings(BaseSettings):
     run: UvicornConfig = UvicornConfig()
     api: ApiPrefix = ApiPrefix()
     db: DatabaseConfig
+    sweep: SweepConfig = SweepConfig()
+    scheduler: SchedulerConfig = SchedulerConfig()
+    compaction: CompactionConfig = CompactionConfig()
+    cache: CacheConfig = CacheConfig()
+    notifications: NotificationConfig = NotificationConfig()
+
+    @property
+    def sqlite_profile(self) -> SqliteProfile:
+        return self.db.sqlite or SQLITE_PROFILES[self.mode]
+
+    @property
+    def capture_session_stacks(self) -> bool:
+        if self.db.capture_session_stacks is not None:
+            return self.db.capture_session_stacks
+        return self.mode is AppMode.dev
+
 
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Settings are read on first use, not on import.
 
-settings = Settings()  # type: ignore
+    Reading them parses the env files and creates the database file, which
+    processes that only need the models (Alembic, tests, workers) don't want.
+    """
+    return Settings()  # type: ignore
@@ -1,6 +1,7 @@
 from asyncio import current_task
 from typing import AsyncGenerator
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -9,57 +10,191 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 
-from core.config import settings
+from core.config import SqliteProfile, get_settings
+from core.db_monitor import SessionMonitor, TrackedSession
+from core.db_writer import WriteQueue
+from core.metrics import Registry
+from core.query_metrics import QueryMetrics, TimedQueuePool
 
 
 class DatabaseHelper:
+    """
+    Engines and session factories of the application database.
+
+    - `read_session_factory`: sessions for reads, they never take the write
+      lock (`mode=ro` connections when `read_url` is set).
+    - `writer`: the way to write. `await writer.submit(job)` runs
+      `job(session)` on the single write connection and returns after the
+      commit, together with the jobs queued alongside it. The job must not
+      commit itself and may run twice, see `WriteQueue.submit`.
+    - `session_factory` / `scoped_session`: read-write sessions on their own
+      pool, for migrations, maintenance jobs and services that take a
+      session and commit it themselves. Writes from them compete with the
+      writer for the SQLite lock, wait up to `busy_timeout` and hold up
+      every queued job meanwhile, so request handlers should not write
+      through them.
+    """
+
     def __init__(
         self,
         url: str,
         echo: bool = False,
         echo_pool: bool = False,
+        sqlite_profile: SqliteProfile | None = None,
+        read_url: str | None = None,
+        read_pool_size: int = 5,
+        write_batch_size: int = 100,
+        write_queue_size: int = 10_000,
+        long_transaction: float = 1.0,
+        capture_session_stacks: bool = False,
+        slow_query: float = 0.2,
     ) -> None:
+        self.metrics = Registry()
+        self.monitor = SessionMonitor(
+            self.metrics,
+            long_transaction=long_transaction,
+            capture_stacks=capture_session_stacks,
+        )
+        self.query_metrics = QueryMetrics(self.metrics, slow_query=slow_query)
+
         self.engine: AsyncEngine = create_async_engine(
             url=url,
             echo=echo,
             echo_pool=echo_pool,
+            poolclass=TimedQueuePool,
         )
-        self.session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
-            bind=self.engine,
-            autoflush=False,
-            autocommit=False,
-            expire_on_commit=False,
+        self.session_factory = self._make_session_factory(self.engine)
+
+        # Read-only pool, sessions from it never take the write lock
+        self.read_engine: AsyncEngine = create_async_engine(
+            url=read_url or url,
+            echo=echo,
+            echo_pool=echo_pool,
+            poolclass=TimedQueuePool,
+            pool_size=read_pool_size,
+        )
+        self.read_session_factory = self._make_session_factory(self.read_engine)
+
+        # The only connection that writes, fed by the write queue
+        self.write_engine: AsyncEngine = create_async_engine(
+            url=url,
+            echo=echo,
+            echo_pool=echo_pool,
+            poolclass=TimedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+        )
+        self.writer = WriteQueue(
+            session_factory=self._make_session_factory(self.write_engine),
+            batch_size=write_batch_size,
+            queue_size=write_queue_size,
         )
 
-    def get_scoped_session(self):
-        session = async_scoped_session(
+        self.scoped_session = async_scoped_session(
             session_factory=self.session_factory,
             scopefunc=current_task,
         )
-        return session
+
+        for name, engine in (
+            ("main", self.engine),
+            ("read", self.read_engine),
+            ("write", self.write_engine),
+        ):
+            self.monitor.watch_engine(engine, name)
+            self.query_metrics.watch_engine(engine, name)
+
+        if sqlite_profile is not None:
+            self.apply_sqlite_profile(self.engine, sqlite_profile)
+            self.apply_sqlite_profile(self.write_engine, sqlite_profile)
+            self.apply_sqlite_profile(
+                self.read_engine,
+                sqlite_profile,
+                read_only=read_url is not None,
+            )
+
+    def _make_session_factory(
+        self, engine: AsyncEngine
+    ) -> async_sessionmaker[AsyncSession]:
+        return async_sessionmaker(
+            bind=engine,
+            class_=TrackedSession,
+            autoflush=False,
+            autocommit=False,
+            expire_on_commit=False,
+            monitor=self.monitor,
+        )
+
+    @staticmethod
+    def apply_sqlite_profile(
+        engine: AsyncEngine,
+        profile: SqliteProfile,
+        read_only: bool = False,
+    ) -> None:
+        @event.listens_for(engine.sync_engine, "connect")
+        def set_pragmas(dbapi_connection, connection_record) -> None:
+            cursor = dbapi_connection.cursor()
+            for name, value in profile.pragmas(read_only=read_only):
+                cursor.execute(f"PRAGMA {name} = {value}")
+            cursor.close()
+
+    def get_scoped_session(self) -> async_scoped_session[AsyncSession]:
+        return self.scoped_session
 
     async def session_dependency(self) -> AsyncGenerator[AsyncSession, None]:
         async with self.session_factory() as session:
             yield session
-            await session.close()
 
     async def scoped_session_dependency(
         self,
     ) -> AsyncGenerator[async_scoped_session[AsyncSession], None]:
-        session = self.get_scoped_session()
-        yield session
-        await session.close()
+        try:
+            yield self.scoped_session
+        finally:
+            # Closes the session and drops the registry entry of this task
+            await self.scoped_session.remove()
 
     async def dispose(self) -> None:
+        await self.writer.close()
         await self.engine.dispose()
+        await self.read_engine.dispose()
+        await self.write_engine.dispose()
 
     async def session_getter(self) -> AsyncGenerator[AsyncSession, None]:
         async with self.session_factory() as session:
             yield session
 
+    async def read_session_getter(self) -> AsyncGenerator[AsyncSession, None]:
+        async with self.read_session_factory() as session:
+            yield session
 
-db_helper = DatabaseHelper(
-    url=str(settings.db.url),
-    echo=settings.db.echo,
-    echo_pool=settings.db.echo_pool,
-)
+
+_db_helper: DatabaseHelper | None = None
+
+
+def get_db_helper() -> DatabaseHelper:
+    """The application database helper, engines are created on first call."""
+    global _db_helper
+    if _db_helper is None:
+        settings = get_settings()
+        _db_helper = DatabaseHelper(
+            url=str(settings.db.url),
+            echo=settings.db.echo,
+            echo_pool=settings.db.echo_pool,
+            sqlite_profile=settings.sqlite_profile,
+            read_url=settings.db.read_only_url,
+            read_pool_size=settings.db.read_pool_size,
+            write_batch_size=settings.db.write_batch_size,
+            write_queue_size=settings.db.write_queue_size,
+            long_transaction=settings.db.long_transaction_seconds,
+            capture_session_stacks=settings.capture_session_stacks,
+            slow_query=settings.db.slow_query_seconds,
+        )
+    return _db_helper
+
+
+async def dispose_db_helper() -> None:
+    """Close the engines, the next `get_db_helper()` creates new ones."""
+    global _db_helper
+    if _db_helper is not None:
+        helper, _db_helper = _db_helper, None
+        await helper.dispose()
@@ -0,0 +1,165 @@
+import logging
+import time
+import traceback
+import weakref
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+
+from core.metrics import Counter, Gauge, Histogram, Registry
+
+log = logging.getLogger(__name__)
+
+MONITOR_KEY = "session_monitor"
+RECORD_KEY = "session_record"
+BEGAN_AT_KEY = "transaction_began_at"
+
+
+@dataclass(slots=True)
+class SessionRecord:
+    opened_at: float
+    finalizer: weakref.finalize
+    stack: list[traceback.FrameSummary] | None = None
+
+    def format_stack(self) -> str:
+        if self.stack is None:
+            return "(stack capture is disabled)\n"
+        return "".join(traceback.format_list(self.stack))
+
+
+class SessionMonitor:
+    """
+    Tracks session lifetimes, open transactions and checked-out connections.
+
+    SQLite has one write lock, a session that keeps its transaction open
+    stalls every writer behind it. Transactions held longer than
+    `long_transaction` seconds are counted and logged with the stack that
+    created their session; sessions garbage-collected without `close()`
+    are reported the same way. Capturing that stack walks the frames on
+    every session, so it is off unless `capture_stacks` is set.
+    """
+
+    def __init__(
+        self,
+        registry: Registry,
+        long_transaction: float = 1.0,
+        capture_stacks: bool = False,
+    ) -> None:
+        self.long_transaction = long_transaction
+        self.capture_stacks = capture_stacks
+        self._sessions: dict[int, SessionRecord] = {}
+
+        self.open_sessions = registry.register(
+            Gauge("db_sessions_open", "Sessions created and not closed yet")
+        )
+        self.session_lifetime = registry.register(
+            Histogram("db_session_lifetime_seconds", "Time from creation to close")
+        )
+        self.leaked_sessions = registry.register(
+            Counter(
+                "db_sessions_leaked_total",
+                "Sessions garbage-collected without being closed",
+            )
+        )
+        self.transaction_duration = registry.register(
+            Histogram("db_transaction_seconds", "Time a transaction was held open")
+        )
+        self.long_transactions = registry.register(
+            Counter(
+                "db_transactions_long_total",
+                "Transactions held longer than the threshold",
+            )
+        )
+        self.checked_out = registry.register(
+            Gauge(
+                "db_connections_checked_out",
+                "Pool connections currently in use",
+                labelnames=("engine",),
+            )
+        )
+
+    def session_opened(self, session: "TrackedSession") -> None:
+        key = id(session)
+        self._sessions[key] = SessionRecord(
+            opened_at=time.perf_counter(),
+            finalizer=weakref.finalize(session, self._session_collected, key),
+            stack=traceback.extract_stack()[:-2] if self.capture_stacks else None,
+        )
+        # Lets sync-level events find the monitor and the record
+        session.sync_session.info[MONITOR_KEY] = self
+        session.sync_session.info[RECORD_KEY] = key
+        self.open_sessions.inc()
+
+    def session_closed(self, session: "TrackedSession") -> None:
+        record = self._sessions.pop(id(session), None)
+        if record is None:
+            return
+        record.finalizer.detach()
+        self.open_sessions.dec()
+        self.session_lifetime.observe(time.perf_counter() - record.opened_at)
+
+    def _session_collected(self, key: int) -> None:
+        record = self._sessions.pop(key, None)
+        if record is None:
+            return
+        self.open_sessions.dec()
+        self.leaked_sessions.inc()
+        log.warning(
+            "Session garbage-collected without close(), created at:\n%s",
+            record.format_stack(),
+        )
+
+    def transaction_ended(self, session: Session, duration: float) -> None:
+        self.transaction_duration.observe(duration)
+        if duration < self.long_transaction:
+            return
+        self.long_transactions.inc()
+        key = session.info.get(RECORD_KEY)
+        record = self._sessions.get(key) if key is not None else None
+        log.warning(
+            "Transaction held for %.3fs, session created at:\n%s",
+            duration,
+            record.format_stack() if record else "(unknown)\n",
+        )
+
+    def watch_engine(self, engine: AsyncEngine, name: str) -> None:
+        labels = (name,)
+
+        @event.listens_for(engine.sync_engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            self.checked_out.inc(labels=labels)
+
+        @event.listens_for(engine.sync_engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            self.checked_out.dec(labels=labels)
+
+
+class TrackedSession(AsyncSession):
+    """`AsyncSession` that reports its lifetime to a `SessionMonitor`."""
+
+    def __init__(self, *args, monitor: SessionMonitor, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.monitor = monitor
+        monitor.session_opened(self)
+
+    async def close(self) -> None:
+        try:
+            await super().close()
+        finally:
+            self.monitor.session_closed(self)
+
+
+@event.listens_for(Session, "after_begin")
+def mark_transaction_begin(session: Session, transaction, connection) -> None:
+    if MONITOR_KEY in session.info:
+        session.info.setdefault(BEGAN_AT_KEY, time.perf_counter())
+
+
+@event.listens_for(Session, "after_transaction_end")
+def measure_transaction(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is not None or BEGAN_AT_KEY not in session.info:
+        return
+    duration = time.perf_counter() - session.info.pop(BEGAN_AT_KEY)
+    session.info[MONITOR_KEY].transaction_ended(session, duration)
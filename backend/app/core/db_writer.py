@@ -0,0 +1,122 @@
+import asyncio
+from typing import Any, Awaitable, Callable, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+T = TypeVar("T")
+
+WriteJob = Callable[[AsyncSession], Awaitable[T]]
+
+
+class WriteQueue:
+    """
+    Serializes all writes through one connection.
+
+    SQLite allows a single writer at a time, so instead of letting sessions
+    fight for the lock, jobs are queued and executed by one task. Jobs that
+    are queued together share one transaction (and one fsync). If that
+    transaction fails, its jobs are rerun one transaction each, so a failing
+    job does not take its neighbours down with it.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        batch_size: int = 100,
+        queue_size: int = 10_000,
+    ) -> None:
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self._queue: asyncio.Queue[tuple[WriteJob[Any], asyncio.Future[Any]]] = (
+            asyncio.Queue(maxsize=queue_size)
+        )
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="db-writer")
+
+    async def submit(self, job: WriteJob[T]) -> T:
+        """
+        Run `job` in the writer transaction, return after the commit.
+
+        The job may be called a second time when its batch fails, so it should
+        not have side effects outside of the session.
+        """
+        self.start()
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        await self._queue.put((job, future))
+        return await future
+
+    async def close(self) -> None:
+        """Finish queued jobs and stop the writer task."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(
+        self,
+        batch: list[tuple[WriteJob[Any], asyncio.Future[Any]]],
+    ) -> None:
+        batch = [(job, future) for job, future in batch if not future.cancelled()]
+        if not batch:
+            return
+        try:
+            results = await self._write_together(batch)
+        except Exception:
+            # Isolate the failing job: rerun every job in its own transaction
+            for job, future in batch:
+                await self._write_alone(job, future)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _write_together(
+        self,
+        batch: list[tuple[WriteJob[Any], asyncio.Future[Any]]],
+    ) -> list[Any]:
+        async with self.session_factory() as session:
+            results = []
+            for job, _ in batch:
+                results.append(await job(session))
+                await session.flush()
+            await session.commit()
+        return results
+
+    async def _write_alone(
+        self,
+        job: WriteJob[Any],
+        future: asyncio.Future[Any],
+    ) -> None:
+        try:
+            async with self.session_factory() as session:
+                result = await job(session)
+                await session.commit()
+        except Exception as exc:
+            if not future.done():
+                future.set_exception(exc)
+        else:
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,201 @@
+from bisect import bisect_left
+from math import inf
+from typing import Callable, ClassVar, Iterable, Iterator, TypeVar
+
+Labels = tuple[str, ...]
+
+# Seconds, from sub-millisecond SQLite reads to lock stalls
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    inf,
+)
+
+
+class Metric:
+    """
+    Minimal in-process metric in the Prometheus data model.
+
+    Values are kept per tuple of label values, in the order of `labelnames`.
+    """
+
+    type: ClassVar[str]
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Labels = (),
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def _check(self, labels: Labels) -> None:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.values: dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, labels: Labels = ()) -> None:
+        self._check(labels)
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def get(self, labels: Labels = ()) -> float:
+        return self.values.get(labels, 0.0)
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, labels: Labels = ()) -> None:
+        self.inc(-amount, labels)
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        self._check(labels)
+        self.values[labels] = value
+
+
+class HistogramValue:
+    __slots__ = ("buckets", "count", "sum")
+
+    def __init__(self, size: int) -> None:
+        self.buckets = [0] * size
+        self.count = 0
+        self.sum = 0.0
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Labels = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        if buckets[-1] != inf:
+            buckets = (*buckets, inf)
+        self.buckets = buckets
+        self.values: dict[Labels, HistogramValue] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        self._check(labels)
+        histogram = self.values.get(labels)
+        if histogram is None:
+            histogram = self.values[labels] = HistogramValue(len(self.buckets))
+        # Buckets are not cumulative here, they are summed up on export
+        histogram.buckets[bisect_left(self.buckets, value)] += 1
+        histogram.count += 1
+        histogram.sum += value
+
+    def quantile(self, q: float, labels: Labels = ()) -> float:
+        """Upper bound of the bucket holding the `q` quantile."""
+        histogram = self.values.get(labels)
+        if histogram is None or not histogram.count:
+            return 0.0
+        rank = q * histogram.count
+        seen = 0
+        for bound, count in zip(self.buckets, histogram.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return inf
+
+
+M = TypeVar("M", bound=Metric)
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+        self._collectors: list[Callable[[], Iterable[Metric]]] = []
+
+    def register(self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Metric]]) -> None:
+        """Add metrics that are built from some other state on every scrape."""
+        self._collectors.append(collector)
+
+    def __iter__(self) -> Iterator[Metric]:
+        yield from self._metrics.values()
+        for collector in self._collectors:
+            yield from collector()
+
+    def get(self, name: str) -> Metric | None:
+        return self._metrics.get(name)
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render(registry: Registry) -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in registry:
+        lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        if isinstance(metric, Histogram):
+            for labels, value in metric.values.items():
+                cumulative = 0
+                for bound, count in zip(metric.buckets, value.buckets):
+                    cumulative += count
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(
+                        f"{metric.name}_bucket"
+                        f"{_format_labels(metric.labelnames, labels, le)} {cumulative}"
+                    )
+                suffix = _format_labels(metric.labelnames, labels)
+                lines.append(f"{metric.name}_sum{suffix} {_format_value(value.sum)}")
+                lines.append(f"{metric.name}_count{suffix} {value.count}")
+        elif isinstance(metric, Counter):
+            # Gauges too
+            for labels, number in metric.values.items():
+                lines.append(
+                    f"{metric.name}{_format_labels(metric.labelnames, labels)} "
+                    f"{_format_value(number)}"
+                )
+    return "\n".join(lines) + "\n"
@@ -4,12 +4,15 @@ __all__ = [
     "Car",
     "ServiceItem",
     "MileageLog",
+    "MileageLogArchive",
     "Reminder",
+    "ReminderState",
 ]
 
 from .base import Base
 from .car import Car
 from .mileage_log import MileageLog
-from .reminder import Reminder
+from .mileage_log_archive import MileageLogArchive
+from .reminder import Reminder, ReminderState
 from .service_item import ServiceItem
 from .user import User
@@ -1,17 +1,33 @@
+from uuid import UUID
+
 from sqlalchemy import MetaData
 from sqlalchemy.orm import DeclarativeBase, declared_attr
 
-from core.config import settings
 from utils import camel_case_to_snake_case
 
+from .types import BinaryUUID
+
+# Constraint names are baked into the migrations, this is not a setting
+NAMING_CONVENTIONS = {
+    "ix": "ix_%(column_0_label)s",
+    "uq": "uq_%(table_name)s_%(column_0_N_name)s",
+    "ck": "ck_%(table_name)s_%(constraint_name)s",
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+    "pk": "pk_%(table_name)s",
+}
+
 
 class Base(DeclarativeBase):
     __abstract__ = True
 
     metadata = MetaData(
-        naming_convention=settings.db.naming_conventions,
+        naming_convention=NAMING_CONVENTIONS,
     )
 
+    type_annotation_map = {
+        UUID: BinaryUUID,
+    }
+
     @declared_attr.directive
     def __tablename__(cls) -> str:
         return f"{camel_case_to_snake_case(cls.__name__)}s"
@@ -1,12 +1,19 @@
+from datetime import date, datetime, timedelta
 from typing import TYPE_CHECKING
 
-from sqlalchemy import CheckConstraint, ColumnElement, ForeignKey, func, select
+from sqlalchemy import CheckConstraint, ColumnElement, DateTime, ForeignKey, func
 from sqlalchemy.ext import hybrid
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
+
+from utils import as_utc
 
 from .base import Base
 from .mixins import CreatedAtMixin, IdMixin, UpdatedAtMixin
 
+# Time constant of the smoothed driving rate: a reading `days` after the
+# previous one weighs days / (MILEAGE_RATE_TAU_DAYS + days) of the new rate
+MILEAGE_RATE_TAU_DAYS = 30.0
+
 if TYPE_CHECKING:
     from .mileage_log import MileageLog
     from .reminder import Reminder
@@ -47,6 +54,22 @@ class Car(Base, IdMixin, CreatedAtMixin, UpdatedAtMixin):
         comment="First mileage at adding to the bot",
     )
 
+    current_mileage: Mapped[int | None] = mapped_column(
+        nullable=True,
+        comment="Max logged mileage, maintained by mileage_logs triggers",
+    )
+
+    last_mileage_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Date of the latest mileage log",
+    )
+
+    mileage_rate: Mapped[float | None] = mapped_column(
+        nullable=True,
+        comment="Smoothed km per day, maintained by mileage_logs triggers",
+    )
+
     mileage_logs: Mapped[list["MileageLog"]] = relationship(
         back_populates="car",
         cascade="all, delete-orphan",
@@ -69,26 +92,56 @@ class Car(Base, IdMixin, CreatedAtMixin, UpdatedAtMixin):
     @hybrid.hybrid_property
     def mileage(self) -> int:
         """Current mileage of the car (derived from logs or initial value)."""
-        if not self.mileage_logs:
+        if self.current_mileage is None:
             return self.first_mileage
-        return max(log.mileage for log in self.mileage_logs)
+        return self.current_mileage
 
     # SQL-level derived field
     @mileage.inplace.expression
     @classmethod
     def _mileage_expression(cls) -> ColumnElement[int]:
         """SQL expression to compute current mileage."""
-        from .mileage_log import MileageLog
-
-        return (
-            select(func.coalesce(func.max(MileageLog.mileage), cls.first_mileage))
-            .where(MileageLog.car_id == cls.id)
-            .scalar_subquery()
+        return func.coalesce(cls.current_mileage, cls.first_mileage)
+
+    def next_mileage_rate(self, mileage: int, at: datetime) -> float | None:
+        """
+        `mileage_rate` after a reading of `mileage` at `at`, as the insert
+        trigger on mileage_logs computes it.
+
+        The distance since the latest reading (or since the car was added) is
+        blended into the rate with an exponentially weighted moving average,
+        `(tau * rate + km) / (tau + days)`. A reading older than the latest
+        one leaves the rate as it is.
+        """
+        anchor_at = as_utc(self.last_mileage_at or self.created_at)
+        days = (as_utc(at) - anchor_at) / timedelta(days=1)
+        if days < 0:
+            return self.mileage_rate
+        km = mileage - self.mileage
+        if self.mileage_rate is None:
+            # Readings minutes apart say nothing about a daily rate yet
+            return km / max(days, 1.0)
+        return (MILEAGE_RATE_TAU_DAYS * self.mileage_rate + km) / (
+            MILEAGE_RATE_TAU_DAYS + days
         )
 
+    def date_at_mileage(self, mileage: int) -> datetime | None:
+        """Projected date the odometer reaches `mileage` at the current rate."""
+        if not self.mileage_rate or self.mileage_rate <= 0:
+            return None
+        anchor_at = as_utc(self.last_mileage_at or self.created_at)
+        return anchor_at + timedelta(days=(mileage - self.mileage) / self.mileage_rate)
+
+    @validates("year")
+    def validate_year(self, key: str, value: int) -> int:
+        # SQLite rejects 'now' in CHECK constraints, the upper bound lives here
+        if value > date.today().year:
+            raise ValueError(f"{key} must not be in the future")
+        return value
+
     __table_args__ = (
         CheckConstraint(
-            "year >= 1930 AND year <= CAST(strftime('%Y','now') AS INTEGER)",
+            "year >= 1930",
             name="car_year_valid",
         ),
     )
@@ -1,15 +1,134 @@
 from typing import TYPE_CHECKING
 from uuid import UUID
 
-from sqlalchemy import CheckConstraint, ForeignKey, Index
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import DDL, CheckConstraint, ForeignKey, Index, event, inspect
+from sqlalchemy.orm import Mapped, Session, mapped_column, relationship
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+
+from utils import as_utc
 
 from .base import Base
+from .car import MILEAGE_RATE_TAU_DAYS
 from .mixins import CreatedAtMixin, IdMixin, UpdatedAtMixin
 
 if TYPE_CHECKING:
     from .car import Car
 
+# Days between the new log and the latest one, or the date the car was added
+_DAYS_SINCE_ANCHOR = (
+    "julianday(NEW.created_at) - julianday(coalesce(last_mileage_at, created_at))"
+)
+_KM_SINCE_ANCHOR = "NEW.mileage - coalesce(current_mileage, first_mileage)"
+
+# Exponentially weighted km/day, see `Car.next_mileage_rate`. SET expressions
+# read the values from before the UPDATE, the anchor is the previous reading.
+_MILEAGE_RATE_SET = f"""
+    mileage_rate = CASE
+        WHEN {_DAYS_SINCE_ANCHOR} < 0 THEN mileage_rate
+        WHEN mileage_rate IS NULL
+            THEN ({_KM_SINCE_ANCHOR}) / max({_DAYS_SINCE_ANCHOR}, 1.0)
+        ELSE ({MILEAGE_RATE_TAU_DAYS} * mileage_rate + {_KM_SINCE_ANCHOR})
+            / ({MILEAGE_RATE_TAU_DAYS} + {_DAYS_SINCE_ANCHOR})
+    END
+"""
+
+# Keep cars.current_mileage / cars.last_mileage_at / cars.mileage_rate in sync
+# with the logs. Triggers also cover Core bulk statements, which bypass ORM
+# events. Edits and deletes leave the rate, it only moves with new readings.
+# A deleted log below the car's maximum and before its latest reading changes
+# neither, the car is not even updated: compacting history writes no cars.
+CAR_MILEAGE_TRIGGERS = (
+    f"""
+    CREATE TRIGGER trg_mileage_logs_after_insert
+    AFTER INSERT ON mileage_logs
+    BEGIN
+        UPDATE cars SET
+            {_MILEAGE_RATE_SET},
+            current_mileage = max(coalesce(current_mileage, NEW.mileage), NEW.mileage),
+            last_mileage_at = max(
+                coalesce(last_mileage_at, NEW.created_at), NEW.created_at
+            )
+        WHERE id = NEW.car_id;
+    END
+    """,
+    """
+    CREATE TRIGGER trg_mileage_logs_after_update
+    AFTER UPDATE OF car_id, mileage, created_at ON mileage_logs
+    BEGIN
+        UPDATE cars SET
+            current_mileage = (
+                SELECT max(mileage) FROM mileage_logs WHERE car_id = cars.id
+            ),
+            last_mileage_at = (
+                SELECT max(created_at) FROM mileage_logs WHERE car_id = cars.id
+            )
+        WHERE id IN (OLD.car_id, NEW.car_id);
+    END
+    """,
+    """
+    CREATE TRIGGER trg_mileage_logs_after_delete
+    AFTER DELETE ON mileage_logs
+    BEGIN
+        UPDATE cars SET
+            current_mileage = (
+                SELECT max(mileage) FROM mileage_logs WHERE car_id = cars.id
+            ),
+            last_mileage_at = (
+                SELECT max(created_at) FROM mileage_logs WHERE car_id = cars.id
+            )
+        WHERE id = OLD.car_id
+            AND NOT (
+                OLD.mileage < current_mileage AND OLD.created_at < last_mileage_at
+            );
+    END
+    """,
+)
+
+# "The odometer never decreases" (docs/MVP.md). A new log is checked against
+# the car's maximum with one seek on ix_mileage_logs_car_mileage; an edited log
+# against its neighbours in time with seeks on ix_mileage_logs_car_created_at_desc.
+# Either way the cost does not depend on the length of the car's history.
+ODOMETER_GUARD_TRIGGERS = (
+    """
+    CREATE TRIGGER trg_mileage_logs_before_insert
+    BEFORE INSERT ON mileage_logs
+    BEGIN
+        SELECT RAISE(ABORT, 'odometer must not decrease')
+        WHERE NEW.mileage < coalesce(
+            (SELECT max(mileage) FROM mileage_logs WHERE car_id = NEW.car_id),
+            (SELECT first_mileage FROM cars WHERE id = NEW.car_id)
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER trg_mileage_logs_before_update
+    BEFORE UPDATE OF car_id, mileage, created_at ON mileage_logs
+    BEGIN
+        SELECT RAISE(ABORT, 'odometer must not decrease')
+        WHERE NEW.mileage < coalesce(
+            (
+                SELECT mileage FROM mileage_logs
+                WHERE car_id = NEW.car_id
+                    AND created_at <= NEW.created_at
+                    AND id != NEW.id
+                ORDER BY created_at DESC
+                LIMIT 1
+            ),
+            (SELECT first_mileage FROM cars WHERE id = NEW.car_id)
+        )
+        OR NEW.mileage > (
+            SELECT mileage FROM mileage_logs
+            WHERE car_id = NEW.car_id
+                AND created_at > NEW.created_at
+                AND id != NEW.id
+            ORDER BY created_at
+            LIMIT 1
+        );
+    END
+    """,
+)
+
 
 class MileageLog(Base, IdMixin, CreatedAtMixin, UpdatedAtMixin):
     car_id: Mapped[UUID] = mapped_column(
@@ -36,3 +155,48 @@ class MileageLog(Base, IdMixin, CreatedAtMixin, UpdatedAtMixin):
         ),
         CheckConstraint("mileage >= 0", name="mileage_non_negative"),
     )
+
+
+Index(
+    "ix_mileage_logs_car_mileage",
+    MileageLog.car_id,
+    MileageLog.mileage.desc(),
+)
+
+for trigger in (*ODOMETER_GUARD_TRIGGERS, *CAR_MILEAGE_TRIGGERS):
+    event.listen(MileageLog.__table__, "after_create", DDL(trigger))
+
+
+@event.listens_for(Session, "after_flush")
+def sync_car_mileage(session: Session, flush_context) -> None:
+    """Mirror the triggers on cars already loaded into the session."""
+    from .car import Car
+
+    # In insert order, the rate depends on the order of the readings
+    new_logs = sorted(
+        (obj for obj in session.new if isinstance(obj, MileageLog)),
+        # Set on every pending object, typed Optional
+        key=lambda obj: inspect(obj).insert_order or 0,
+    )
+    for obj in new_logs:
+        car = session.identity_map.get(identity_key(Car, obj.car_id))
+        if car is None or inspect(car).expired_attributes:
+            continue
+        set_committed_value(
+            car, "mileage_rate", car.next_mileage_rate(obj.mileage, obj.created_at)
+        )
+        if car.current_mileage is None or obj.mileage > car.current_mileage:
+            set_committed_value(car, "current_mileage", obj.mileage)
+        last_mileage_at = car.last_mileage_at
+        if last_mileage_at is None or as_utc(obj.created_at) > as_utc(last_mileage_at):
+            set_committed_value(car, "last_mileage_at", obj.created_at)
+
+    for obj in (*session.dirty, *session.deleted):
+        if not isinstance(obj, MileageLog):
+            continue
+        # A log moved to another car changes the car it left as well
+        moved_from = inspect(obj).attrs.car_id.history.deleted
+        for car_id in {obj.car_id, *moved_from}:
+            car = session.identity_map.get(identity_key(Car, car_id))
+            if car is not None:
+                session.expire(car, ["current_mileage", "last_mileage_at"])
@@ -0,0 +1,50 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import DateTime, ForeignKey, Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class MileageLogArchive(Base):
+    """Mileage logs removed from `mileage_logs` by compaction, kept as they were."""
+
+    id: Mapped[UUID] = mapped_column(
+        primary_key=True,
+        comment="ID of the original mileage log",
+    )
+
+    car_id: Mapped[UUID] = mapped_column(
+        ForeignKey(
+            "cars.id",
+            ondelete="CASCADE",
+        ),
+        nullable=False,
+        comment="ID of the car",
+    )
+
+    mileage: Mapped[int] = mapped_column(
+        nullable=False,
+        comment="Mileage",
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        comment="Date and time of the original log",
+    )
+
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        comment="Date and time of archiving",
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_mileage_log_archives_car_created_at",
+            "car_id",
+            "created_at",
+        ),
+    )
@@ -1,15 +1,17 @@
 from datetime import datetime, timezone
-from uuid import UUID, uuid4
+from uuid import UUID
 
 from sqlalchemy import DateTime, func
 from sqlalchemy.orm import Mapped, mapped_column
 
+from utils import uuid7
+
 
 class IdMixin:
     id: Mapped[UUID] = mapped_column(
         primary_key=True,
         nullable=False,
-        default=uuid4,
+        default=uuid7,
         comment="Unique identifier",
     )
 
@@ -1,18 +1,164 @@
 from datetime import datetime, timedelta, timezone
+from enum import IntEnum
 from typing import TYPE_CHECKING
 from uuid import UUID
 
-from sqlalchemy import CheckConstraint, ForeignKey, Index, text
+from sqlalchemy import (
+    DDL,
+    Boolean,
+    CheckConstraint,
+    ColumnElement,
+    DateTime,
+    FetchedValue,
+    ForeignKey,
+    Index,
+    String,
+    and_,
+    bindparam,
+    case,
+    cast,
+    event,
+    false,
+    func,
+    inspect,
+    literal,
+    or_,
+    select,
+    text,
+)
 from sqlalchemy.ext import hybrid
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, Session, mapped_column, relationship
+
+from utils import as_utc
 
 from .base import Base
 from .mixins import CreatedAtMixin, IdMixin, UpdatedAtMixin
+from .types import IntEnumType
 
 if TYPE_CHECKING:
     from .car import Car
     from .service_item import ServiceItem
 
+# Keep reminders.next_due_at / reminders.next_due_mileage in sync with
+# the intervals, warnings and the last service of the item.
+_NEXT_DUE_SET = """
+    next_due_at = (
+        SELECT datetime(
+            service_items.last_service_date,
+            (reminders.interval_days - coalesce(reminders.warning_days_before, 0))
+            || ' days'
+        )
+        FROM service_items WHERE service_items.id = reminders.service_item_id
+    ),
+    next_due_mileage = (
+        SELECT service_items.last_service_mileage + reminders.interval_mileage
+            - coalesce(reminders.warning_mileage_before, 0)
+        FROM service_items WHERE service_items.id = reminders.service_item_id
+    )
+"""
+
+# A new service or new intervals start a new cycle of notifications
+_NOTIFIED_RESET = """
+    notified_state = 0,
+    notified_at = NULL,
+    snoozed_until = NULL
+"""
+
+# Projected date the car reaches reminders.next_due_mileage at its smoothed
+# driving rate, counted from the latest reading. Only recomputed when one of
+# the car's values really changes, the log triggers often set them unchanged
+_MILEAGE_DUE_AT_SET = """
+    mileage_due_at = (
+        SELECT CASE WHEN cars.mileage_rate > 0 THEN datetime(
+            coalesce(cars.last_mileage_at, cars.created_at),
+            (
+                (
+                    reminders.next_due_mileage
+                    - coalesce(cars.current_mileage, cars.first_mileage)
+                ) / cars.mileage_rate
+            ) || ' days'
+        ) END
+        FROM cars WHERE cars.id = reminders.car_id
+    )
+"""
+
+NEXT_DUE_TRIGGERS = (
+    f"""
+    CREATE TRIGGER trg_reminders_after_insert
+    AFTER INSERT ON reminders
+    BEGIN
+        UPDATE reminders SET {_NEXT_DUE_SET} WHERE id = NEW.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER trg_reminders_after_update
+    AFTER UPDATE OF
+        service_item_id,
+        interval_mileage,
+        interval_days,
+        warning_mileage_before,
+        warning_days_before
+    ON reminders
+    BEGIN
+        UPDATE reminders SET {_NEXT_DUE_SET}, {_NOTIFIED_RESET} WHERE id = NEW.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER trg_service_items_after_update
+    AFTER UPDATE OF last_service_date, last_service_mileage ON service_items
+    BEGIN
+        UPDATE reminders SET {_NEXT_DUE_SET}, {_NOTIFIED_RESET}
+        WHERE service_item_id = NEW.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER trg_reminders_after_update_next_due_mileage
+    AFTER UPDATE OF next_due_mileage ON reminders
+    BEGIN
+        UPDATE reminders SET {_MILEAGE_DUE_AT_SET} WHERE id = NEW.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER trg_cars_after_update_mileage
+    AFTER UPDATE OF current_mileage, last_mileage_at, mileage_rate ON cars
+    WHEN OLD.current_mileage IS NOT NEW.current_mileage
+        OR OLD.last_mileage_at IS NOT NEW.last_mileage_at
+        OR OLD.mileage_rate IS NOT NEW.mileage_rate
+    BEGIN
+        UPDATE reminders SET {_MILEAGE_DUE_AT_SET}
+        WHERE car_id = NEW.id AND next_due_mileage IS NOT NULL;
+    END
+    """,
+)
+
+
+def utcnow() -> datetime:
+    """
+    Clock of the reminder hybrids, truncated to whole seconds.
+
+    SQLite keeps time at one-second resolution: datetime() drops the fraction
+    of the last service date, and the SQL expressions compare against this
+    value bound through datetime(). The instance side truncates the same way,
+    so both agree on a reminder that triggers within the current second.
+    """
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def _now_expression() -> ColumnElement[datetime]:
+    # Read at execution, not when the statement is built or cached
+    now = bindparam(
+        "reminder_now", callable_=lambda: utcnow(), type_=DateTime(timezone=True)
+    )
+    return func.datetime(now, type_=DateTime(timezone=True))
+
+
+class ReminderState(IntEnum):
+    """What the owner knows about a reminder, states only move forward."""
+
+    ok = 0
+    due_soon = 1
+    overdue = 2
+
 
 class Reminder(Base, IdMixin, CreatedAtMixin, UpdatedAtMixin):
     car_id: Mapped[UUID] = mapped_column(
@@ -68,22 +214,113 @@ class Reminder(Base, IdMixin, CreatedAtMixin, UpdatedAtMixin):
         comment="Additional comment or notes",
     )
 
+    next_due_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+        comment="Date the reminder triggers at, maintained by triggers",
+    )
+
+    next_due_mileage: Mapped[int | None] = mapped_column(
+        nullable=True,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+        comment="Mileage the reminder triggers at, maintained by triggers",
+    )
+
+    mileage_due_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+        comment="Projected date next_due_mileage is reached, maintained by triggers",
+    )
+
+    notified_state: Mapped[ReminderState] = mapped_column(
+        IntEnumType(ReminderState),
+        nullable=False,
+        default=ReminderState.ok,
+        server_default=text("0"),
+        server_onupdate=FetchedValue(),
+        comment="Last state the owner was notified about, reset by triggers",
+    )
+
+    notified_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        server_onupdate=FetchedValue(),
+        comment="Date of the last notification",
+    )
+
+    snoozed_until: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        server_onupdate=FetchedValue(),
+        comment="No notifications before this date",
+    )
+
+    @property
+    def expected_due_at(self) -> datetime | None:
+        """Trigger date or projected trigger mileage date, whichever comes first."""
+        dates = [as_utc(d) for d in (self.next_due_at, self.mileage_due_at) if d]
+        return min(dates, default=None)
+
     @hybrid.hybrid_property
     def next_service_mileage(self) -> int | None:
         if not self.interval_mileage:
             return None
         return self.service_item.last_service_mileage + self.interval_mileage
 
+    @next_service_mileage.inplace.expression
+    @classmethod
+    def _next_service_mileage_expression(cls) -> ColumnElement[int | None]:
+        """SQL expression to compute the mileage of the next service."""
+        from .service_item import ServiceItem
+
+        return (
+            select(ServiceItem.last_service_mileage + cls.interval_mileage)
+            .where(ServiceItem.id == cls.service_item_id)
+            .scalar_subquery()
+        )
+
     @hybrid.hybrid_property
     def next_service_date(self) -> datetime | None:
         if not self.interval_days:
             return None
-        return self.service_item.last_service_date + timedelta(days=self.interval_days)
+        # Whole seconds, like datetime() in the SQL expression
+        last_service_date = as_utc(self.service_item.last_service_date)
+        last_service_date = last_service_date.replace(microsecond=0)
+        return last_service_date + timedelta(days=self.interval_days)
+
+    @next_service_date.inplace.expression
+    @classmethod
+    def _next_service_date_expression(cls) -> ColumnElement[datetime]:
+        """SQL expression to compute the date of the next service."""
+        from .service_item import ServiceItem
+
+        return (
+            select(
+                func.datetime(
+                    ServiceItem.last_service_date,
+                    cast(cls.interval_days, String) + " days",
+                    type_=DateTime(timezone=True),
+                )
+            )
+            .where(ServiceItem.id == cls.service_item_id)
+            .scalar_subquery()
+        )
+
+    @classmethod
+    def _car_mileage_expression(cls) -> ColumnElement[int]:
+        from .car import Car
+
+        return select(Car.mileage).where(Car.id == cls.car_id).scalar_subquery()
 
     @hybrid.hybrid_property
     def is_overdue(self) -> bool:
         """Is the service item overdue?"""
-        now = datetime.now(timezone.utc)
+        now = utcnow()
         car_mileage = self.car.mileage
 
         # Checking for mileage
@@ -96,10 +333,23 @@ class Reminder(Base, IdMixin, CreatedAtMixin, UpdatedAtMixin):
 
         return False
 
+    @is_overdue.inplace.expression
+    @classmethod
+    def _is_overdue_expression(cls) -> ColumnElement[bool]:
+        """SQL expression to check if the service item is overdue."""
+        return func.coalesce(
+            or_(
+                cls._car_mileage_expression() > cls.next_service_mileage,
+                _now_expression() > cls.next_service_date,
+            ),
+            false(),
+            type_=Boolean,
+        )
+
     @hybrid.hybrid_property
     def is_due_soon(self) -> bool:
         """Is the service item due soon?"""
-        now = datetime.now(timezone.utc)
+        now = utcnow()
         car_mileage = self.car.mileage
 
         # Checking for mileage
@@ -120,6 +370,106 @@ class Reminder(Base, IdMixin, CreatedAtMixin, UpdatedAtMixin):
 
         return False
 
+    @is_due_soon.inplace.expression
+    @classmethod
+    def _is_due_soon_expression(cls) -> ColumnElement[bool]:
+        """SQL expression to check if the service item is due soon."""
+        warning_date = func.datetime(
+            cls.next_service_date,
+            cast(-cls.warning_days_before, String) + " days",
+        )
+        return func.coalesce(
+            or_(
+                and_(
+                    cls.warning_mileage_before > 0,
+                    cls._car_mileage_expression()
+                    >= cls.next_service_mileage - cls.warning_mileage_before,
+                ),
+                and_(
+                    cls.warning_days_before > 0,
+                    _now_expression() >= warning_date,
+                ),
+            ),
+            false(),
+            type_=Boolean,
+        )
+
+    @hybrid.hybrid_property
+    def is_due(self) -> bool:
+        """Has the reminder reached its trigger date or trigger mileage?"""
+        if (
+            self.next_due_mileage is not None
+            and self.car.mileage >= self.next_due_mileage
+        ):
+            return True
+
+        if self.next_due_at is not None:
+            return utcnow() >= as_utc(self.next_due_at)
+
+        return False
+
+    @is_due.inplace.expression
+    @classmethod
+    def _is_due_expression(cls) -> ColumnElement[bool]:
+        """SQL expression to check if the reminder has triggered."""
+        return func.coalesce(
+            or_(
+                cls._car_mileage_expression() >= cls.next_due_mileage,
+                _now_expression() >= cls.next_due_at,
+            ),
+            false(),
+            type_=Boolean,
+        )
+
+    @hybrid.hybrid_property
+    def state(self) -> ReminderState:
+        """State of the reminder right now."""
+        if self.is_overdue:
+            return ReminderState.overdue
+        if self.is_due:
+            return ReminderState.due_soon
+        return ReminderState.ok
+
+    @state.inplace.expression
+    @classmethod
+    def _state_expression(cls) -> ColumnElement[ReminderState]:
+        def value(state: ReminderState) -> ColumnElement[ReminderState]:
+            return literal(state, IntEnumType(ReminderState))
+
+        return case(
+            (cls.is_overdue, value(ReminderState.overdue)),
+            (cls.is_due, value(ReminderState.due_soon)),
+            else_=value(ReminderState.ok),
+        )
+
+    @classmethod
+    def has_unreported_change(
+        cls, now: datetime, check_mileage: bool = True
+    ) -> ColumnElement[bool]:
+        """
+        Active, not snoozed reminders whose state moved past the notified one.
+
+        The first two terms are the condition of `ix_reminders_car_pending`,
+        reminders already reported as overdue are not even read. Without
+        `check_mileage` only reminders whose trigger date or snooze passed
+        are evaluated, mileage is left to `ReminderWatcher`.
+        """
+        triggered = (
+            cls.is_due
+            if check_mileage
+            else or_(cls.next_due_at <= now, cls.snoozed_until <= now)
+        )
+        return and_(
+            cls.is_active.is_not(False),
+            cls.notified_state < ReminderState.overdue,
+            or_(cls.snoozed_until.is_(None), cls.snoozed_until <= now),
+            triggered,
+            cls.state > cls.notified_state,
+        )
+
+    # Values are written by AFTER triggers, RETURNING would report them stale
+    __mapper_args__ = {"eager_defaults": False}
+
     __table_args__ = (
         CheckConstraint(
             "(interval_mileage IS NOT NULL) OR (interval_days IS NOT NULL)",
@@ -141,5 +491,60 @@ class Reminder(Base, IdMixin, CreatedAtMixin, UpdatedAtMixin):
             "warning_days_before IS NULL OR warning_days_before >= 0",
             name="reminder_non_negative_days_warning",
         ),
-        Index("ix_reminders_car_active", "car_id", "is_active"),
+        # "id" makes the index usable for keyset pagination over active reminders
+        Index("ix_reminders_car_active", "car_id", "is_active", "id"),
+        Index("ix_reminders_service_item", "service_item_id"),
+        Index("ix_reminders_next_due_at", "next_due_at"),
+        Index("ix_reminders_mileage_due_at", "mileage_due_at"),
+        # Keyset order for sweeps over reminders that may still change state
+        Index(
+            "ix_reminders_car_pending",
+            "car_id",
+            "id",
+            sqlite_where=text("is_active IS NOT 0 AND notified_state < 2"),
+        ),
     )
+
+
+# Columns the service_items trigger rewrites
+TRIGGER_MAINTAINED = [
+    "next_due_at",
+    "next_due_mileage",
+    "mileage_due_at",
+    "notified_state",
+    "notified_at",
+    "snoozed_until",
+]
+
+for trigger in NEXT_DUE_TRIGGERS:
+    event.listen(Reminder.__table__, "after_create", DDL(trigger))
+
+
+@event.listens_for(Session, "after_flush")
+def expire_next_due(session: Session, flush_context) -> None:
+    """Expire trigger-maintained values of reminders whose service item changed."""
+    from .mileage_log import MileageLog
+    from .service_item import ServiceItem
+
+    # New readings move the projections of every reminder of the car
+    driven = {obj.car_id for obj in session.new if isinstance(obj, MileageLog)}
+    if driven:
+        for obj in list(session.identity_map.values()):
+            if isinstance(obj, Reminder) and obj.car_id in driven:
+                session.expire(obj, ["mileage_due_at"])
+
+    changed = {
+        obj.id
+        for obj in session.dirty
+        if isinstance(obj, ServiceItem)
+        and session.is_modified(obj)
+        and any(
+            inspect(obj).attrs[name].history.has_changes()
+            for name in ("last_service_date", "last_service_mileage")
+        )
+    }
+    if not changed:
+        return
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, Reminder) and obj.service_item_id in changed:
+            session.expire(obj, TRIGGER_MAINTAINED)
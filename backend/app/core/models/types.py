@@ -0,0 +1,53 @@
+from enum import IntEnum
+from typing import TypeVar
+from uuid import UUID
+
+from sqlalchemy import Dialect, LargeBinary, SmallInteger, TypeDecorator
+
+E = TypeVar("E", bound=IntEnum)
+
+
+class BinaryUUID(TypeDecorator[UUID]):
+    """
+    UUID stored as 16 raw bytes.
+
+    SQLAlchemy's `Uuid` falls back to a 32-character hex string on SQLite,
+    which doubles the size of every primary key and of every index that
+    references it.
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def process_bind_param(self, value: UUID | str | None, dialect: Dialect):
+        if value is None:
+            return None
+        if not isinstance(value, UUID):
+            value = UUID(value)
+        return value.bytes
+
+    def process_result_value(self, value: bytes | None, dialect: Dialect):
+        if value is None:
+            return None
+        return UUID(bytes=value)
+
+
+class IntEnumType(TypeDecorator[E]):
+    """`IntEnum` stored as its value, so members can be compared in SQL."""
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum: type[E]) -> None:
+        super().__init__()
+        self.enum = enum
+
+    def process_bind_param(self, value: int | None, dialect: Dialect):
+        if value is None:
+            return None
+        return int(value)
+
+    def process_result_value(self, value: int | None, dialect: Dialect):
+        if value is None:
+            return None
+        return self.enum(value)
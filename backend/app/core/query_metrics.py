@@ -0,0 +1,145 @@
+import logging
+import re
+import time
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from core.metrics import Counter, Histogram, Registry
+
+log = logging.getLogger(__name__)
+
+# Expanded "IN (?, ?, ...)" and multi-row VALUES differ only in length
+PARAMETER_LIST = re.compile(r"\(\?(?:, \?)*\)")
+WHITESPACE = re.compile(r"\s+")
+
+OTHER_STATEMENTS = "other"
+STARTED_KEY = "query_started_at"
+
+
+def normalize_statement(statement: str) -> str:
+    statement = WHITESPACE.sub(" ", statement).strip()
+    return PARAMETER_LIST.sub("(?, ...)", statement)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that reports how long every checkout waited."""
+
+    on_checkout: Callable[[float, bool], None] | None = None
+
+    def _do_get(self):
+        # No idle connection and no room to open one: the checkout has to wait
+        waited = self.checkedin() == 0 and self.overflow() >= self._max_overflow
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.on_checkout is not None:
+                self.on_checkout(time.perf_counter() - started, waited)
+
+
+class QueryMetrics:
+    """
+    Latency of every statement, keyed by its normalized SQL, and pool waits.
+
+    Statements slower than `slow_query` seconds are logged with their
+    parameters. At most `max_statements` distinct statements get their own
+    series, the rest is counted as "other".
+    """
+
+    def __init__(
+        self,
+        registry: Registry,
+        slow_query: float = 0.2,
+        max_statements: int = 500,
+    ) -> None:
+        self.slow_query = slow_query
+        self.max_statements = max_statements
+        self._statements: dict[str, str] = {}
+
+        self.statement_latency = registry.register(
+            Histogram(
+                "db_statement_seconds",
+                "Statement execution time",
+                labelnames=("statement",),
+            )
+        )
+        self.slow_statements = registry.register(
+            Counter(
+                "db_statements_slow_total",
+                "Statements slower than the slow query threshold",
+                labelnames=("statement",),
+            )
+        )
+        self.pool_checkouts = registry.register(
+            Counter(
+                "db_pool_checkouts_total",
+                "Connections taken from the pool",
+                labelnames=("engine",),
+            )
+        )
+        self.pool_waits = registry.register(
+            Counter(
+                "db_pool_waits_total",
+                "Checkouts that found the pool exhausted",
+                labelnames=("engine",),
+            )
+        )
+        self.pool_wait_time = registry.register(
+            Histogram(
+                "db_pool_checkout_seconds",
+                "Time spent getting a connection from the pool",
+                labelnames=("engine",),
+            )
+        )
+
+    def _label(self, statement: str) -> str:
+        label = self._statements.get(statement)
+        if label is None:
+            if len(self._statements) >= self.max_statements:
+                return OTHER_STATEMENTS
+            label = self._statements[statement] = normalize_statement(statement)
+        return label
+
+    def watch_engine(self, engine: AsyncEngine, name: str) -> None:
+        sync_engine = engine.sync_engine
+        labels = (name,)
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def start_timer(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault(STARTED_KEY, []).append(time.perf_counter())
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def stop_timer(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info[STARTED_KEY].pop()
+            label = (self._label(statement),)
+            self.statement_latency.observe(elapsed, label)
+            if elapsed >= self.slow_query:
+                self.slow_statements.inc(labels=label)
+                log.warning(
+                    "Slow statement on %s engine, %.3fs: %s parameters=%.1000r",
+                    name,
+                    elapsed,
+                    statement,
+                    parameters,
+                )
+
+        @event.listens_for(sync_engine, "handle_error")
+        def drop_timer(exception_context):
+            conn = exception_context.connection
+            started = conn.info.get(STARTED_KEY) if conn is not None else None
+            if started:
+                started.pop()
+
+        pool = sync_engine.pool
+        if isinstance(pool, TimedQueuePool):
+
+            def on_checkout(wait: float, waited: bool) -> None:
+                self.pool_checkouts.inc(labels=labels)
+                self.pool_wait_time.observe(wait, labels)
+                if waited:
+                    self.pool_waits.inc(labels=labels)
+
+            pool.on_checkout = on_checkout
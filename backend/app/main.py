@@ -0,0 +1,34 @@
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+
+from api import router as api_router
+from core.cache import get_user_cache
+from core.config import get_settings
+from core.db_helper import dispose_db_helper, get_db_helper
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # startup
+    db_helper = get_db_helper()
+    db_helper.metrics.register_collector(get_user_cache().collect)
+    yield
+    # shutdown
+    await dispose_db_helper()
+
+
+main_app = FastAPI(lifespan=lifespan)
+main_app.include_router(api_router, prefix=get_settings().api.prefix)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    settings = get_settings()
+    uvicorn.run(
+        "main:main_app",
+        host=settings.run.host,
+        port=settings.run.port,
+        reload=True,
+    )
@@ -0,0 +1,15 @@
+__all__ = [
+    "CarRepository",
+    "MileageLogRepository",
+    "ReminderRepository",
+    "Repository",
+    "ServiceItemRepository",
+    "profiles",
+]
+
+from . import profiles
+from .base import Repository
+from .car import CarRepository
+from .mileage_log import MileageLogRepository
+from .reminder import ReminderRepository
+from .service_item import ServiceItemRepository
@@ -0,0 +1,23 @@
+from typing import Awaitable, Callable, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.cache import UserCache
+
+T = TypeVar("T")
+
+
+class Repository:
+    def __init__(self, session: AsyncSession, cache: UserCache | None = None) -> None:
+        self.session = session
+        self.cache = cache
+
+    async def _cached(
+        self,
+        user_tg_id: int,
+        view: str,
+        loader: Callable[[], Awaitable[T]],
+    ) -> T:
+        if self.cache is None:
+            return await loader()
+        return await self.cache.get_or_load(user_tg_id, view, loader)
@@ -0,0 +1,25 @@
+from typing import Sequence
+
+from sqlalchemy import select
+
+from core.models import Car
+
+from . import profiles
+from .base import Repository
+
+
+class CarRepository(Repository):
+    async def list_for_user(self, user_tg_id: int) -> Sequence[Car]:
+        """Cars of the user for /cars, in the order they were added."""
+        return await self._cached(
+            user_tg_id, "cars", lambda: self._list_for_user(user_tg_id)
+        )
+
+    async def _list_for_user(self, user_tg_id: int) -> Sequence[Car]:
+        stmt = (
+            select(Car)
+            .where(Car.user_tg_id == user_tg_id)
+            .order_by(Car.created_at)
+            .options(*profiles.CARS)
+        )
+        return (await self.session.scalars(stmt)).all()
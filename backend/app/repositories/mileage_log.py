@@ -0,0 +1,39 @@
+from typing import Sequence
+from uuid import UUID
+
+from sqlalchemy import select
+
+from core.models import MileageLog
+
+from . import profiles
+from .base import Repository
+
+
+class MileageLogRepository(Repository):
+    async def latest_for_car(
+        self, car_id: UUID, user_tg_id: int | None = None, limit: int = 5
+    ) -> Sequence[MileageLog]:
+        """
+        Latest readings of the car, newest first, for /mileage.
+
+        Cached per owner, so the result is cached only when `user_tg_id`
+        of the car owner is given.
+        """
+        if user_tg_id is None:
+            return await self._latest_for_car(car_id, limit)
+        return await self._cached(
+            user_tg_id,
+            f"mileage:{car_id}:{limit}",
+            lambda: self._latest_for_car(car_id, limit),
+        )
+
+    async def _latest_for_car(self, car_id: UUID, limit: int) -> Sequence[MileageLog]:
+        # Reads ix_mileage_logs_car_created_at_desc backwards, no sort
+        stmt = (
+            select(MileageLog)
+            .where(MileageLog.car_id == car_id)
+            .order_by(MileageLog.created_at.desc())
+            .limit(limit)
+            .options(*profiles.MILEAGE)
+        )
+        return (await self.session.scalars(stmt)).all()
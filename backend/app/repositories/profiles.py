@@ -0,0 +1,41 @@
+"""
+Eager-loading profiles, one per bot command.
+
+Every profile loads exactly what its command renders and turns any other
+lazy load into an error (`raiseload`), so a template that reaches for an
+unplanned relationship fails loudly instead of issuing one query per row.
+Lazy loads are impossible under `AsyncSession` anyway (MissingGreenlet).
+"""
+
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+from sqlalchemy.orm.interfaces import ORMOption
+
+from core.models import Reminder, ServiceItem
+
+# Relationships already in the identity map are still allowed
+RAISE_ON_SQL = raiseload("*", sql_only=True)
+
+# /cars: cars with their current mileage, a plain column of the row
+CARS: tuple[ORMOption, ...] = (RAISE_ON_SQL,)
+
+# /items: items of a car with their reminders; the car is needed
+# by the reminders' `is_overdue` / `is_due_soon`
+ITEMS: tuple[ORMOption, ...] = (
+    joinedload(ServiceItem.car).options(RAISE_ON_SQL),
+    selectinload(ServiceItem.reminders).options(RAISE_ON_SQL),
+    RAISE_ON_SQL,
+)
+
+# /due: due reminders with their item and the car mileage
+DUE: tuple[ORMOption, ...] = (
+    joinedload(Reminder.car).options(RAISE_ON_SQL),
+    joinedload(Reminder.service_item).options(RAISE_ON_SQL),
+    RAISE_ON_SQL,
+)
+
+# /reminders: every reminder of the user's cars, active or not, with its
+# item and the car, for the state next to each of them
+REMINDERS: tuple[ORMOption, ...] = DUE
+
+# /mileage: the latest readings of a car, plain columns of the rows
+MILEAGE: tuple[ORMOption, ...] = (RAISE_ON_SQL,)
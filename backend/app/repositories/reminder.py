@@ -0,0 +1,52 @@
+from typing import Sequence
+
+from sqlalchemy import Select, select
+
+from core.models import Car, Reminder
+
+from . import profiles
+from .base import Repository
+
+
+class ReminderRepository(Repository):
+    async def list_due(self, user_tg_id: int) -> Sequence[Reminder]:
+        """Active reminders of the user's cars that have triggered, for /due."""
+        return await self._cached(user_tg_id, "due", lambda: self._list_due(user_tg_id))
+
+    async def list_for_user(self, user_tg_id: int) -> Sequence[Reminder]:
+        """Reminders of the user's cars, active and inactive, for /reminders."""
+        return await self._cached(
+            user_tg_id, "reminders", lambda: self._list_for_user(user_tg_id)
+        )
+
+    async def _list_for_user(self, user_tg_id: int) -> Sequence[Reminder]:
+        return (await self.session.scalars(self._user_statement(user_tg_id))).all()
+
+    @staticmethod
+    def _user_statement(user_tg_id: int) -> Select[Reminder]:
+        cars = select(Car.id).where(Car.user_tg_id == user_tg_id)
+        return (
+            select(Reminder)
+            .where(Reminder.car_id.in_(cars))
+            # Grouped by car, inactive first, in creation order: the order of
+            # ix_reminders_car_active, read without a sort
+            .order_by(Reminder.car_id, Reminder.is_active, Reminder.id)
+            .options(*profiles.REMINDERS)
+        )
+
+    async def _list_due(self, user_tg_id: int) -> Sequence[Reminder]:
+        return (await self.session.scalars(self._due_statement(user_tg_id))).all()
+
+    @staticmethod
+    def _due_statement(user_tg_id: int) -> Select[Reminder]:
+        cars = select(Car.id).where(Car.user_tg_id == user_tg_id)
+        return (
+            select(Reminder)
+            .where(
+                Reminder.car_id.in_(cars),
+                Reminder.is_active.is_not(False),
+                Reminder.is_due,
+            )
+            .order_by(Reminder.next_due_at)
+            .options(*profiles.DUE)
+        )
@@ -0,0 +1,35 @@
+from typing import Sequence
+from uuid import UUID
+
+from sqlalchemy import select
+
+from core.models import ServiceItem
+
+from . import profiles
+from .base import Repository
+
+
+class ServiceItemRepository(Repository):
+    async def list_for_car(
+        self, car_id: UUID, user_tg_id: int | None = None
+    ) -> Sequence[ServiceItem]:
+        """
+        Items of the car with their reminders for /items.
+
+        Cached per owner, so the result is cached only when `user_tg_id`
+        of the car owner is given.
+        """
+        if user_tg_id is None:
+            return await self._list_for_car(car_id)
+        return await self._cached(
+            user_tg_id, f"items:{car_id}", lambda: self._list_for_car(car_id)
+        )
+
+    async def _list_for_car(self, car_id: UUID) -> Sequence[ServiceItem]:
+        stmt = (
+            select(ServiceItem)
+            .where(ServiceItem.car_id == car_id)
+            .order_by(ServiceItem.name)
+            .options(*profiles.ITEMS)
+        )
+        return (await self.session.scalars(stmt)).unique().all()
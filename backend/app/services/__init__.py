@@ -0,0 +1,46 @@
+__all__ = [
+    "BackupStats",
+    "CompactionStats",
+    "DueNotice",
+    "EvaluatedReminder",
+    "ForecastSink",
+    "ImportReport",
+    "MileageCompactor",
+    "MileageForecast",
+    "MileageRow",
+    "NotificationDispatcher",
+    "NotificationSender",
+    "NotificationSink",
+    "RejectedRow",
+    "ReminderIndex",
+    "ReminderScheduler",
+    "ReminderSink",
+    "ReminderSweeper",
+    "ReminderWatcher",
+    "SendError",
+    "SweepStats",
+    "TelegramSender",
+    "export_csv",
+    "export_ndjson",
+    "import_csv",
+    "import_mileage",
+    "import_ndjson",
+    "record_service_visit",
+]
+
+from .backup import BackupStats, export_csv, export_ndjson, import_csv, import_ndjson
+from .mileage_compaction import CompactionStats, MileageCompactor
+from .mileage_import import ImportReport, MileageRow, RejectedRow, import_mileage
+from .notifications import (
+    DueNotice,
+    NotificationDispatcher,
+    NotificationSender,
+    NotificationSink,
+    SendError,
+    TelegramSender,
+)
+from .reminder_index import ReminderIndex
+from .reminder_scheduler import ForecastSink, MileageForecast, ReminderScheduler
+from .reminder_sweep import EvaluatedReminder, ReminderSink, ReminderSweeper, SweepStats
+from .reminder_watch import ReminderWatcher
+from .service_visit import record_service_visit
@@ -0,0 +1,283 @@
+import csv
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Iterable, Sequence, TextIO, cast
+from uuid import UUID
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    ColumnElement,
+    DateTime,
+    Integer,
+    Row,
+    Select,
+    String,
+    Table,
+    func,
+    insert,
+    select,
+    type_coerce,
+)
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.models import (
+    Base,
+    Car,
+    MileageLog,
+    MileageLogArchive,
+    Reminder,
+    ServiceItem,
+    User,
+)
+from core.models.types import BinaryUUID, IntEnumType
+
+# Parents before children, the order rows are written and read back in
+MODELS: tuple[type[Base], ...] = (
+    User,
+    Car,
+    MileageLogArchive,
+    MileageLog,
+    ServiceItem,
+    Reminder,
+)
+
+# Maintained by triggers from the other rows, rebuilt when those are imported
+DERIVED = {
+    "cars": {"current_mileage", "last_mileage_at", "mileage_rate"},
+    "reminders": {"next_due_at", "next_due_mileage", "mileage_due_at"},
+}
+
+BY_TABLE = {model.__tablename__: model for model in MODELS}
+
+
+@dataclass(slots=True)
+class BackupStats:
+    # Rows written or read per table
+    rows: Counter[str] = field(default_factory=Counter)
+
+    @property
+    def total(self) -> int:
+        return self.rows.total()
+
+
+def _table(model: type[Base]) -> Table:
+    # Typed as any FromClause on the declarative base
+    return cast(Table, model.__table__)
+
+
+def columns(model: type[Base]) -> list[Column]:
+    """Columns of `model` that are exported, in table order."""
+    derived = DERIVED.get(model.__tablename__, set())
+    return [column for column in _table(model).columns if column.key not in derived]
+
+
+def _exported(column: Column) -> ColumnElement:
+    """
+    Ids as hex and datetimes as the stored text, both formatted by SQLite:
+    every row then holds only plain values, serialized without callbacks.
+    """
+    if isinstance(column.type, BinaryUUID):
+        return func.lower(func.hex(column)).label(column.key)
+    if isinstance(column.type, DateTime):
+        return type_coerce(column, String).label(column.key)
+    if isinstance(column.type, IntEnumType):
+        return type_coerce(column, Integer).label(column.key)
+    return column
+
+
+def _statement(model: type[Base], user_tg_id: int | None) -> Select:
+    stmt = select(*(_exported(column) for column in columns(model)))
+    if model is MileageLog or model is MileageLogArchive:
+        # Each car's readings oldest first, the order the triggers expect
+        stmt = stmt.order_by(model.car_id, model.created_at)
+    if user_tg_id is None:
+        return stmt
+    if model is User:
+        return stmt.where(User.tg_id == user_tg_id)
+    if model is Car:
+        return stmt.where(Car.user_tg_id == user_tg_id)
+    cars = select(Car.id).where(Car.user_tg_id == user_tg_id)
+    return stmt.where(_table(model).c.car_id.in_(cars))
+
+
+async def _stream(
+    session: AsyncSession,
+    user_tg_id: int | None,
+    batch_size: int,
+) -> AsyncIterator[tuple[type[Base], Sequence[Row]]]:
+    """Rows of every table in batches, never more than a batch in memory."""
+    for model in MODELS:
+        stmt = _statement(model, user_tg_id).execution_options(yield_per=batch_size)
+        result = await session.stream(stmt)
+        async for rows in result.partitions():
+            yield model, rows
+
+
+_encoder = json.JSONEncoder(ensure_ascii=False)
+
+
+async def export_ndjson(
+    session: AsyncSession,
+    out: TextIO,
+    user_tg_id: int | None = None,
+    batch_size: int = 1000,
+) -> BackupStats:
+    """
+    Write every row, or the rows of one user, as JSON lines to `out`.
+
+    Each line is `{"table": ..., "row": {...}}`. Tables are walked one after
+    another with `yield_per`, parents first, so memory does not grow with
+    the history. Values the triggers maintain are left out.
+    """
+    stats = BackupStats()
+    async for model, rows in _stream(session, user_tg_id, batch_size):
+        table = model.__tablename__
+        keys = [column.key for column in columns(model)]
+        prefix = f'{{"table": "{table}", "row": '
+        encode = _encoder.encode
+        out.writelines(f"{prefix}{encode(dict(zip(keys, row)))}}}\n" for row in rows)
+        stats.rows[table] += len(rows)
+    return stats
+
+
+async def export_csv(
+    session: AsyncSession,
+    directory: Path,
+    user_tg_id: int | None = None,
+    batch_size: int = 1000,
+) -> BackupStats:
+    """Like `export_ndjson`, one `<table>.csv` with a header per table."""
+    directory.mkdir(parents=True, exist_ok=True)
+    stats = BackupStats()
+    current: type[Base] | None = None
+    file: TextIO | None = None
+    try:
+        async for model, rows in _stream(session, user_tg_id, batch_size):
+            if model is not current:
+                if file is not None:
+                    file.close()
+                current = model
+                file = open(directory / f"{model.__tablename__}.csv", "w", newline="")
+                writer = csv.writer(file)
+                writer.writerow(column.key for column in columns(model))
+            writer.writerows(rows)
+            stats.rows[model.__tablename__] += len(rows)
+    finally:
+        if file is not None:
+            file.close()
+    return stats
+
+
+def _parser(column: Column) -> Callable[[str], Any] | None:
+    """Turns a text value of `column` back into what its type binds."""
+    type_ = column.type
+    if isinstance(type_, BinaryUUID):
+        return UUID
+    if isinstance(type_, DateTime):
+        return datetime.fromisoformat
+    if isinstance(type_, Boolean):
+        return lambda value: value in ("1", "True", "true")
+    if isinstance(type_, IntEnumType):
+        return lambda value: type_.enum(int(value))
+    if type_.python_type in (int, float):
+        return type_.python_type
+    return None
+
+
+class _Importer:
+    """Collects rows of one table at a time, each batch is a transaction."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        batch_size: int,
+    ) -> None:
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.stats = BackupStats()
+        self._model: type[Base] | None = None
+        self._parsers: dict[str, Callable[[str], Any] | None] = {}
+        self._rows: list[dict[str, Any]] = []
+
+    async def add(self, table: str, row: dict[str, Any]) -> None:
+        model = BY_TABLE.get(table)
+        if model is None:
+            raise ValueError(f"Unknown table {table!r}")
+        if model is not self._model:
+            await self.flush()
+            self._model = model
+            self._parsers = {column.key: _parser(column) for column in columns(model)}
+        values = {}
+        for key, parse in self._parsers.items():
+            if key not in row:
+                # Left to the column default
+                continue
+            value = row[key]
+            if isinstance(value, str) and parse is not None:
+                value = parse(value)
+            values[key] = value
+        self._rows.append(values)
+        if len(self._rows) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        model = self._model
+        if not self._rows or model is None:
+            return
+        async with self.session_factory() as session:
+            # NULLs kept in the statement, or rows split into small batches
+            stmt = insert(model).execution_options(render_nulls=True)
+            await session.execute(stmt, self._rows)
+            await session.commit()
+        self.stats.rows[model.__tablename__] += len(self._rows)
+        self._rows = []
+
+
+async def import_ndjson(
+    session_factory: async_sessionmaker[AsyncSession],
+    lines: Iterable[str],
+    batch_size: int = 1000,
+) -> BackupStats:
+    """
+    Insert the rows written by `export_ndjson`, committing every batch.
+
+    Lines are consumed as they come, so a file of any size can be passed.
+    The rows must not exist yet: restore into an empty database, or the
+    export of a user who was deleted.
+    """
+    importer = _Importer(session_factory, batch_size)
+    for line in lines:
+        if line.strip():
+            record = json.loads(line)
+            await importer.add(record["table"], record["row"])
+    await importer.flush()
+    return importer.stats
+
+
+async def import_csv(
+    session_factory: async_sessionmaker[AsyncSession],
+    directory: Path,
+    batch_size: int = 1000,
+) -> BackupStats:
+    """
+    Insert the rows written by `export_csv`; missing files are skipped.
+
+    CSV has no NULL, empty fields are read back as NULL.
+    """
+    importer = _Importer(session_factory, batch_size)
+    for table in BY_TABLE:
+        path = directory / f"{table}.csv"
+        if not path.exists():
+            continue
+        with open(path, newline="") as file:
+            for row in csv.DictReader(file):
+                row = {
+                    key: None if value == "" else value for key, value in row.items()
+                }
+                await importer.add(table, row)
+    await importer.flush()
+    return importer.stats
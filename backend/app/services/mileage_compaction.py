@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Literal, Sequence, cast
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, CursorResult, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.models import Car, MileageLog, MileageLogArchive
+
+log = logging.getLogger(__name__)
+
+Bucket = Literal["week", "month"]
+
+# SQLite date modifiers that map a timestamp to the first day of its bucket
+BUCKET_MODIFIERS: dict[Bucket, tuple[str, ...]] = {
+    "week": ("-6 days", "weekday 1"),
+    "month": ("start of month",),
+}
+
+
+@dataclass(slots=True)
+class CompactionStats:
+    cars: int = 0
+    archived: int = 0
+    elapsed: float = 0.0
+
+
+class MileageCompactor:
+    """
+    Downsample old mileage history to one log per car per week or month.
+
+    Logs younger than `keep` stay untouched. Older logs are grouped by car and
+    bucket, the highest reading of every group stays in `mileage_logs` and the
+    rest moves to `mileage_log_archives`. The maximum reading and the latest
+    log of a car are always kept, so `cars.current_mileage` does not change.
+    Cars are processed in batches, one short write transaction per batch.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        keep: timedelta = timedelta(days=180),
+        bucket: Bucket = "month",
+        cars_per_batch: int = 100,
+    ) -> None:
+        self.session_factory = session_factory
+        self.keep = keep
+        self.bucket = bucket
+        self.cars_per_batch = cars_per_batch
+
+    def _bucket_start(self) -> ColumnElement[str]:
+        return func.date(MileageLog.created_at, *BUCKET_MODIFIERS[self.bucket])
+
+    def _redundant_ids(self, car_ids: Sequence[UUID], cutoff: datetime):
+        ranked = (
+            select(
+                MileageLog.id,
+                func.row_number()
+                .over(
+                    partition_by=(MileageLog.car_id, self._bucket_start()),
+                    order_by=(
+                        MileageLog.mileage.desc(),
+                        MileageLog.created_at.desc(),
+                    ),
+                )
+                .label("rank"),
+            )
+            .where(
+                MileageLog.car_id.in_(car_ids),
+                MileageLog.created_at < cutoff,
+            )
+            .subquery()
+        )
+        return select(ranked.c.id).where(ranked.c.rank > 1)
+
+    async def _compact(
+        self, session: AsyncSession, car_ids: Sequence[UUID], cutoff: datetime
+    ) -> int:
+        redundant = self._redundant_ids(car_ids, cutoff)
+        columns = ("id", "car_id", "mileage", "created_at")
+        await session.execute(
+            insert(MileageLogArchive).from_select(
+                columns,
+                select(*(getattr(MileageLog, c) for c in columns)).where(
+                    MileageLog.id.in_(redundant)
+                ),
+            )
+        )
+        # A DELETE returns a CursorResult, which has the row count
+        result = cast(
+            CursorResult[Any],
+            await session.execute(
+                delete(MileageLog)
+                .where(MileageLog.id.in_(redundant))
+                .execution_options(synchronize_session=False)
+            ),
+        )
+        return result.rowcount
+
+    async def run_once(self, now: datetime | None = None) -> CompactionStats:
+        stats = CompactionStats()
+        cutoff = (now or datetime.now(timezone.utc)) - self.keep
+        after: UUID | None = None
+        started = time.perf_counter()
+
+        while True:
+            async with self.session_factory() as session:
+                stmt = select(Car.id).order_by(Car.id).limit(self.cars_per_batch)
+                if after is not None:
+                    stmt = stmt.where(Car.id > after)
+                car_ids = (await session.scalars(stmt)).all()
+                if not car_ids:
+                    break
+                stats.archived += await self._compact(session, car_ids, cutoff)
+                await session.commit()
+            stats.cars += len(car_ids)
+            after = car_ids[-1]
+
+        stats.elapsed = time.perf_counter() - started
+        log.info(
+            "Mileage compaction: %d cars, %d logs archived in %.3fs",
+            stats.cars,
+            stats.archived,
+            stats.elapsed,
+        )
+        return stats
+
+    async def run_forever(self, interval: float) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                log.exception("Mileage compaction failed")
+            await asyncio.sleep(interval)
@@ -0,0 +1,106 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.models import Car, MileageLog, Reminder
+from utils import as_utc
+
+# Keeps "IN (...)" below SQLite's bound parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+# Rewritten by the mileage_logs triggers, and the projection by the cars one
+CAR_MILEAGE = ["current_mileage", "last_mileage_at", "mileage_rate"]
+REMINDER_MILEAGE = ["mileage_due_at"]
+
+
+@dataclass(slots=True, frozen=True)
+class MileageRow:
+    car_id: UUID
+    timestamp: datetime
+    mileage: int
+
+
+@dataclass(slots=True, frozen=True)
+class RejectedRow:
+    row: MileageRow
+    reason: str
+
+
+@dataclass(slots=True)
+class ImportReport:
+    inserted: int = 0
+    rejected: list[RejectedRow] = field(default_factory=list)
+
+
+async def import_mileage(
+    session: AsyncSession,
+    rows: Iterable[MileageRow],
+) -> ImportReport:
+    """
+    Insert many mileage logs at once, e.g. a history exported from another app.
+
+    Rows are sorted by car and time and checked in one pass: the odometer must
+    not decrease, neither against the previous row nor against the mileage
+    already stored for the car, and rows must be newer than the latest stored
+    log. Valid rows are inserted with a single executemany, rejected rows are
+    reported. Runs in the caller's transaction, the caller commits.
+
+    The insert bypasses the flush, and with it the hooks that mirror the
+    triggers on loaded objects: the mileage of cars and the projections of
+    reminders already in the session are expired instead, and read again on
+    the next access.
+    """
+    report = ImportReport()
+    rows = sorted(rows, key=lambda row: (row.car_id, as_utc(row.timestamp)))
+
+    car_ids = list({row.car_id for row in rows})
+    floors: dict[UUID, tuple[int, datetime | None]] = {}
+    for start in range(0, len(car_ids), LOOKUP_CHUNK_SIZE):
+        stmt = select(Car.id, Car.mileage, Car.last_mileage_at).where(
+            Car.id.in_(car_ids[start : start + LOOKUP_CHUNK_SIZE])
+        )
+        for car_id, mileage, last_mileage_at in await session.execute(stmt):
+            floors[car_id] = mileage, last_mileage_at and as_utc(last_mileage_at)
+
+    values = []
+    imported: set[UUID] = set()
+    for row in rows:
+        if row.car_id not in floors:
+            report.rejected.append(RejectedRow(row, "unknown car"))
+            continue
+        floor_mileage, floor_at = floors[row.car_id]
+        timestamp = as_utc(row.timestamp)
+        if row.mileage < floor_mileage:
+            report.rejected.append(RejectedRow(row, "odometer decreased"))
+            continue
+        if floor_at is not None and timestamp < floor_at:
+            report.rejected.append(RejectedRow(row, "older than the latest log"))
+            continue
+        floors[row.car_id] = row.mileage, timestamp
+        imported.add(row.car_id)
+        values.append(
+            {
+                "car_id": row.car_id,
+                "mileage": row.mileage,
+                "created_at": timestamp,
+                "updated_at": timestamp,
+            }
+        )
+
+    if values:
+        await session.execute(insert(MileageLog), values)
+        _expire_mileage(session, imported)
+    report.inserted = len(values)
+    return report
+
+
+def _expire_mileage(session: AsyncSession, car_ids: set[UUID]) -> None:
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, Car) and obj.id in car_ids:
+            session.expire(obj, CAR_MILEAGE)
+        elif isinstance(obj, Reminder) and obj.car_id in car_ids:
+            session.expire(obj, REMINDER_MILEAGE)
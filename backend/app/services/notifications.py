@@ -0,0 +1,336 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Protocol, Sequence
+from uuid import UUID
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.metrics import Counter, Gauge, Histogram, Registry
+from core.models import Car, Reminder, ReminderState, ServiceItem
+from utils import TokenBucket
+
+from .reminder_sweep import EvaluatedReminder, record_notified
+
+log = logging.getLogger(__name__)
+
+# Idle per-chat buckets are forgotten once there are more than this many
+MAX_CHAT_BUCKETS = 10_000
+
+
+@dataclass(slots=True, frozen=True)
+class DueNotice:
+    chat_id: int
+    reminder_id: UUID
+    car: str
+    item: str
+    state: ReminderState
+
+    @property
+    def is_overdue(self) -> bool:
+        return self.state is ReminderState.overdue
+
+
+class SendError(Exception):
+    """
+    A message was not delivered.
+
+    `retry_after` is set when the API said how long to wait, errors that
+    are not `retryable` (blocked bot, unknown chat) are not sent again.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        retryable: bool = True,
+        retry_after: float | None = None,
+    ) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class NotificationSender(Protocol):
+    async def __call__(self, chat_id: int, text: str) -> None: ...
+
+
+# Called with the notices of every message that was delivered
+DeliveryCallback = Callable[[Sequence[DueNotice]], Awaitable[None]]
+
+
+class TelegramSender:
+    """Delivers messages with the Bot API `sendMessage` method."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        token: str,
+        api_url: str = "https://api.telegram.org",
+    ) -> None:
+        self.client = client
+        self.url = f"{api_url.rstrip('/')}/bot{token}/sendMessage"
+
+    async def __call__(self, chat_id: int, text: str) -> None:
+        try:
+            response = await self.client.post(
+                self.url, json={"chat_id": chat_id, "text": text}
+            )
+        except httpx.TransportError as exc:
+            raise SendError(repr(exc)) from exc
+        if response.is_success:
+            return
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {}
+        description = payload.get("description") or response.reason_phrase
+        if response.status_code == 429:
+            retry_after = payload.get("parameters", {}).get("retry_after")
+            raise SendError(description, retry_after=retry_after)
+        raise SendError(description, retryable=response.status_code >= 500)
+
+
+def render(notices: Sequence[DueNotice]) -> str:
+    lines = ["Пора на обслуживание:"]
+    for notice in sorted(notices, key=lambda n: (n.car, n.item)):
+        overdue = " (просрочено)" if notice.is_overdue else ""
+        lines.append(f"• {notice.car}: {notice.item}{overdue}")
+    return "\n".join(lines)
+
+
+class NotificationDispatcher:
+    """
+    Delivers due notices to users through a pool of worker tasks.
+
+    The queue holds chats, not notices: a notice for a chat that is already
+    queued joins the chat's pending notices, so everything that became due
+    for a user before a worker gets to them goes out as one message. Sends
+    are paced by a global token bucket and one bucket per chat (Telegram
+    allows about 30 messages/s overall and 1 message/s per chat). Failed
+    sends are retried with exponential backoff and jitter, or after the
+    `retry_after` the API asked for.
+
+    `submit` never blocks: when the queue is full the notice is dropped and
+    counted. `on_delivered` hears only about notices that went out, so a
+    dropped notice is not recorded and the next sweep finds the reminder due
+    again. A notice for a reminder that is being sent is not queued twice.
+    """
+
+    def __init__(
+        self,
+        sender: NotificationSender,
+        registry: Registry,
+        workers: int = 4,
+        queue_size: int = 10_000,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        on_delivered: DeliveryCallback | None = None,
+    ) -> None:
+        self.sender = sender
+        self.on_delivered = on_delivered
+        self.workers = workers
+        self.chat_rate = chat_rate
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._queue: asyncio.Queue[int] = asyncio.Queue(maxsize=queue_size)
+        self._pending: dict[int, dict[UUID, DueNotice]] = {}
+        self._sending: set[UUID] = set()
+        self._global = TokenBucket(global_rate)
+        self._chats: dict[int, TokenBucket] = {}
+        self._tasks: list[asyncio.Task[None]] = []
+
+        self.queue_depth = registry.register(
+            Gauge("notifications_queue_depth", "Chats waiting for a worker")
+        )
+        self.send_seconds = registry.register(
+            Histogram("notification_send_seconds", "Latency of one send attempt")
+        )
+        self.sent = registry.register(
+            Counter("notifications_sent_total", "Messages delivered")
+        )
+        self.notices_sent = registry.register(
+            Counter("notification_notices_sent_total", "Due notices delivered")
+        )
+        self.retries = registry.register(
+            Counter("notification_retries_total", "Send attempts that are retried")
+        )
+        self.dropped = registry.register(
+            Counter(
+                "notification_notices_dropped_total",
+                "Due notices that were not delivered",
+                labelnames=("reason",),
+            )
+        )
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        self._tasks = [task for task in self._tasks if not task.done()]
+        while len(self._tasks) < self.workers:
+            name = f"notifier-{len(self._tasks)}"
+            self._tasks.append(asyncio.create_task(self._run(), name=name))
+
+    def submit(self, notice: DueNotice) -> bool:
+        """Queue `notice`, return False if it was dropped."""
+        self.start()
+        if notice.reminder_id in self._sending:
+            return True
+        pending = self._pending.get(notice.chat_id)
+        if pending is not None:
+            pending[notice.reminder_id] = notice
+            return True
+        try:
+            self._queue.put_nowait(notice.chat_id)
+        except asyncio.QueueFull:
+            self.dropped.inc(labels=("queue_full",))
+            return False
+        self._pending[notice.chat_id] = {notice.reminder_id: notice}
+        self.queue_depth.set(self.depth)
+        return True
+
+    async def close(self) -> None:
+        """Deliver queued notices and stop the workers."""
+        if self._tasks:
+            await self._queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= MAX_CHAT_BUCKETS:
+                # A full bucket is the same as a new one
+                self._chats = {
+                    chat: b for chat, b in self._chats.items() if not b.is_full
+                }
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate)
+        return bucket
+
+    def _delay(self, attempt: int, error: SendError) -> float:
+        if error.retry_after is not None:
+            return error.retry_after
+        delay = min(self.backoff * 2**attempt, self.max_backoff)
+        # Jitter, so chats that failed together do not retry together
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _run(self) -> None:
+        while True:
+            chat_id = await self._queue.get()
+            try:
+                await self._deliver(chat_id)
+            except Exception:
+                log.exception("Notification to chat %d failed", chat_id)
+            finally:
+                self._queue.task_done()
+                self.queue_depth.set(self.depth)
+
+    async def _deliver(self, chat_id: int) -> None:
+        # Notices that arrive while the chat waits join the same message
+        await self._chat_bucket(chat_id).acquire()
+        notices = list(self._pending.pop(chat_id).values())
+        reminder_ids = {notice.reminder_id for notice in notices}
+        self._sending |= reminder_ids
+        try:
+            delivered = await self._send(chat_id, notices)
+        finally:
+            self._sending -= reminder_ids
+        if not delivered or self.on_delivered is None:
+            return
+        try:
+            await self.on_delivered(notices)
+        except Exception:
+            # The message is out, a retry would send it again
+            log.exception("Failed to record notices delivered to chat %d", chat_id)
+
+    async def _send(self, chat_id: int, notices: list[DueNotice]) -> bool:
+        text = render(notices)
+        for attempt in range(self.max_retries + 1):
+            await self._global.acquire()
+            started = time.perf_counter()
+            try:
+                await self.sender(chat_id, text)
+            except SendError as exc:
+                self.send_seconds.observe(time.perf_counter() - started)
+                if not exc.retryable or attempt == self.max_retries:
+                    self.dropped.inc(len(notices), labels=("send_failed",))
+                    log.warning(
+                        "Dropped %d notices for chat %d: %s", len(notices), chat_id, exc
+                    )
+                    return False
+                self.retries.inc()
+                await asyncio.sleep(self._delay(attempt, exc))
+            else:
+                self.send_seconds.observe(time.perf_counter() - started)
+                self.sent.inc()
+                self.notices_sent.inc(len(notices))
+                return True
+        return False
+
+
+class NotificationSink:
+    """
+    `ReminderSink` that turns swept reminders into notices for their owners.
+
+    Notices are delivered later by the dispatcher, so the sink returns no
+    reminders and becomes its `on_delivered`: a state is recorded once the
+    message about it is out.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        dispatcher: NotificationDispatcher,
+    ) -> None:
+        self.session_factory = session_factory
+        self.dispatcher = dispatcher
+        dispatcher.on_delivered = self.record_delivered
+
+    async def __call__(
+        self, reminders: Sequence[EvaluatedReminder]
+    ) -> Sequence[EvaluatedReminder]:
+        evaluated = {reminder.id: reminder for reminder in reminders}
+        stmt = (
+            select(
+                Reminder.id,
+                Car.user_tg_id,
+                Car.brand,
+                Car.model,
+                ServiceItem.name,
+            )
+            .join(Reminder.car)
+            .join(Reminder.service_item)
+            .where(Reminder.id.in_(evaluated))
+        )
+        async with self.session_factory() as session:
+            rows = (await session.execute(stmt)).all()
+        for row in rows:
+            self.dispatcher.submit(
+                DueNotice(
+                    chat_id=row.user_tg_id,
+                    reminder_id=row.id,
+                    car=f"{row.brand} {row.model}",
+                    item=row.name,
+                    state=evaluated[row.id].state,
+                )
+            )
+        return []
+
+    async def record_delivered(self, notices: Sequence[DueNotice]) -> None:
+        await record_notified(
+            self.session_factory,
+            {notice.reminder_id: notice.state for notice in notices},
+            datetime.now(timezone.utc),
+        )
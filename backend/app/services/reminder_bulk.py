@@ -0,0 +1,128 @@
+"""
+Vectorized evaluation of every active reminder, for nightly sweeps.
+
+Needs NumPy, installed with the `bulk` extra (`uv sync --extra bulk`). The
+module is not imported by `services`, import it directly:
+
+    from services.reminder_bulk import due_reminders
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Sequence
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import LargeBinary, Row, Select, func, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.models import Car, Reminder, ServiceItem
+
+SECONDS_PER_DAY = 86_400.0
+
+# Julian day of 1970-01-01, julianday() - UNIX_EPOCH_JULIAN_DAY is in days
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+
+
+def bulk_statement() -> Select:
+    """The columns `ReminderArrays.from_rows` expects, in its field order."""
+    return (
+        select(
+            # Raw bytes, only ids of due reminders are turned into UUIDs
+            type_coerce(Reminder.id, LargeBinary()),
+            Reminder.interval_mileage,
+            Reminder.interval_days,
+            Reminder.warning_mileage_before,
+            Reminder.warning_days_before,
+            ServiceItem.last_service_mileage,
+            (func.julianday(ServiceItem.last_service_date) - UNIX_EPOCH_JULIAN_DAY)
+            * SECONDS_PER_DAY,
+            Car.mileage,
+        )
+        .join(Reminder.service_item)
+        .join(Reminder.car)
+        .where(Reminder.is_active.is_not(False))
+    )
+
+
+@dataclass(slots=True)
+class ReminderArrays:
+    """
+    Columns of active reminders, one array per column.
+
+    Numbers are float64 with NULL as NaN: every comparison with NaN is
+    false, which is how the hybrids treat a missing interval or warning.
+    """
+
+    ids: np.ndarray
+    interval_mileage: np.ndarray
+    interval_days: np.ndarray
+    warning_mileage_before: np.ndarray
+    warning_days_before: np.ndarray
+    last_service_mileage: np.ndarray
+    # Seconds since the epoch
+    last_service_at: np.ndarray
+    car_mileage: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Row]) -> "ReminderArrays":
+        columns = list(zip(*rows)) if rows else [()] * 8
+        ids, *numbers = columns
+        # None becomes NaN in a float array
+        return cls(
+            np.array(ids, dtype=object),
+            *(np.array(column, dtype=np.float64) for column in numbers),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+@dataclass(slots=True)
+class BulkEvaluation:
+    ids: np.ndarray
+    overdue: np.ndarray
+    due_soon: np.ndarray
+
+    @property
+    def due(self) -> np.ndarray:
+        return self.overdue | self.due_soon
+
+    def _uuids(self, mask: np.ndarray) -> list[UUID]:
+        return [UUID(bytes=raw) for raw in self.ids[mask]]
+
+    def due_ids(self) -> list[UUID]:
+        return self._uuids(self.due)
+
+    def overdue_ids(self) -> list[UUID]:
+        return self._uuids(self.overdue)
+
+    def due_soon_ids(self) -> list[UUID]:
+        return self._uuids(self.due_soon)
+
+
+def evaluate(arrays: ReminderArrays, now: datetime) -> BulkEvaluation:
+    """`Reminder.is_overdue` / `Reminder.is_due_soon` for every row at once."""
+    now_s = now.timestamp()
+    next_mileage = arrays.last_service_mileage + arrays.interval_mileage
+    next_at = arrays.last_service_at + arrays.interval_days * SECONDS_PER_DAY
+
+    overdue = (arrays.car_mileage > next_mileage) | (now_s > next_at)
+    due_soon = (
+        (arrays.warning_mileage_before > 0)
+        & (arrays.car_mileage >= next_mileage - arrays.warning_mileage_before)
+    ) | (
+        (arrays.warning_days_before > 0)
+        & (now_s >= next_at - arrays.warning_days_before * SECONDS_PER_DAY)
+    )
+    return BulkEvaluation(arrays.ids, overdue, due_soon)
+
+
+async def due_reminders(
+    session: AsyncSession,
+    now: datetime | None = None,
+) -> BulkEvaluation:
+    """Load the columns of every active reminder and evaluate them."""
+    connection = await session.connection()
+    rows = (await connection.execute(bulk_statement())).all()
+    return evaluate(ReminderArrays.from_rows(rows), now or datetime.now(timezone.utc))
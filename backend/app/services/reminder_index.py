@@ -0,0 +1,284 @@
+import asyncio
+import logging
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta, timezone
+from typing import Collection, Iterable, Iterator, Sequence
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, Row, Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.models import Car, Reminder
+
+from .reminder_watch import add_car_listener, remove_car_listener
+
+log = logging.getLogger(__name__)
+
+# Julian day of 1970-01-01, julianday() - UNIX_EPOCH_JULIAN_DAY is in days
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+
+# Sorts after every id, (at, LAST_ID) bounds a timeline search at `at`
+LAST_ID = UUID(int=2**128 - 1)
+
+
+def _epoch(column) -> ColumnElement[float]:
+    """Seconds since the epoch, computed by SQLite instead of parsing datetimes."""
+    # Rounded to milliseconds, julianday() is a float of days
+    return func.round((func.julianday(column) - UNIX_EPOCH_JULIAN_DAY) * 86_400.0, 3)
+
+
+class IndexedCar:
+    __slots__ = ("id", "user_tg_id", "mileage", "reminders")
+
+    def __init__(self, id: UUID, user_tg_id: int, mileage: int) -> None:
+        self.id = id
+        self.user_tg_id = user_tg_id
+        self.mileage = mileage
+        self.reminders: list[IndexedReminder] = []
+
+
+class IndexedReminder:
+    """
+    What is needed to tell whether an active reminder is due.
+
+    Dates are seconds since the epoch, `mileage_due_at` is the projected date
+    of the trigger mileage.
+    """
+
+    __slots__ = ("id", "car", "due_at", "due_mileage", "mileage_due_at")
+
+    def __init__(
+        self,
+        id: UUID,
+        car: IndexedCar,
+        due_at: float | None,
+        due_mileage: int | None,
+        mileage_due_at: float | None,
+    ) -> None:
+        self.id = id
+        self.car = car
+        self.due_at = due_at
+        self.due_mileage = due_mileage
+        self.mileage_due_at = mileage_due_at
+
+    def wake_ups(self) -> Iterable[tuple[float, UUID]]:
+        """Entries of the reminder in the timeline."""
+        if self.due_at is not None:
+            yield self.due_at, self.id
+        if self.mileage_due_at is not None:
+            yield self.mileage_due_at, self.id
+
+    def is_due(self, now: float) -> bool:
+        """`Reminder.is_due` on the indexed values."""
+        if self.due_mileage is not None and self.car.mileage >= self.due_mileage:
+            return True
+        return self.due_at is not None and now >= self.due_at
+
+    @property
+    def next_due_at(self) -> datetime | None:
+        if self.due_at is None:
+            return None
+        return datetime.fromtimestamp(self.due_at, timezone.utc)
+
+
+def _due_order(reminder: IndexedReminder) -> tuple[bool, float]:
+    # Like ORDER BY next_due_at in SQLite: reminders without a date first
+    return reminder.due_at is not None, reminder.due_at or 0.0
+
+
+def _add_rows(
+    rows: Iterable[Row],
+    cars: dict[UUID, IndexedCar],
+    users: dict[int, list[IndexedCar]],
+    reminders: dict[UUID, IndexedReminder],
+) -> Iterator[IndexedReminder]:
+    for car_id, user_tg_id, mileage, *reminder in rows:
+        car = cars.get(car_id)
+        if car is None:
+            car = cars[car_id] = IndexedCar(car_id, user_tg_id, mileage)
+            users.setdefault(user_tg_id, []).append(car)
+        indexed = IndexedReminder(reminder[0], car, *reminder[1:])
+        car.reminders.append(indexed)
+        reminders[indexed.id] = indexed
+        yield indexed
+
+
+class ReminderIndex:
+    """
+    Every active reminder in memory, for /due and timers without a query.
+
+    `load()` reads the reminders with one streaming query into compact
+    `__slots__` records, grouped by car, the cars grouped by user. A car's
+    reminders are ordered by trigger date, and a sorted timeline of trigger
+    dates and mileage projections answers what becomes due within a window.
+
+    Once installed, the index hears about committed writes of cars, mileage
+    logs, service items and reminders through the session events of
+    `reminder_watch` and reloads the reminders of just those cars: the values
+    the triggers derive are read back rather than recomputed here. Reads
+    between a commit and the reload see the previous state; `drain()` waits
+    for the reload. Criteria UPDATE/DELETE statements are not seen.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        batch_size: int = 500,
+        stream_size: int = 10_000,
+    ) -> None:
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.stream_size = stream_size
+        self._cars: dict[UUID, IndexedCar] = {}
+        self._users: dict[int, list[IndexedCar]] = {}
+        # (date, id) of every trigger date and mileage projection, sorted
+        self._timeline: list[tuple[float, UUID]] = []
+        self._reminders: dict[UUID, IndexedReminder] = {}
+        self._pending: set[UUID] = set()
+        self._task: asyncio.Task[None] | None = None
+        # A reload racing a full load would index its cars twice
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._reminders)
+
+    def install(self) -> None:
+        """Start following committed changes."""
+        add_car_listener(self.notify)
+
+    def uninstall(self) -> None:
+        remove_car_listener(self.notify)
+
+    @staticmethod
+    def _statement() -> Select:
+        return (
+            select(
+                Reminder.car_id,
+                Car.user_tg_id,
+                Car.mileage,
+                Reminder.id,
+                _epoch(Reminder.next_due_at),
+                Reminder.next_due_mileage,
+                _epoch(Reminder.mileage_due_at),
+            )
+            .join(Reminder.car)
+            .where(Reminder.is_active.is_not(False))
+        )
+
+    def _cars_statement(self, car_ids: Sequence[UUID]) -> Select:
+        return self._statement().where(Reminder.car_id.in_(car_ids))
+
+    async def load(self) -> None:
+        """Replace the contents with every active reminder."""
+        async with self._lock:
+            await self._load()
+        log.info("Indexed %d reminders of %d cars", len(self), len(self._cars))
+
+    async def _load(self) -> None:
+        # Built aside and swapped in at once: readers keep the old contents
+        # across the awaits of the stream
+        cars: dict[UUID, IndexedCar] = {}
+        users: dict[int, list[IndexedCar]] = {}
+        reminders: dict[UUID, IndexedReminder] = {}
+        timeline: list[tuple[float, UUID]] = []
+        async with self.session_factory() as session:
+            result = await session.stream(
+                self._statement().execution_options(yield_per=self.stream_size)
+            )
+            async for rows in result.partitions():
+                for reminder in _add_rows(rows, cars, users, reminders):
+                    timeline.extend(reminder.wake_ups())
+        timeline.sort()
+        for car in cars.values():
+            car.reminders.sort(key=_due_order)
+        self._cars, self._users = cars, users
+        self._reminders, self._timeline = reminders, timeline
+
+    def _drop_car(self, car_id: UUID) -> None:
+        car = self._cars.pop(car_id, None)
+        if car is None:
+            return
+        user_cars = self._users[car.user_tg_id]
+        user_cars.remove(car)
+        if not user_cars:
+            del self._users[car.user_tg_id]
+        for reminder in car.reminders:
+            del self._reminders[reminder.id]
+            for key in reminder.wake_ups():
+                del self._timeline[bisect_left(self._timeline, key)]
+
+    def notify(self, car_ids: Collection[UUID]) -> None:
+        """Schedule a reload of `car_ids` on the running loop."""
+        self._pending.update(car_ids)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(
+                self._run(), name="reminder-index"
+            )
+
+    async def drain(self) -> None:
+        """Wait until every car notified so far is reloaded."""
+        while self._task is not None and not self._task.done():
+            await asyncio.shield(self._task)
+
+    async def _run(self) -> None:
+        while self._pending:
+            car_ids, self._pending = self._pending, set()
+            try:
+                await self.reload(car_ids)
+            except Exception:
+                log.exception("Failed to reload %d cars into the index", len(car_ids))
+
+    async def reload(self, car_ids: Collection[UUID]) -> None:
+        """Read the active reminders of `car_ids` again."""
+        async with self._lock:
+            await self._reload(list(car_ids))
+
+    async def _reload(self, car_ids: list[UUID]) -> None:
+        rows: list[Row] = []
+        async with self.session_factory() as session:
+            for start in range(0, len(car_ids), self.batch_size):
+                stmt = self._cars_statement(car_ids[start : start + self.batch_size])
+                rows.extend(await session.execute(stmt))
+        # Swapped in without awaiting, readers never see a car half-loaded
+        for car_id in car_ids:
+            self._drop_car(car_id)
+        for reminder in _add_rows(rows, self._cars, self._users, self._reminders):
+            for key in reminder.wake_ups():
+                insort(self._timeline, key)
+        for car_id in car_ids:
+            if car_id in self._cars:
+                self._cars[car_id].reminders.sort(key=_due_order)
+
+    def due_for_user(
+        self,
+        user_tg_id: int,
+        now: datetime | None = None,
+    ) -> list[IndexedReminder]:
+        """Triggered reminders of the user's cars, ordered like /due."""
+        now_s = (now or datetime.now(timezone.utc)).timestamp()
+        due = [
+            reminder
+            for car in self._users.get(user_tg_id, ())
+            for reminder in car.reminders
+            if reminder.is_due(now_s)
+        ]
+        due.sort(key=_due_order)
+        return due
+
+    def due_within(
+        self,
+        window: timedelta,
+        now: datetime | None = None,
+    ) -> list[IndexedReminder]:
+        """
+        Reminders that are not due yet but reach their trigger date or their
+        projected trigger mileage within `window`, earliest first.
+        """
+        now_s = (now or datetime.now(timezone.utc)).timestamp()
+        timeline = self._timeline
+        start = bisect_right(timeline, (now_s, LAST_ID))
+        end = bisect_right(timeline, (now_s + window.total_seconds(), LAST_ID))
+        # dict.fromkeys drops the second entry of a reminder, keeping the order
+        ids = dict.fromkeys(id for _, id in timeline[start:end])
+        reminders = (self._reminders[id] for id in ids)
+        return [reminder for reminder in reminders if not reminder.is_due(now_s)]
@@ -0,0 +1,312 @@
+import asyncio
+import heapq
+import logging
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Collection, Protocol, Sequence
+from uuid import UUID
+
+from sqlalchemy import Row, and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.models import Reminder, ReminderState
+from utils import as_utc
+
+from .reminder_sweep import ReminderSink, evaluated, record_notified, states
+from .reminder_watch import add_car_listener, remove_car_listener
+
+log = logging.getLogger(__name__)
+
+# CURRENT_TIMESTAMP has a resolution of one second and "overdue" is a strict
+# comparison, firing exactly at the trigger date would evaluate as not due
+CLOCK_RESOLUTION = timedelta(seconds=1)
+
+# End of the window before the first load
+WINDOW_UNSET = datetime.min.replace(tzinfo=timezone.utc)
+
+
+@dataclass(slots=True, frozen=True)
+class MileageForecast:
+    """The car has probably driven up to the reminder's trigger mileage."""
+
+    reminder_id: UUID
+    car_id: UUID
+    mileage_due_at: datetime
+
+
+class ForecastSink(Protocol):
+    async def __call__(self, forecasts: Sequence[MileageForecast]) -> None: ...
+
+
+class ReminderScheduler:
+    """
+    Wakes up exactly when the earliest `Reminder.next_due_at` is reached.
+
+    Trigger dates of active reminders due within `horizon` are kept in a
+    min-heap, the loop sleeps until the top of the heap or the end of the
+    window instead of polling. Each reload reads the dates after the end of
+    the previous window and keeps the entries that have not fired yet.
+
+    Once installed, the scheduler hears about committed writes of cars,
+    mileage logs, service items and reminders through the session events of
+    `reminder_watch` and re-reads the dates of just those cars' reminders: a
+    date moved into the window is scheduled, a reminder deactivated, deleted
+    or moved out of the window is cancelled. Dates that already passed when
+    the write commits are left to `ReminderWatcher` and the sweep, which
+    evaluate the car right away. `schedule` / `cancel` move a single entry,
+    stale heap entries are skipped when popped. Criteria UPDATE/DELETE
+    statements are not seen, their rows fire at the old date and `_emit`
+    re-reads them.
+
+    Projected trigger mileage dates (`Reminder.mileage_due_at`) are scheduled
+    the same way. Mileage is only known once the owner logs it, so when a
+    projection is reached and the reminder has not been reported, `nudge`
+    gets a forecast to ask the owner for a fresh odometer reading.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        sink: ReminderSink,
+        horizon: timedelta = timedelta(days=1),
+        batch_size: int = 500,
+        nudge: ForecastSink | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.sink = sink
+        self.nudge = nudge
+        self.horizon = horizon
+        self.batch_size = batch_size
+        self._heap: list[tuple[datetime, UUID]] = []
+        self._entries: dict[UUID, datetime] = {}
+        # Car of each entry, to cancel the deleted reminders of a car
+        self._cars: dict[UUID, UUID] = {}
+        self._window_end = WINDOW_UNSET
+        self._wakeup = asyncio.Event()
+        self._pending: set[UUID] = set()
+        self._task: asyncio.Task[None] | None = None
+        # A refresh racing a reload would rebuild the heap from stale rows
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def install(self) -> None:
+        """Start following committed changes."""
+        add_car_listener(self.notify)
+
+    def uninstall(self) -> None:
+        remove_car_listener(self.notify)
+
+    @property
+    def next_wakeup(self) -> datetime | None:
+        while self._heap and self._entries.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def schedule(self, reminder_id: UUID, due_at: datetime | None) -> None:
+        """Add, move or drop the trigger date of a reminder."""
+        if due_at is None:
+            self.cancel(reminder_id)
+            return
+        due_at = as_utc(due_at)
+        if due_at > self._window_end:
+            # Will be picked up by the window reload
+            self.cancel(reminder_id)
+            return
+        next_wakeup = self.next_wakeup
+        self._entries[reminder_id] = due_at
+        heapq.heappush(self._heap, (due_at, reminder_id))
+        if next_wakeup is None or due_at < next_wakeup:
+            self._wakeup.set()
+
+    def cancel(self, reminder_id: UUID) -> None:
+        self._entries.pop(reminder_id, None)
+        self._cars.pop(reminder_id, None)
+
+    def notify(self, car_ids: Collection[UUID]) -> None:
+        """Schedule a refresh of `car_ids` on the running loop."""
+        self._pending.update(car_ids)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(
+                self._run_refresh(), name="reminder-scheduler-refresh"
+            )
+
+    async def drain(self) -> None:
+        """Wait until every car notified so far is refreshed."""
+        while self._task is not None and not self._task.done():
+            await asyncio.shield(self._task)
+
+    async def _run_refresh(self) -> None:
+        while self._pending:
+            car_ids, self._pending = self._pending, set()
+            try:
+                await self.refresh(car_ids, datetime.now(timezone.utc))
+            except Exception:
+                log.exception("Failed to reschedule reminders of %d cars", len(car_ids))
+
+    async def refresh(self, car_ids: Collection[UUID], now: datetime) -> None:
+        """Re-read the trigger dates of the reminders of `car_ids`."""
+        async with self._lock:
+            if self._window_end == WINDOW_UNSET:
+                # Everything is read by the first load
+                return
+            car_ids = list(car_ids)
+            rows: list[Row] = []
+            async with self.session_factory() as session:
+                for start in range(0, len(car_ids), self.batch_size):
+                    stmt = select(
+                        Reminder.id,
+                        Reminder.car_id,
+                        Reminder.is_active,
+                        Reminder.next_due_at,
+                        Reminder.mileage_due_at,
+                    ).where(
+                        Reminder.car_id.in_(car_ids[start : start + self.batch_size])
+                    )
+                    rows.extend(await session.execute(stmt))
+
+            for row in rows:
+                scheduled = self._entries.get(row.id)
+                due_at = None
+                if row.is_active:
+                    due_at = min(
+                        (
+                            due_at
+                            for due_at in map(as_utc, filter(None, row[3:]))
+                            # An entry about to fire is not lost to the race
+                            if due_at > now or due_at == scheduled
+                        ),
+                        default=None,
+                    )
+                if due_at != scheduled:
+                    self.schedule(row.id, due_at)
+                if row.id in self._entries:
+                    self._cars[row.id] = row.car_id
+
+            # Deleted together with their car or on their own
+            refreshed = set(car_ids)
+            found = {row.id for row in rows}
+            for reminder_id, car_id in list(self._cars.items()):
+                if car_id in refreshed and reminder_id not in found:
+                    self.cancel(reminder_id)
+
+    async def load(self, now: datetime) -> None:
+        """
+        Extend the window to `now + horizon`.
+
+        Only trigger dates after the previous window end are read and the
+        entries not fired yet are kept: a date at the very end of the old
+        window, or one passed while the loop woke up late, still fires. The
+        first load starts at `now`.
+        """
+        async with self._lock:
+            await self._load(now)
+
+    async def _load(self, now: datetime) -> None:
+        start = now if self._window_end == WINDOW_UNSET else self._window_end
+        window_end = max(now + self.horizon, start)
+        columns = Reminder.next_due_at, Reminder.mileage_due_at
+        stmt = select(Reminder.id, Reminder.car_id, *columns).where(
+            Reminder.is_active.is_(True),
+            or_(*(and_(c > start, c <= window_end) for c in columns)),
+        )
+        async with self.session_factory() as session:
+            rows = (await session.execute(stmt)).all()
+
+        for row in rows:
+            due_at = min(
+                due_at
+                for due_at in map(as_utc, filter(None, row[2:]))
+                if start < due_at <= window_end
+            )
+            # An entry kept from the old window is the earlier one
+            self._entries.setdefault(row.id, due_at)
+            self._cars[row.id] = row.car_id
+        self._heap = [
+            (due_at, reminder_id) for reminder_id, due_at in self._entries.items()
+        ]
+        heapq.heapify(self._heap)
+        self._window_end = window_end
+        log.debug("Scheduled %d reminders until %s", len(self._entries), window_end)
+
+    def pop_due(self, now: datetime) -> list[UUID]:
+        fired = []
+        while self._heap and self._heap[0][0] + CLOCK_RESOLUTION <= now:
+            due_at, reminder_id = heapq.heappop(self._heap)
+            if self._entries.get(reminder_id) == due_at:
+                self.cancel(reminder_id)
+                fired.append(reminder_id)
+        return fired
+
+    async def _emit(self, reminder_ids: list[UUID]) -> None:
+        for start in range(0, len(reminder_ids), self.batch_size):
+            now = datetime.now(timezone.utc)
+            # The row may have changed or been reported since it was scheduled
+            stmt = select(
+                Reminder.car_id,
+                Reminder.id,
+                Reminder.state,
+                Reminder.notified_state,
+            ).where(
+                Reminder.id.in_(reminder_ids[start : start + self.batch_size]),
+                Reminder.has_unreported_change(now),
+            )
+            async with self.session_factory() as session:
+                rows = (await session.execute(stmt)).all()
+            due = [evaluated(row) for row in rows]
+            if due:
+                delivered = await self.sink(due)
+                await record_notified(self.session_factory, states(delivered), now)
+            if self.nudge is not None:
+                batch = set(reminder_ids[start : start + self.batch_size])
+                await self._nudge(batch - {r.id for r in due}, now)
+
+    async def _nudge(self, reminder_ids: set[UUID], now: datetime) -> None:
+        if not reminder_ids or self.nudge is None:
+            return
+        # Projection reached, but nothing reported yet: ask for the mileage
+        stmt = select(Reminder.id, Reminder.car_id, Reminder.mileage_due_at).where(
+            Reminder.id.in_(reminder_ids),
+            Reminder.is_active.is_not(False),
+            Reminder.notified_state == ReminderState.ok,
+            or_(Reminder.snoozed_until.is_(None), Reminder.snoozed_until <= now),
+            Reminder.mileage_due_at <= now,
+        )
+        async with self.session_factory() as session:
+            rows = (await session.execute(stmt)).all()
+        if rows:
+            await self.nudge(
+                [
+                    MileageForecast(
+                        reminder_id=row.id,
+                        car_id=row.car_id,
+                        mileage_due_at=as_utc(row.mileage_due_at),
+                    )
+                    for row in rows
+                ]
+            )
+
+    async def run(self) -> None:
+        while True:
+            now = datetime.now(timezone.utc)
+            if now >= self._window_end:
+                await self.load(now)
+
+            fired = self.pop_due(now)
+            if fired:
+                try:
+                    await self._emit(fired)
+                except Exception:
+                    log.exception("Failed to emit %d due reminders", len(fired))
+
+            self._wakeup.clear()
+            next_wakeup = self.next_wakeup
+            wake_at = self._window_end
+            if next_wakeup is not None:
+                wake_at = min(next_wakeup + CLOCK_RESOLUTION, wake_at)
+            timeout = (wake_at - datetime.now(timezone.utc)).total_seconds()
+            if timeout > 0:
+                with suppress(TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
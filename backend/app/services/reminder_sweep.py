@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Mapping, Protocol, Sequence, cast
+from uuid import UUID
+
+from sqlalchemy import Select, Table, bindparam, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import InstrumentedAttribute
+
+from core.models import Reminder, ReminderState
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(slots=True, frozen=True)
+class EvaluatedReminder:
+    id: UUID
+    car_id: UUID
+    state: ReminderState
+    # State the owner was notified about before
+    previous_state: ReminderState = ReminderState.ok
+
+    @property
+    def is_overdue(self) -> bool:
+        return self.state is ReminderState.overdue
+
+    @property
+    def is_due_soon(self) -> bool:
+        return self.state is ReminderState.due_soon
+
+
+class ReminderSink(Protocol):
+    """
+    Reports evaluated reminders, returns the ones already delivered.
+
+    Only the returned reminders are recorded as notified by the caller. A
+    sink that delivers later returns none of them and records the states
+    itself once they are out (`NotificationSink`).
+    """
+
+    async def __call__(
+        self, reminders: Sequence[EvaluatedReminder]
+    ) -> Sequence[EvaluatedReminder]: ...
+
+
+def evaluated(row) -> EvaluatedReminder:
+    return EvaluatedReminder(
+        id=row.id,
+        car_id=row.car_id,
+        state=row.state,
+        previous_state=row.notified_state,
+    )
+
+
+def states(reminders: Sequence[EvaluatedReminder]) -> dict[UUID, ReminderState]:
+    return {reminder.id: reminder.state for reminder in reminders}
+
+
+_reminders = cast(Table, Reminder.__table__)
+
+_record_notified = (
+    update(_reminders)
+    .where(_reminders.c.id == bindparam("reminder_id"))
+    .values(
+        notified_state=bindparam("state"),
+        notified_at=bindparam("notified_at"),
+    )
+)
+
+
+async def record_notified(
+    session_factory: async_sessionmaker[AsyncSession],
+    states: Mapping[UUID, ReminderState],
+    now: datetime,
+) -> None:
+    """Persist the states reminders were reported in, in one executemany."""
+    if not states:
+        return
+    async with session_factory() as session:
+        # A Core statement on the table: the bookkeeping changes no read
+        # model, so the user cache is not invalidated by it
+        await session.execute(
+            _record_notified,
+            [
+                {"reminder_id": reminder_id, "state": state, "notified_at": now}
+                for reminder_id, state in states.items()
+            ],
+        )
+        await session.commit()
+
+
+@dataclass(slots=True)
+class SweepStats:
+    reminders: int = 0
+    due: int = 0
+    chunks: int = 0
+    elapsed: float = 0.0
+    chunk_latency_total: float = 0.0
+    chunk_latency_max: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Evaluated reminders per second."""
+        return self.reminders / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def chunk_latency_avg(self) -> float:
+        return self.chunk_latency_total / self.chunks if self.chunks else 0.0
+
+    def add_chunk(self, size: int, due: int, latency: float) -> None:
+        self.reminders += size
+        self.due += due
+        self.chunks += 1
+        self.chunk_latency_total += latency
+        self.chunk_latency_max = max(self.chunk_latency_max, latency)
+
+
+class ReminderSweeper:
+    """
+    Evaluates all active reminders in keyset-paged chunks.
+
+    Chunks are walked in keyset order, every chunk is read in its own short
+    session, so memory and lock time are bounded by `chunk_size` and not by
+    the size of the table.
+
+    With `only_changes` only `ix_reminders_car_pending` is walked (reminders
+    not yet reported as overdue) and only reminders whose state moved past
+    `notified_state` leave the database. The sink gets the transitions, and
+    the ones it reports as delivered are persisted, so the next sweep stays
+    silent about them: output is proportional to changes, not to everything
+    that is due. Transitions that were not delivered come up again.
+    Without it every active reminder is evaluated and emitted, and nothing
+    is recorded.
+
+    When a `ReminderWatcher` re-evaluates cars as their mileage and services
+    are written, `check_mileage=False` leaves the sweep with what only time
+    changes: reminders whose trigger date or snooze has passed.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        sink: ReminderSink,
+        chunk_size: int = 1000,
+        only_changes: bool = True,
+        check_mileage: bool = True,
+    ) -> None:
+        self.session_factory = session_factory
+        self.sink = sink
+        self.chunk_size = chunk_size
+        self.only_changes = only_changes
+        self.check_mileage = check_mileage
+
+    def _chunk_statement(
+        self,
+        after: tuple[UUID, UUID] | None,
+        now: datetime,
+    ) -> Select:
+        stmt = select(
+            Reminder.car_id,
+            Reminder.id,
+            Reminder.state,
+            Reminder.notified_state,
+        ).limit(self.chunk_size)
+        columns: tuple[InstrumentedAttribute[Any], ...]
+        keyset: tuple[Any, ...] | None
+        if self.only_changes:
+            stmt = stmt.where(Reminder.has_unreported_change(now, self.check_mileage))
+            columns = Reminder.car_id, Reminder.id
+            keyset = after
+        else:
+            # "IS NOT 0" instead of "= 1": an equality on the middle index column
+            # makes SQLite sort the chunk in a temp b-tree instead of using the index
+            stmt = stmt.where(Reminder.is_active.is_not(False))
+            columns = Reminder.car_id, Reminder.is_active, Reminder.id
+            keyset = after and (after[0], True, after[1])
+        stmt = stmt.order_by(*columns)
+        if keyset is not None:
+            # Plain values would be bound with the generic Uuid type (hex text)
+            stmt = stmt.where(
+                tuple_(*columns) > tuple_(*keyset, types=[c.type for c in columns])
+            )
+        return stmt
+
+    async def run_once(self, now: datetime | None = None) -> SweepStats:
+        now = now or datetime.now(timezone.utc)
+        stats = SweepStats()
+        after: tuple[UUID, UUID] | None = None
+        started = time.perf_counter()
+
+        while True:
+            chunk_started = time.perf_counter()
+            async with self.session_factory() as session:
+                stmt = self._chunk_statement(after, now)
+                rows = (await session.execute(stmt)).all()
+            if not rows:
+                break
+
+            reminders = [evaluated(row) for row in rows]
+            due = [r for r in reminders if r.state is not ReminderState.ok]
+            emitted = due if self.only_changes else reminders
+            if emitted:
+                delivered = await self.sink(emitted)
+                if self.only_changes:
+                    await record_notified(self.session_factory, states(delivered), now)
+
+            stats.add_chunk(
+                size=len(rows),
+                due=len(due),
+                latency=time.perf_counter() - chunk_started,
+            )
+            after = rows[-1].car_id, rows[-1].id
+            if len(rows) < self.chunk_size:
+                break
+
+        stats.elapsed = time.perf_counter() - started
+        log.info(
+            "Reminder sweep: %d reminders, %d due, %d chunks in %.3fs "
+            "(%.0f reminders/s, chunk avg %.1fms, max %.1fms)",
+            stats.reminders,
+            stats.due,
+            stats.chunks,
+            stats.elapsed,
+            stats.throughput,
+            stats.chunk_latency_avg * 1000,
+            stats.chunk_latency_max * 1000,
+        )
+        return stats
+
+    async def run_forever(self, interval: float) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                log.exception("Reminder sweep failed")
+            await asyncio.sleep(interval)
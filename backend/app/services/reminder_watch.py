@@ -0,0 +1,179 @@
+import asyncio
+import logging
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from typing import Callable, Collection, Sequence
+from uuid import UUID
+
+from sqlalchemy import Select, event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from core.models import Car, MileageLog, Reminder, ServiceItem
+
+from .reminder_sweep import (
+    EvaluatedReminder,
+    ReminderSink,
+    evaluated,
+    record_notified,
+    states,
+)
+
+log = logging.getLogger(__name__)
+
+# Writes of these rows can move the state of their car's reminders
+WATCHED = (MileageLog, Reminder, ServiceItem)
+
+# Called after a commit with the ids of the cars it touched
+CarListener = Callable[[set[UUID]], None]
+
+_listeners: list[CarListener] = []
+
+
+def add_car_listener(listener: CarListener) -> None:
+    """Hand the cars of every committed write to `listener`."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_car_listener(listener: CarListener) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+class ReminderWatcher:
+    """
+    Re-evaluates the reminders of a car right after a write that can move them.
+
+    Mileage-based state only changes when a mileage log is written or an item
+    is serviced. Session events below collect the cars of flushed mileage
+    logs, service items and reminders, and once the transaction commits the
+    installed watcher reads the pending reminders of just those cars, hands
+    state changes to the sink and records the delivered ones like the sweep
+    does. The owner hears about an oil change right after /add_mileage, and
+    sweeps can leave mileage out (`ReminderSweeper(check_mileage=False)`).
+
+    A commit only schedules the work: cars committed while a pass runs are
+    evaluated together by the next one. Only writes that go through an ORM
+    `Session` are seen, criteria UPDATE/DELETE statements are not.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        sink: ReminderSink,
+        batch_size: int = 500,
+    ) -> None:
+        self.session_factory = session_factory
+        self.sink = sink
+        self.batch_size = batch_size
+        self._pending: set[UUID] = set()
+        self._task: asyncio.Task[None] | None = None
+
+    def install(self) -> None:
+        """Start handing committed changes to this watcher."""
+        add_car_listener(self.notify)
+
+    def uninstall(self) -> None:
+        remove_car_listener(self.notify)
+
+    def notify(self, car_ids: Collection[UUID]) -> None:
+        """Schedule re-evaluation of `car_ids` on the running loop."""
+        self._pending.update(car_ids)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(
+                self._run(), name="reminder-watcher"
+            )
+
+    async def drain(self) -> None:
+        """Wait until every car notified so far is evaluated."""
+        while self._task is not None and not self._task.done():
+            await asyncio.shield(self._task)
+
+    async def _run(self) -> None:
+        while self._pending:
+            car_ids, self._pending = self._pending, set()
+            try:
+                await self.evaluate(car_ids)
+            except Exception:
+                log.exception("Failed to re-evaluate %d cars", len(car_ids))
+
+    def _statement(self, car_ids: Sequence[UUID], now: datetime) -> Select:
+        return (
+            select(
+                Reminder.car_id,
+                Reminder.id,
+                Reminder.state,
+                Reminder.notified_state,
+            ).where(
+                Reminder.car_id.in_(car_ids),
+                Reminder.has_unreported_change(now),
+            )
+            # Only ix_reminders_car_pending gives this order without a sort,
+            # which keeps SQLite from picking ix_reminders_car_active instead
+            .order_by(Reminder.car_id, Reminder.id)
+        )
+
+    async def evaluate(
+        self,
+        car_ids: Collection[UUID],
+        now: datetime | None = None,
+    ) -> list[EvaluatedReminder]:
+        """Emit and record the state changes of the reminders of `car_ids`."""
+        now = now or datetime.now(timezone.utc)
+        car_ids = list(car_ids)
+        changed: list[EvaluatedReminder] = []
+        async with self.session_factory() as session:
+            for start in range(0, len(car_ids), self.batch_size):
+                stmt = self._statement(car_ids[start : start + self.batch_size], now)
+                changed.extend(evaluated(row) for row in await session.execute(stmt))
+        if changed:
+            delivered = await self.sink(changed)
+            await record_notified(self.session_factory, states(delivered), now)
+        return changed
+
+
+PENDING_KEY = "reminder_watch_cars"
+
+
+def _pending(session: Session) -> set[UUID]:
+    return session.info.setdefault(PENDING_KEY, set())
+
+
+@event.listens_for(Session, "after_flush")
+def collect_changed_cars(session: Session, flush_context) -> None:
+    """Remember the cars of flushed logs, items and reminders."""
+    if not _listeners:
+        return
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, WATCHED):
+            _pending(session).add(obj.car_id)
+        elif isinstance(obj, Car):
+            _pending(session).add(obj.id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def collect_bulk_inserts(state: ORMExecuteState) -> None:
+    """ORM-enabled INSERT statements, like the mileage import, bypass the flush."""
+    if not _listeners or not state.is_insert:
+        return
+    mapper = state.bind_mapper
+    if mapper is None or not issubclass(mapper.class_, WATCHED):
+        return
+    params = state.parameters
+    rows = [params] if isinstance(params, Mapping) else params or ()
+    _pending(state.session).update(row["car_id"] for row in rows if "car_id" in row)
+
+
+@event.listens_for(Session, "after_commit")
+def reevaluate_changed_cars(session: Session) -> None:
+    car_ids = session.info.pop(PENDING_KEY, None)
+    if not car_ids:
+        return
+    for listener in tuple(_listeners):
+        listener(car_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_changed_cars(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,64 @@
+from datetime import datetime
+from typing import Iterable, Sequence
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.models import Reminder, ServiceItem
+
+
+async def record_service_visit(
+    session: AsyncSession,
+    car_id: UUID,
+    names: Iterable[str],
+    date: datetime,
+    mileage: int,
+) -> Sequence[Reminder]:
+    """
+    Mark several items of a car serviced at once, for /last_service.
+
+    One INSERT ... ON CONFLICT on `uq_service_items_car_name` moves the last
+    service of the named items to `date` and `mileage` and creates the items
+    the car does not have yet. The service_items trigger recomputes the
+    trigger points of their reminders in the same statement. Returns those
+    reminders, reloaded. Runs in the caller's transaction, the caller
+    commits: the whole visit is one fsync.
+    """
+    rows = [
+        {
+            "car_id": car_id,
+            "name": name,
+            "last_service_date": date,
+            "last_service_mileage": mileage,
+        }
+        # A name twice would update the row it has just inserted
+        for name in dict.fromkeys(names)
+    ]
+    if not rows:
+        return []
+
+    upsert = insert(ServiceItem)
+    stmt = (
+        upsert.on_conflict_do_update(
+            index_elements=[ServiceItem.car_id, ServiceItem.name],
+            set_={
+                "last_service_date": upsert.excluded.last_service_date,
+                "last_service_mileage": upsert.excluded.last_service_mileage,
+                "updated_at": func.now(),
+            },
+        ).returning(ServiceItem)
+        # Items already loaded get the new last service
+        .execution_options(populate_existing=True)
+    )
+    items = (await session.scalars(stmt, rows)).all()
+
+    reminders = (
+        select(Reminder)
+        .where(Reminder.service_item_id.in_([item.id for item in items]))
+        .order_by(Reminder.next_due_at)
+        # Replaces trigger-maintained values of reminders already loaded
+        .execution_options(populate_existing=True)
+    )
+    return (await session.scalars(reminders)).all()
@@ -1,3 +1,11 @@
-__all__ = ["camel_case_to_snake_case"]
+__all__ = [
+    "as_utc",
+    "camel_case_to_snake_case",
+    "TokenBucket",
+    "uuid7",
+]
 
 from .case_converter import camel_case_to_snake_case
+from .timezone import as_utc
+from .token_bucket import TokenBucket
+from .uuid7 import uuid7
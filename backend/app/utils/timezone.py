@@ -0,0 +1,17 @@
+from datetime import datetime, timezone
+
+
+def as_utc(value: datetime) -> datetime:
+    """
+    Args:
+        value (`datetime`): naive or aware datetime
+
+    Returns:
+        `datetime`: aware datetime, naive values are assumed to be UTC
+
+    SQLite drops the offset of `DateTime(timezone=True)` columns,
+    every stored value is UTC.
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
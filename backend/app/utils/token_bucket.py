@@ -0,0 +1,41 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Rate limiter: `rate` tokens per second on average, bursts of `capacity`.
+
+    A token is reserved as soon as it is asked for, the balance may go
+    negative, so concurrent waiters get consecutive slots instead of all
+    waking up at the same moment.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    @property
+    def is_full(self) -> bool:
+        self._refill()
+        return self._tokens >= self.capacity
+
+    def reserve(self) -> float:
+        """Take a token, return the seconds to wait before it may be used."""
+        self._refill()
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
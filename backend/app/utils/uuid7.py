@@ -0,0 +1,40 @@
+import os
+import threading
+import time
+from uuid import UUID
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+_COUNTER_MAX = 0xFFF
+
+
+def uuid7() -> UUID:
+    """
+    Returns:
+        `UUID`: time-ordered UUID, version 7 (RFC 9562)
+
+    The first 48 bits are the Unix time in milliseconds, so new keys land at
+    the right edge of the primary-key B-tree instead of a random page. Within
+    one millisecond the 12-bit `rand_a` field is a counter (RFC 9562, method 1):
+    keys generated by this process are strictly increasing.
+    """
+    global _last_ms, _counter
+
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            # Random start, the upper half is left for the counter to grow
+            _counter = int.from_bytes(os.urandom(2)) & (_COUNTER_MAX >> 1)
+        else:
+            ms = _last_ms
+            _counter += 1
+            if _counter > _COUNTER_MAX:
+                ms += 1
+                _counter = 0
+        _last_ms = ms
+        counter = _counter
+
+    rand_b = int.from_bytes(os.urandom(8)) & ((1 << 62) - 1)
+    return UUID(int=ms << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | rand_b)
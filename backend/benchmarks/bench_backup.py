@@ -0,0 +1,101 @@
+"""
+Full database export and import throughput and memory.
+
+Exports a synthetic database to NDJSON and to CSV, then imports the NDJSON
+file into an empty database. Prints rows/s, MB/s and the peak of the Python
+heap (`tracemalloc`), which should not depend on `--reminders`.
+"""
+
+import argparse
+import asyncio
+import tracemalloc
+from pathlib import Path
+
+from common import BENCH_DIR, populate_reminders, scratch_db, timer
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from core.models import Base
+from services import export_csv, export_ndjson, import_ndjson
+
+
+def size_mb(path: Path) -> float:
+    if path.is_dir():
+        return sum(file.stat().st_size for file in path.iterdir()) / 2**20
+    return path.stat().st_size / 2**20
+
+
+async def run(source: str, target: str, batch_size: int) -> None:
+    source_engine = create_async_engine(source)
+    target_engine = create_async_engine(target)
+    async with target_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(source_engine, expire_on_commit=False)
+    restored = async_sessionmaker(target_engine, expire_on_commit=False)
+
+    ndjson = BENCH_DIR / "backup.ndjson"
+    csv_dir = BENCH_DIR / "backup-csv"
+
+    async def export_to_ndjson():
+        async with sessions() as session:
+            with open(ndjson, "w") as out:
+                return await export_ndjson(session, out, batch_size=batch_size)
+
+    async def export_to_csv():
+        async with sessions() as session:
+            return await export_csv(session, csv_dir, batch_size=batch_size)
+
+    async def import_from_ndjson():
+        with open(ndjson) as lines:
+            return await import_ndjson(restored, lines, batch_size=batch_size)
+
+    for label, step, path in (
+        ("export ndjson", export_to_ndjson, ndjson),
+        ("export csv", export_to_csv, csv_dir),
+        ("import ndjson", import_from_ndjson, ndjson),
+    ):
+        with timer(label) as elapsed:
+            stats = await step()
+        seconds = elapsed["seconds"]
+        print(
+            f"  rows={stats.total} {stats.total / seconds:,.0f} rows/s "
+            f"{size_mb(path) / seconds:.1f} MB/s"
+        )
+
+    # tracemalloc slows allocations down, the peak is taken on another run
+    tracemalloc.start()
+    await export_to_ndjson()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"export ndjson peak heap={peak / 2**20:.1f} MiB")
+
+    await source_engine.dispose()
+    await target_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reminders", type=int, default=100_000)
+    parser.add_argument("--logs-per-car", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    path = scratch_db("backup_source.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session, timer("populate"):
+        populate_reminders(session, args.reminders, logs=args.logs_per_car)
+
+    target = scratch_db("backup_target.db")
+    asyncio.run(
+        run(
+            f"sqlite+aiosqlite:///{path}",
+            f"sqlite+aiosqlite:///{target}",
+            args.batch_size,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
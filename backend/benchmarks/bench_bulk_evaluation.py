@@ -0,0 +1,82 @@
+"""
+Due reminders at scale: SQL expressions vs NumPy arrays.
+
+Evaluates `Reminder.is_overdue` / `Reminder.is_due_soon` for every active
+reminder with a single statement filtering on the SQL expressions of the
+hybrids, and with `services.reminder_bulk`: the raw columns loaded into
+arrays and compared in vectorized form. The per-object Python hybrids are
+much slower, `--python` adds them for smaller runs.
+
+Needs the `bulk` extra:
+
+    python benchmarks/bench_bulk_evaluation.py --reminders 1000000
+"""
+
+import argparse
+from datetime import datetime, timezone
+
+from common import populate_reminders, scratch_db, timer
+from sqlalchemy import create_engine, or_, select
+from sqlalchemy.orm import Session, selectinload
+
+from core.models import Base, Reminder
+from services.reminder_bulk import ReminderArrays, bulk_statement, evaluate
+
+
+def due_python(session: Session) -> set:
+    stmt = (
+        select(Reminder)
+        .where(Reminder.is_active)
+        .options(selectinload(Reminder.car), selectinload(Reminder.service_item))
+    )
+    reminders = session.scalars(stmt).all()
+    return {r.id for r in reminders if r.is_overdue or r.is_due_soon}
+
+
+def due_sql(session: Session) -> set:
+    stmt = select(Reminder.id).where(
+        Reminder.is_active,
+        or_(Reminder.is_overdue, Reminder.is_due_soon),
+    )
+    return set(session.scalars(stmt))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reminders", type=int, default=1_000_000)
+    parser.add_argument("--per-car", type=int, default=10)
+    parser.add_argument("--logs-per-car", type=int, default=5)
+    parser.add_argument("--python", action="store_true", help="also time hybrids")
+    args = parser.parse_args()
+
+    engine = create_engine(f"sqlite:///{scratch_db('bulk_evaluation.db')}")
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as session, timer("populate"):
+        populate_reminders(session, args.reminders, args.per_car, args.logs_per_car)
+
+    if args.python:
+        with Session(engine) as session, timer("python hybrids"):
+            python_due = due_python(session)
+        print(f"due reminders: python={len(python_due)}")
+
+    with Session(engine) as session, timer("sql expressions") as sql_time:
+        sql_due = due_sql(session)
+
+    with Session(engine) as session, timer("numpy total") as numpy_time:
+        with timer("  load columns"):
+            rows = session.execute(bulk_statement()).all()
+            arrays = ReminderArrays.from_rows(rows)
+        with timer("  evaluate"):
+            result = evaluate(arrays, datetime.now(timezone.utc))
+        with timer("  due ids"):
+            numpy_due = set(result.due_ids())
+
+    print(f"rows={len(arrays)} due: sql={len(sql_due)} numpy={len(numpy_due)}")
+    print(f"speedup: x{sql_time['seconds'] / numpy_time['seconds']:.1f}")
+    if sql_due != numpy_due:
+        raise SystemExit("sql and numpy evaluation disagree")
+
+
+if __name__ == "__main__":
+    main()
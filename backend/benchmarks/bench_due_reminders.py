@@ -0,0 +1,57 @@
+"""
+Due reminders: Python hybrids vs SQL expressions.
+
+Compares evaluating `Reminder.is_overdue` / `Reminder.is_due_soon` per object
+(lazy loads of the car, its mileage logs and the service item) with a single
+statement filtering on the SQL expressions of the same hybrids.
+"""
+
+import argparse
+
+from common import populate_reminders, scratch_db, timer
+from sqlalchemy import create_engine, or_, select
+from sqlalchemy.orm import Session
+
+from core.models import Base, Reminder
+
+
+def due_python(session: Session) -> set:
+    reminders = session.scalars(select(Reminder).where(Reminder.is_active)).all()
+    return {r.id for r in reminders if r.is_overdue or r.is_due_soon}
+
+
+def due_sql(session: Session) -> set:
+    stmt = select(Reminder.id).where(
+        Reminder.is_active,
+        or_(Reminder.is_overdue, Reminder.is_due_soon),
+    )
+    return set(session.scalars(stmt))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reminders", type=int, default=100_000)
+    parser.add_argument("--per-car", type=int, default=10)
+    parser.add_argument("--logs-per-car", type=int, default=30)
+    args = parser.parse_args()
+
+    engine = create_engine(f"sqlite:///{scratch_db('due_reminders.db')}")
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as session, timer("populate"):
+        populate_reminders(session, args.reminders, args.per_car, args.logs_per_car)
+
+    with Session(engine) as session, timer("python hybrids") as python_time:
+        python_due = due_python(session)
+
+    with Session(engine) as session, timer("sql expressions") as sql_time:
+        sql_due = due_sql(session)
+
+    print(f"due reminders: python={len(python_due)} sql={len(sql_due)}")
+    print(f"speedup: x{python_time['seconds'] / sql_time['seconds']:.1f}")
+    if python_due != sql_due:
+        raise SystemExit("python and sql evaluation disagree")
+
+
+if __name__ == "__main__":
+    main()
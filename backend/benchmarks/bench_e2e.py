@@ -0,0 +1,330 @@
+"""
+End-to-end latency of the core operations on a synthetic population.
+
+The dataset (see `dataset.py`) is generated once per schema revision and
+cached in the temp directory; every run works on a fresh copy of it through
+`DatabaseHelper`, with the same PRAGMAs, session class and triggers as the
+application. Each operation runs in its own session, like a bot request:
+
+    current_mileage    read the mileage of a car
+    due_list           triggered reminders of a user, for /due
+    add_mileage        read the mileage of a car and log a new reading
+    add_mileage_watched  the same with a `ReminderWatcher` installed, until
+                       the car's reminders are re-evaluated and recorded
+    mark_service_done  move an item's last service to now and the car's mileage
+    service_visit      mark up to 6 items of a car serviced with one upsert
+    service_visit_per_item  the same visit as one mark_service_done per item
+    delete_car         delete a car with its logs, items and reminders
+    full_sweep         evaluate and emit every active reminder
+    change_sweep       emit and record state changes only, the first run
+                       reports everything that is due
+    date_sweep         change sweep that leaves mileage to the watcher
+
+Results go to stdout and, with `--json`, to a file that a later run can use
+as `--baseline` to print the change per operation:
+
+    python benchmarks/bench_e2e.py --users 100000 --json before.json
+    python benchmarks/bench_e2e.py --users 100000 --baseline before.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Sequence
+from uuid import UUID
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from common import APP_DIR, BENCH_DIR, remove_db, scratch_db, timer
+from dataset import DatasetSpec, generate
+from sqlalchemy import delete, func, select
+
+from core.config import SqliteProfile
+from core.db_helper import DatabaseHelper
+from core.models import Car, MileageLog, ServiceItem, User
+from repositories import ReminderRepository
+from services import (
+    EvaluatedReminder,
+    ReminderSweeper,
+    ReminderWatcher,
+    record_service_visit,
+)
+
+Operation = Callable[[DatabaseHelper, object], Awaitable[None]]
+
+
+@dataclass(slots=True)
+class OperationResult:
+    runs: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    ops_per_second: float
+
+    @classmethod
+    def from_samples(cls, samples: Sequence[float]) -> "OperationResult":
+        ordered = sorted(samples)
+
+        def percentile(q: float) -> float:
+            return ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000
+
+        return cls(
+            runs=len(ordered),
+            mean_ms=statistics.fmean(ordered) * 1000,
+            p50_ms=percentile(0.5),
+            p95_ms=percentile(0.95),
+            p99_ms=percentile(0.99),
+            max_ms=ordered[-1] * 1000,
+            ops_per_second=len(ordered) / sum(ordered),
+        )
+
+
+async def current_mileage(helper: DatabaseHelper, car_id: UUID) -> None:
+    async with helper.session_factory() as session:
+        await session.scalar(select(Car.mileage).where(Car.id == car_id))
+
+
+async def due_list(helper: DatabaseHelper, user_tg_id: int) -> None:
+    async with helper.session_factory() as session:
+        await ReminderRepository(session).list_due(user_tg_id)
+
+
+async def add_mileage(helper: DatabaseHelper, car_id: UUID) -> None:
+    async with helper.session_factory() as session:
+        mileage = await session.scalar(select(Car.mileage).where(Car.id == car_id))
+        session.add(MileageLog(car_id=car_id, mileage=mileage + 42))
+        await session.commit()
+
+
+async def mark_service_done(helper: DatabaseHelper, item_id: UUID) -> None:
+    async with helper.session_factory() as session:
+        item = await session.get(ServiceItem, item_id)
+        item.last_service_date = datetime.now(timezone.utc)
+        item.last_service_mileage = await session.scalar(
+            select(Car.mileage).where(Car.id == item.car_id)
+        )
+        await session.commit()
+
+
+Visit = tuple[UUID, list[str]]
+
+
+async def service_visit(helper: DatabaseHelper, visit: Visit) -> None:
+    car_id, names = visit
+    async with helper.session_factory() as session:
+        mileage = await session.scalar(select(Car.mileage).where(Car.id == car_id))
+        await record_service_visit(
+            session, car_id, names, datetime.now(timezone.utc), mileage
+        )
+        await session.commit()
+
+
+async def service_visit_per_item(helper: DatabaseHelper, visit: Visit) -> None:
+    car_id, names = visit
+    for name in names:
+        async with helper.session_factory() as session:
+            item = await session.scalar(
+                select(ServiceItem).where(
+                    ServiceItem.car_id == car_id, ServiceItem.name == name
+                )
+            )
+            item.last_service_date = datetime.now(timezone.utc)
+            item.last_service_mileage = await session.scalar(
+                select(Car.mileage).where(Car.id == car_id)
+            )
+            await session.commit()
+
+
+async def delete_car(helper: DatabaseHelper, car_id: UUID) -> None:
+    async with helper.session_factory() as session:
+        await session.execute(delete(Car).where(Car.id == car_id))
+        await session.commit()
+
+
+async def sink(reminders: Sequence[EvaluatedReminder]) -> Sequence[EvaluatedReminder]:
+    return reminders
+
+
+async def full_sweep(helper: DatabaseHelper, _: object) -> None:
+    sweeper = ReminderSweeper(helper.read_session_factory, sink, only_changes=False)
+    await sweeper.run_once()
+
+
+async def change_sweep(helper: DatabaseHelper, _: object) -> None:
+    await ReminderSweeper(helper.session_factory, sink).run_once()
+
+
+async def date_sweep(helper: DatabaseHelper, _: object) -> None:
+    await ReminderSweeper(helper.session_factory, sink, check_mileage=False).run_once()
+
+
+def watched(watcher: ReminderWatcher, operation: Operation) -> Operation:
+    async def run(helper: DatabaseHelper, arg: object) -> None:
+        watcher.install()
+        try:
+            await operation(helper, arg)
+            await watcher.drain()
+        finally:
+            watcher.uninstall()
+
+    return run
+
+
+async def sample(helper: DatabaseHelper, column, size: int) -> list:
+    async with helper.read_session_factory() as session:
+        stmt = select(column).order_by(func.random()).limit(size)
+        return list(await session.scalars(stmt))
+
+
+async def sample_visits(helper: DatabaseHelper, car_ids: Sequence[UUID]) -> list[Visit]:
+    visits = []
+    async with helper.read_session_factory() as session:
+        for car_id in car_ids:
+            stmt = select(ServiceItem.name).where(ServiceItem.car_id == car_id)
+            visits.append((car_id, list(await session.scalars(stmt.limit(6)))))
+    return visits
+
+
+async def measure(
+    helper: DatabaseHelper, operation: Operation, args: Sequence
+) -> OperationResult:
+    samples = []
+    for arg in args:
+        started = time.perf_counter()
+        await operation(helper, arg)
+        samples.append(time.perf_counter() - started)
+    return OperationResult.from_samples(samples)
+
+
+async def run(path: Path, samples: int, sweeps: int) -> dict[str, OperationResult]:
+    helper = DatabaseHelper(
+        url=f"sqlite+aiosqlite:///{path}",
+        sqlite_profile=SqliteProfile(),
+        read_url=f"sqlite+aiosqlite:///file:{path}?mode=ro&uri=true",
+    )
+    rnd = random.Random(0)
+    cars = await sample(helper, Car.id, 2 * samples)
+    users = await sample(helper, User.tg_id, samples)
+    items = await sample(helper, ServiceItem.id, samples)
+    # Deleted cars must not be the ones the other operations touch
+    kept, deleted = cars[:samples], cars[samples:]
+    visits = await sample_visits(helper, kept)
+    watcher = ReminderWatcher(helper.session_factory, sink)
+
+    plan: list[tuple[str, Operation, Sequence]] = [
+        ("current_mileage", current_mileage, rnd.sample(kept, len(kept))),
+        ("due_list", due_list, users),
+        ("add_mileage", add_mileage, kept),
+        ("add_mileage_watched", watched(watcher, add_mileage), kept),
+        ("mark_service_done", mark_service_done, items),
+        ("service_visit", service_visit, visits),
+        ("service_visit_per_item", service_visit_per_item, visits),
+        ("delete_car", delete_car, deleted),
+        ("full_sweep", full_sweep, [None] * sweeps),
+        ("change_sweep", change_sweep, [None] * sweeps),
+        ("date_sweep", date_sweep, [None] * sweeps),
+    ]
+    results = {}
+    for name, operation, args in plan:
+        results[name] = result = await measure(helper, operation, args)
+        print(
+            f"{name:<24} runs={result.runs:<5} mean={result.mean_ms:>9.3f}ms "
+            f"p50={result.p50_ms:>9.3f}ms p95={result.p95_ms:>9.3f}ms "
+            f"p99={result.p99_ms:>9.3f}ms"
+        )
+    await helper.dispose()
+    return results
+
+
+def schema_head() -> str:
+    config = Config(str(APP_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(APP_DIR / "alembic"))
+    return ScriptDirectory.from_config(config).get_current_head()
+
+
+def git_commit() -> str | None:
+    result = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout.strip() or None
+
+
+def cached_dataset(spec: DatasetSpec) -> Path:
+    """Generate the dataset for `spec` unless it exists for the current schema."""
+    name = f"dataset-{spec.users}u-{spec.years}y-{spec.seed}s-{schema_head()}.db"
+    path = BENCH_DIR / "datasets" / name
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Generated aside, an interrupted run must not leave a partial dataset
+        partial = path.with_suffix(".partial")
+        remove_db(partial)
+        with timer(f"generate {name}"):
+            print(asdict(generate(partial, spec)))
+        partial.rename(path)
+    return path
+
+
+def compare(results: dict[str, OperationResult], baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text())["results"]
+    print(f"\nvs {baseline_path} (p50)")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["p50_ms"]
+        change = (result.p50_ms / before - 1) * 100 if before else 0.0
+        print(f"{name:<20} {before:>9.3f}ms -> {result.p50_ms:>9.3f}ms {change:+7.1f}%")
+
+
+def main() -> None:
+    defaults = DatasetSpec()
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--years", type=float, default=defaults.years)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--sweeps", type=int, default=3)
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    parser.add_argument("--baseline", type=Path, help="results of an earlier run")
+    args = parser.parse_args()
+
+    spec = DatasetSpec(users=args.users, years=args.years, seed=args.seed)
+    source = cached_dataset(spec)
+    path = scratch_db("e2e.db")
+    shutil.copyfile(source, path)
+
+    results = asyncio.run(run(path, args.samples, args.sweeps))
+
+    if args.json:
+        report = {
+            "commit": git_commit(),
+            "schema": schema_head(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "dataset": asdict(spec),
+            "samples": args.samples,
+            "results": {name: asdict(result) for name, result in results.items()},
+        }
+        args.json.write_text(json.dumps(report, indent=2) + "\n")
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Cold-start cost of importing application modules.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for
+every module and reports the cumulative import time and whether settings got
+constructed (env parsing, database file checks) as a side effect. `--json`
+prints machine-readable results; `--budget-ms` makes the script fail when a
+module is slower, so it can guard cold start in CI.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from common import APP_DIR
+
+MODULES = [
+    "core.config",
+    "core.models",
+    "core.db_helper",
+    "repositories",
+    "services",
+]
+
+# Prints whether importing the module read the settings
+PROBE = (
+    "import importlib, sys; importlib.import_module(sys.argv[1]); "
+    "config = sys.modules.get('core.config'); "
+    "print(bool(config and config.get_settings.cache_info().currsize))"
+)
+
+
+def measure(module: str) -> tuple[float, bool]:
+    """Cumulative import time in ms and whether settings were built."""
+    env = {**os.environ, "PYTHONPATH": str(APP_DIR)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE, module],
+        cwd=APP_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        # Top-level imports are not indented
+        if not name.startswith("  "):
+            total_us += int(cumulative)
+    return total_us / 1000, result.stdout.strip() == "True"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", nargs="+", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--budget-ms", type=float)
+    args = parser.parse_args()
+
+    results = []
+    for module in args.module:
+        runs = [measure(module) for _ in range(args.repeat)]
+        results.append(
+            {
+                "module": module,
+                "import_ms": round(statistics.median(ms for ms, _ in runs), 2),
+                "settings_built": runs[0][1],
+            }
+        )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for row in results:
+            print(
+                f"{row['module']:<16} {row['import_ms']:>8.1f} ms"
+                f"  settings built: {row['settings_built']}"
+            )
+
+    if args.budget_ms is not None:
+        over = [r["module"] for r in results if r["import_ms"] > args.budget_ms]
+        if over:
+            sys.exit(f"Over the {args.budget_ms} ms budget: {', '.join(over)}")
+
+
+if __name__ == "__main__":
+    main()
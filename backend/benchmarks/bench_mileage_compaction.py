@@ -0,0 +1,66 @@
+"""
+Hot-table size before and after mileage log compaction.
+
+Fills the database with a daily mileage history per car and runs
+`MileageCompactor` once, reporting `mileage_logs` rows, archived rows
+and the time the job took.
+"""
+
+import argparse
+import asyncio
+from datetime import timedelta
+
+from common import populate_reminders, scratch_db, timer
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from core.config import SQLITE_PROFILES, AppMode
+from core.db_helper import DatabaseHelper
+from core.models import Base, MileageLog, MileageLogArchive
+from services import MileageCompactor
+
+
+def count_rows(url: str) -> tuple[int, int]:
+    engine = create_engine(url)
+    with Session(engine) as session:
+        logs = session.scalar(select(func.count(MileageLog.id)))
+        archived = session.scalar(select(func.count(MileageLogArchive.id)))
+    engine.dispose()
+    return logs, archived
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cars", type=int, default=500)
+    parser.add_argument("--days", type=int, default=3 * 365)
+    parser.add_argument("--keep-days", type=int, default=180)
+    parser.add_argument("--bucket", choices=["week", "month"], default="month")
+    args = parser.parse_args()
+
+    path = scratch_db("mileage_compaction.db")
+    url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with timer("populate"), Session(engine) as session:
+        populate_reminders(session, args.cars, per_car=1, logs=args.days)
+    engine.dispose()
+    print(f"before: mileage_logs={count_rows(url)[0]}")
+
+    helper = DatabaseHelper(
+        f"sqlite+aiosqlite:///{path}", sqlite_profile=SQLITE_PROFILES[AppMode.prod]
+    )
+    compactor = MileageCompactor(
+        helper.session_factory,
+        keep=timedelta(days=args.keep_days),
+        bucket=args.bucket,
+    )
+    with timer("compaction"):
+        stats = await compactor.run_once()
+    await helper.dispose()
+
+    logs, archived = count_rows(url)
+    print(f"after:  mileage_logs={logs} archived={archived} cars={stats.cars}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""
+Bulk mileage import vs one ORM flush per row.
+
+Generates a daily mileage history for a set of cars (with a few decreasing
+readings mixed in) and imports it with `import_mileage`, then imports the
+same kind of history row by row through the ORM.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from common import populate_reminders, scratch_db
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from core.config import SQLITE_PROFILES, AppMode
+from core.db_helper import DatabaseHelper
+from core.models import Base, Car, MileageLog
+from services import MileageRow, import_mileage
+
+
+def history(car_ids: list, rows: int, seed: int, bad: float = 0.01) -> list[MileageRow]:
+    rnd = random.Random(seed)
+    per_car = max(rows // len(car_ids), 1)
+    started = datetime.now(timezone.utc) + timedelta(days=1)
+    result = []
+    for car_id in car_ids:
+        mileage = 500_000
+        for day in range(per_car):
+            mileage += rnd.randint(0, 80)
+            reading = mileage - 1_000 if rnd.random() < bad else mileage
+            result.append(MileageRow(car_id, started + timedelta(days=day), reading))
+    rnd.shuffle(result)
+    return result
+
+
+def prepare(name: str, cars: int) -> tuple[str, list]:
+    path = scratch_db(f"mileage_import_{name}.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        populate_reminders(session, cars, per_car=1, logs=0)
+        car_ids = list(session.scalars(select(Car.id)))
+    engine.dispose()
+    return f"sqlite+aiosqlite:///{path}", car_ids
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--cars", type=int, default=100)
+    parser.add_argument("--orm-rows", type=int, default=5_000)
+    args = parser.parse_args()
+    profile = SQLITE_PROFILES[AppMode.prod]
+
+    url, car_ids = prepare("bulk", args.cars)
+    rows = history(car_ids, args.rows, seed=1)
+    helper = DatabaseHelper(url, sqlite_profile=profile)
+    started = time.perf_counter()
+    async with helper.session_factory() as session:
+        report = await import_mileage(session, rows)
+        await session.commit()
+    elapsed = time.perf_counter() - started
+    await helper.dispose()
+    print(
+        f"import_mileage  rows={len(rows)} inserted={report.inserted} "
+        f"rejected={len(report.rejected)} elapsed={elapsed:.2f}s "
+        f"({len(rows) / elapsed:,.0f} rows/s)"
+    )
+
+    url, car_ids = prepare("orm", args.cars)
+    rows = sorted(
+        history(car_ids, args.orm_rows, seed=1, bad=0), key=lambda r: r.timestamp
+    )
+    helper = DatabaseHelper(url, sqlite_profile=profile)
+    started = time.perf_counter()
+    async with helper.session_factory() as session:
+        for row in rows:
+            session.add(
+                MileageLog(
+                    car_id=row.car_id, mileage=row.mileage, created_at=row.timestamp
+                )
+            )
+            await session.flush()
+        await session.commit()
+    elapsed = time.perf_counter() - started
+    await helper.dispose()
+    print(
+        f"orm per row     rows={len(rows)} elapsed={elapsed:.2f}s "
+        f"({len(rows) / elapsed:,.0f} rows/s)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
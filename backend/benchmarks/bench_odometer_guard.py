@@ -0,0 +1,71 @@
+"""
+Insert latency with the odometer guard as a car's history grows.
+
+Each round creates a car with N mileage logs and times single-row inserts
+(each one checked by trg_mileage_logs_before_insert) plus rejected ones.
+With the (car_id, mileage DESC) index the cost should not depend on N.
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from common import populate_reminders, scratch_db
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.models import Base, Car, MileageLog
+
+
+def measure(history: int, inserts: int) -> tuple[float, float]:
+    engine = create_engine(f"sqlite:///{scratch_db('odometer_guard.db')}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        populate_reminders(session, 1, per_car=1, logs=history)
+        car_id = session.scalar(select(Car.id))
+        mileage = session.scalar(select(func.max(MileageLog.mileage)))
+        now = datetime.now(timezone.utc)
+
+        started = time.perf_counter()
+        for step in range(1, inserts + 1):
+            session.execute(
+                insert(MileageLog).values(
+                    car_id=car_id,
+                    mileage=mileage + step,
+                    created_at=now + timedelta(minutes=step),
+                )
+            )
+        accepted = (time.perf_counter() - started) / inserts
+
+        started = time.perf_counter()
+        for _ in range(inserts):
+            try:
+                with session.begin_nested():
+                    session.execute(insert(MileageLog).values(car_id=car_id, mileage=0))
+            except IntegrityError:
+                pass
+        rejected = (time.perf_counter() - started) / inserts
+        session.commit()
+    engine.dispose()
+    return accepted, rejected
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--history", type=int, nargs="+", default=[100, 10_000, 200_000]
+    )
+    parser.add_argument("--inserts", type=int, default=2_000)
+    args = parser.parse_args()
+
+    for history in args.history:
+        accepted, rejected = measure(history, args.inserts)
+        print(
+            f"history={history:>8}  insert {accepted * 1e6:7.1f} us"
+            f"  rejected {rejected * 1e6:7.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
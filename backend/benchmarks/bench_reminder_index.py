@@ -0,0 +1,119 @@
+"""
+In-memory reminder index: load time, memory per reminder and query latency.
+
+Loads every active reminder into `ReminderIndex` and measures the Python heap
+it takes with `tracemalloc`. Then compares /due of random users from the
+index with `ReminderRepository.list_due`, and the reminders becoming due in
+the next hour with the same window read from SQLite.
+"""
+
+import argparse
+import asyncio
+import gc
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from common import populate_reminders, scratch_db, timer
+from sqlalchemy import create_engine, or_, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from core.models import Base, Reminder
+from repositories import ReminderRepository
+from services import ReminderIndex
+
+
+def report(label: str, samples: list[float]) -> None:
+    samples.sort()
+    p99 = samples[int(len(samples) * 0.99)]
+    print(
+        f"{label:<24} p50={statistics.median(samples) * 1000:.3f}ms "
+        f"p99={p99 * 1000:.3f}ms"
+    )
+
+
+async def run(url: str, users: int, queries: int) -> None:
+    engine = create_async_engine(url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    index = ReminderIndex(session_factory)
+    with timer("load index"):
+        await index.load()
+
+    # tracemalloc slows allocations down, measure a second load
+    measured = ReminderIndex(session_factory)
+    gc.collect()
+    tracemalloc.start()
+    await measured.load()
+    gc.collect()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del measured
+    print(
+        f"indexed={len(index)} memory={size / 2**20:.1f} MiB "
+        f"({size / max(len(index), 1):.0f} B/reminder), "
+        f"peak while loading={peak / 2**20:.1f} MiB"
+    )
+
+    rnd = random.Random(1)
+    tg_ids = [rnd.randint(1, users) for _ in range(queries)]
+    sql, memory = [], []
+    async with session_factory() as session:
+        repository = ReminderRepository(session)
+        for tg_id in tg_ids:
+            started = time.perf_counter()
+            expected = [r.id for r in await repository.list_due(tg_id)]
+            sql.append(time.perf_counter() - started)
+            session.expunge_all()
+
+            started = time.perf_counter()
+            due = [r.id for r in index.due_for_user(tg_id)]
+            memory.append(time.perf_counter() - started)
+            if due != expected:
+                raise SystemExit(f"index and repository disagree for user {tg_id}")
+    report("/due sql", sql)
+    report("/due index", memory)
+
+    now = datetime.now(timezone.utc)
+    window = timedelta(hours=1)
+    stmt = select(Reminder.id).where(
+        Reminder.is_active.is_not(False),
+        ~Reminder.is_due,
+        or_(
+            Reminder.next_due_at.between(now, now + window),
+            Reminder.mileage_due_at.between(now, now + window),
+        ),
+    )
+    async with session_factory() as session:
+        with timer("due within 1h, sql"):
+            upcoming = (await session.scalars(stmt)).all()
+    with timer("due within 1h, index"):
+        indexed = index.due_within(window, now)
+    print(f"upcoming: sql={len(upcoming)} index={len(indexed)}")
+    if set(upcoming) != {r.id for r in indexed}:
+        raise SystemExit("index and sql disagree on upcoming reminders")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reminders", type=int, default=100_000)
+    parser.add_argument("--per-car", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=1_000)
+    args = parser.parse_args()
+
+    path = scratch_db("reminder_index.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session, timer("populate"):
+        populate_reminders(session, args.reminders, args.per_car, logs=5)
+
+    # populate_reminders gives every user two cars
+    users = max(args.reminders // args.per_car // 2, 1)
+    asyncio.run(run(f"sqlite+aiosqlite:///{path}", users, args.queries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Background reminder sweep throughput.
+
+Runs `ReminderSweeper` over all active reminders with different chunk sizes
+and prints throughput and chunk latency, to size the sweep interval. Then
+two sweeps that only report state changes: the first one reports everything
+that is due, the second one has nothing left to report. The last one leaves
+mileage to `ReminderWatcher` and only looks at trigger dates.
+"""
+
+import argparse
+import asyncio
+from typing import Sequence
+
+from common import populate_reminders, scratch_db, timer
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from core.models import Base
+from services import EvaluatedReminder, ReminderSweeper, SweepStats
+
+
+async def sweep(url: str, chunk_sizes: list[int]) -> None:
+    engine = create_async_engine(url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def sink(
+        reminders: Sequence[EvaluatedReminder],
+    ) -> Sequence[EvaluatedReminder]:
+        return reminders
+
+    def report(label: str, stats: SweepStats) -> None:
+        print(
+            f"{label:<22} reminders={stats.reminders} due={stats.due} "
+            f"elapsed={stats.elapsed:.3f}s throughput={stats.throughput:,.0f}/s "
+            f"chunk avg={stats.chunk_latency_avg * 1000:.1f}ms "
+            f"max={stats.chunk_latency_max * 1000:.1f}ms"
+        )
+
+    for chunk_size in chunk_sizes:
+        sweeper = ReminderSweeper(
+            session_factory, sink, chunk_size=chunk_size, only_changes=False
+        )
+        report(f"all, chunk={chunk_size}", await sweeper.run_once())
+
+    # The first pass reports every due reminder, later ones only transitions
+    sweeper = ReminderSweeper(session_factory, sink)
+    for sweep in ("first", "second"):
+        report(f"changes, {sweep} pass", await sweeper.run_once())
+    sweeper = ReminderSweeper(session_factory, sink, check_mileage=False)
+    report("changes, dates only", await sweeper.run_once())
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reminders", type=int, default=100_000)
+    parser.add_argument("--chunk-size", type=int, nargs="+", default=[500, 2000, 5000])
+    args = parser.parse_args()
+
+    path = scratch_db("reminder_sweep.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session, timer("populate"):
+        populate_reminders(session, args.reminders, logs=5)
+
+    asyncio.run(sweep(f"sqlite+aiosqlite:///{path}", args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
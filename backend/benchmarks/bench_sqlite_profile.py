@@ -0,0 +1,119 @@
+"""
+Mixed read/write throughput with and without the SQLite profile.
+
+Concurrent workers share one `DatabaseHelper`, every worker mixes reads
+(car mileage and its due reminders) with mileage log inserts, the way
+concurrent Telegram updates do. Reports operations per second and
+"database is locked" errors for the default SQLite settings and each preset.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+
+from common import populate_reminders, scratch_db
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from core.config import SQLITE_PROFILES, AppMode, SqliteProfile
+from core.db_helper import DatabaseHelper
+from core.models import Base, Car, MileageLog, Reminder
+
+
+@dataclass
+class Counters:
+    reads: int = 0
+    writes: int = 0
+    locked: int = 0
+
+
+async def worker(
+    helper: DatabaseHelper,
+    car_ids: list,
+    write_ratio: float,
+    deadline: float,
+    counters: Counters,
+    seed: int,
+) -> None:
+    rnd = random.Random(seed)
+    while time.perf_counter() < deadline:
+        car_id = rnd.choice(car_ids)
+        try:
+            async with helper.session_factory() as session:
+                if rnd.random() < write_ratio:
+                    mileage = (
+                        select(Car.mileage).where(Car.id == car_id).scalar_subquery()
+                    )
+                    await session.execute(
+                        insert(MileageLog).values(
+                            car_id=car_id,
+                            mileage=mileage + rnd.randint(1, 100),
+                        )
+                    )
+                    await session.commit()
+                    counters.writes += 1
+                else:
+                    await session.execute(select(Car.mileage).where(Car.id == car_id))
+                    await session.execute(
+                        select(func.count())
+                        .select_from(Reminder)
+                        .where(Reminder.car_id == car_id, Reminder.is_due)
+                    )
+                    counters.reads += 1
+        except OperationalError as exc:
+            if "database is locked" not in str(exc):
+                raise
+            counters.locked += 1
+
+
+async def run(
+    name: str,
+    profile: SqliteProfile | None,
+    args: argparse.Namespace,
+) -> None:
+    path = scratch_db(f"sqlite_profile_{name}.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        populate_reminders(session, args.reminders, logs=5)
+        car_ids = list(session.scalars(select(Car.id)))
+    engine.dispose()
+
+    helper = DatabaseHelper(f"sqlite+aiosqlite:///{path}", sqlite_profile=profile)
+    counters = Counters()
+    deadline = time.perf_counter() + args.seconds
+    await asyncio.gather(
+        *(
+            worker(helper, car_ids, args.write_ratio, deadline, counters, seed)
+            for seed in range(args.workers)
+        )
+    )
+    await helper.dispose()
+
+    total = counters.reads + counters.writes
+    print(
+        f"{name:<8} ops/s={total / args.seconds:>8,.0f} "
+        f"reads/s={counters.reads / args.seconds:>8,.0f} "
+        f"writes/s={counters.writes / args.seconds:>7,.0f} "
+        f"locked={counters.locked}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reminders", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    await run("default", None, args)
+    for mode in AppMode:
+        await run(mode.name, SQLITE_PROFILES[mode], args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
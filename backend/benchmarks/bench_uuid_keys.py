@@ -0,0 +1,106 @@
+"""
+Insert throughput and file size of mileage_logs with different primary keys.
+
+Fills a table shaped like `mileage_logs` (same indexes) with random UUIDv4 or
+time-ordered UUIDv7 keys, stored as 32-character hex text (SQLAlchemy's
+`Uuid` on SQLite) or as 16-byte BLOBs (`BinaryUUID`).
+"""
+
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from common import scratch_db
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    Table,
+    Uuid,
+    create_engine,
+    insert,
+)
+
+from core.models.types import BinaryUUID
+from utils import uuid7
+
+VARIANTS = {
+    "uuid4 hex": (uuid4, Uuid),
+    "uuid4 blob": (uuid4, BinaryUUID),
+    "uuid7 hex": (uuid7, Uuid),
+    "uuid7 blob": (uuid7, BinaryUUID),
+}
+
+
+def build_table(key_type) -> tuple[MetaData, Table]:
+    metadata = MetaData()
+    Table("cars", metadata, Column("id", key_type(), primary_key=True))
+    logs = Table(
+        "mileage_logs",
+        metadata,
+        Column("id", key_type(), primary_key=True),
+        Column("car_id", key_type(), ForeignKey("cars.id"), nullable=False),
+        Column("mileage", Integer, nullable=False),
+        Column("created_at", DateTime(timezone=True), nullable=False),
+    )
+    Index("ix_car_created_at", logs.c.car_id, logs.c.created_at)
+    Index("ix_car_mileage", logs.c.car_id, logs.c.mileage.desc())
+    return metadata, logs
+
+
+def measure(name: str, rows: int, cars: int, batch: int) -> tuple[float, int]:
+    generate, key_type = VARIANTS[name]
+    path = scratch_db(f"uuid_keys_{name.replace(' ', '_')}.db")
+    engine = create_engine(f"sqlite:///{path}")
+    metadata, logs = build_table(key_type)
+    metadata.create_all(engine)
+
+    rnd = random.Random(42)
+    car_ids = [generate() for _ in range(cars)]
+    with engine.begin() as conn:
+        conn.execute(insert(metadata.tables["cars"]), [{"id": i} for i in car_ids])
+
+    started_at = datetime.now(timezone.utc)
+    elapsed = 0.0
+    for start in range(0, rows, batch):
+        values = [
+            {
+                "id": generate(),
+                "car_id": rnd.choice(car_ids),
+                "mileage": step,
+                "created_at": started_at + timedelta(seconds=step),
+            }
+            for step in range(start, min(start + batch, rows))
+        ]
+        began = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(insert(logs), values)
+        elapsed += time.perf_counter() - began
+    engine.dispose()
+    return rows / elapsed, os.path.getsize(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--cars", type=int, default=1_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--variant", choices=VARIANTS, nargs="+", default=VARIANTS)
+    args = parser.parse_args()
+
+    for name in args.variant:
+        throughput, size = measure(name, args.rows, args.cars, args.batch)
+        print(
+            f"{name:<11} rows={args.rows} insert={throughput:>9,.0f} rows/s"
+            f"  file={size / 2**20:7.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
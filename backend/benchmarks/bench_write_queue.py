@@ -0,0 +1,95 @@
+"""
+Burst write throughput: concurrent sessions vs the single-writer queue.
+
+Simulates a burst of `/add_mileage` updates, every update inserts one
+mileage log. Independent sessions each take the SQLite write lock and
+fsync on their own; the write queue groups queued inserts into shared
+transactions on its dedicated connection.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from common import populate_reminders, scratch_db
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from core.config import SQLITE_PROFILES, AppMode
+from core.db_helper import DatabaseHelper
+from core.models import Base, Car, MileageLog
+
+
+def add_mileage(car_id, delta: int):
+    async def job(session: AsyncSession) -> None:
+        mileage = select(Car.mileage).where(Car.id == car_id).scalar_subquery()
+        await session.execute(
+            insert(MileageLog).values(car_id=car_id, mileage=mileage + delta)
+        )
+
+    return job
+
+
+async def run(name: str, args: argparse.Namespace) -> None:
+    path = scratch_db(f"write_queue_{name}.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        populate_reminders(session, 1_000, logs=1)
+        car_ids = list(session.scalars(select(Car.id)))
+    engine.dispose()
+
+    profile = SQLITE_PROFILES[AppMode.prod].model_copy(
+        update={"busy_timeout": args.busy_timeout}
+    )
+    helper = DatabaseHelper(
+        f"sqlite+aiosqlite:///{path}",
+        sqlite_profile=profile,
+        read_url=f"sqlite+aiosqlite:///file:{path}?mode=ro&uri=true",
+    )
+    rnd = random.Random(0)
+    jobs = [
+        add_mileage(rnd.choice(car_ids), rnd.randint(1, 50)) for _ in range(args.writes)
+    ]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    errors = 0
+
+    async def write(job) -> None:
+        nonlocal errors
+        async with semaphore:
+            try:
+                if name == "queue":
+                    await helper.writer.submit(job)
+                else:
+                    async with helper.session_factory() as session:
+                        await job(session)
+                        await session.commit()
+            except OperationalError:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(write(job) for job in jobs))
+    elapsed = time.perf_counter() - started
+    await helper.dispose()
+    print(
+        f"{name:<9} writes/s={args.writes / elapsed:>8,.0f} "
+        f"elapsed={elapsed:.2f}s lock errors={errors}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writes", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--busy-timeout", type=int, default=1_000)
+    args = parser.parse_args()
+
+    await run("sessions", args)
+    await run("queue", args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks are plain scripts, run them from the `backend` directory:
+
+    python benchmarks/bench_due_reminders.py --help
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+BENCH_DIR = Path(tempfile.gettempdir()) / "car-minder-bench"
+
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+# Settings are required to import the models, point them to a scratch file
+os.environ.setdefault(
+    "APP__DB__FILE_PATH",
+    str(BENCH_DIR / "settings.db"),
+)
+
+
+@contextmanager
+def timer(label: str) -> Iterator[dict[str, float]]:
+    """Measure the wall time of the block and print it."""
+    result: dict[str, float] = {}
+    started = time.perf_counter()
+    yield result
+    result["seconds"] = time.perf_counter() - started
+    print(f"{label:<40} {result['seconds']:>10.3f} s")
+
+
+def scratch_db(name: str) -> Path:
+    """Return a fresh database file path in the temp directory."""
+    path = BENCH_DIR / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    remove_db(path)
+    return path
+
+
+def remove_db(path: Path) -> None:
+    """Delete a database file together with its journal files."""
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+
+
+def populate_reminders(
+    session: Session,
+    reminders: int,
+    per_car: int = 10,
+    logs: int = 30,
+) -> None:
+    """Fill the database with cars, mileage logs and one reminder per item."""
+    from core.models import Car, MileageLog, Reminder, ServiceItem, User
+    from utils import uuid7
+
+    now = datetime.now(timezone.utc)
+    rnd = random.Random(42)
+    cars_count = max(reminders // per_car, 1)
+
+    users, cars, items, rows, mileage_logs = [], [], [], [], []
+    for car_idx in range(cars_count):
+        tg_id = car_idx // 2 + 1
+        if car_idx % 2 == 0:
+            users.append({"tg_id": tg_id, "name": f"user {tg_id}"})
+        car_id = uuid7()
+        first_mileage = rnd.randint(0, 200_000)
+        cars.append(
+            {
+                "id": car_id,
+                "user_tg_id": tg_id,
+                "brand": "Lada",
+                "model": "Vesta",
+                "year": 2020,
+                "first_mileage": first_mileage,
+            }
+        )
+        mileage = first_mileage
+        for day in range(logs):
+            mileage += rnd.randint(0, 100)
+            mileage_logs.append(
+                {
+                    "id": uuid7(),
+                    "car_id": car_id,
+                    "mileage": mileage,
+                    "created_at": now - timedelta(days=logs - day),
+                }
+            )
+        for item_idx in range(per_car):
+            item_id = uuid7()
+            # Half a day off whole days: no reminder triggers within the
+            # second of `now`, evaluations at slightly different moments agree
+            days_ago = rnd.randint(0, 400) + 0.5
+            items.append(
+                {
+                    "id": item_id,
+                    "car_id": car_id,
+                    "name": f"item {item_idx}",
+                    "last_service_date": now - timedelta(days=days_ago),
+                    "last_service_mileage": max(mileage - rnd.randint(0, 15_000), 0),
+                }
+            )
+            rows.append(
+                {
+                    "id": uuid7(),
+                    "car_id": car_id,
+                    "service_item_id": item_id,
+                    "interval_mileage": rnd.choice([None, 7_000, 10_000, 15_000]),
+                    "interval_days": rnd.choice([180, 365, None]) or 365,
+                    "warning_mileage_before": rnd.choice([None, 0, 500, 1_000]),
+                    "warning_days_before": rnd.choice([None, 0, 14, 30]),
+                }
+            )
+
+    for model, values in (
+        (User, users),
+        (Car, cars),
+        (MileageLog, mileage_logs),
+        (ServiceItem, items),
+        (Reminder, rows),
+    ):
+        if values:
+            session.execute(insert(model), values)
+    session.commit()
@@ -0,0 +1,248 @@
+"""
+Synthetic dataset for end-to-end benchmarks.
+
+Builds the schema by running the Alembic migrations, so the database has the
+same triggers and indexes as production, and fills it with a population:
+users with 1-3 cars each, years of mileage logs per car and 5-15 service
+items with a reminder each. Generation is seeded, the same arguments always
+give the same data.
+
+    python benchmarks/dataset.py --users 100000 --out /tmp/car-minder.db
+"""
+
+import argparse
+import math
+import random
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from common import APP_DIR, remove_db, scratch_db, timer
+from sqlalchemy import Engine, create_engine, event, insert
+from sqlalchemy.orm import Session
+
+from core.models import Car, MileageLog, Reminder, ServiceItem, User
+from utils import uuid7
+
+BRANDS = {
+    "Lada": ["Vesta", "Granta", "Niva"],
+    "Kia": ["Rio", "Ceed", "Sportage"],
+    "Hyundai": ["Solaris", "Creta", "Tucson"],
+    "Toyota": ["Camry", "Corolla", "RAV4"],
+    "Volkswagen": ["Polo", "Tiguan", "Passat"],
+    "Skoda": ["Octavia", "Rapid", "Kodiaq"],
+}
+
+# Name, mileage interval (km), time interval (days)
+SERVICE_ITEMS = [
+    ("Engine oil", 10_000, 365),
+    ("Oil filter", 10_000, 365),
+    ("Air filter", 20_000, 730),
+    ("Cabin filter", 15_000, 365),
+    ("Fuel filter", 40_000, 1460),
+    ("Spark plugs", 30_000, 1095),
+    ("Brake fluid", None, 730),
+    ("Brake pads", 40_000, None),
+    ("Coolant", 60_000, 1825),
+    ("Transmission oil", 60_000, 1825),
+    ("Timing belt", 90_000, 1825),
+    ("Accessory belt", 60_000, 1460),
+    ("Tire rotation", 10_000, 180),
+    ("Wiper blades", None, 365),
+    ("Battery", None, 1460),
+]
+
+
+@dataclass(frozen=True, slots=True)
+class DatasetSpec:
+    users: int = 10_000
+    cars_per_user: tuple[int, int] = (1, 3)
+    # Cars were added to the bot at a uniform point within this many years
+    years: float = 3.0
+    logs_per_month: float = 2.0
+    items_per_car: tuple[int, int] = (5, 15)
+    seed: int = 42
+
+
+@dataclass(slots=True)
+class DatasetStats:
+    users: int = 0
+    cars: int = 0
+    mileage_logs: int = 0
+    service_items: int = 0
+    reminders: int = 0
+
+
+def migrate(path: Path) -> None:
+    """Create the schema in `path` with the Alembic migrations."""
+    config = Config(str(APP_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(APP_DIR / "alembic"))
+    config.attributes["url"] = f"sqlite+aiosqlite:///{path}"
+    command.upgrade(config, "head")
+
+
+def bulk_load_engine(path: Path) -> Engine:
+    """Engine tuned for a one-off load, the data is thrown away on a crash."""
+    engine = create_engine(f"sqlite:///{path}")
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute("PRAGMA synchronous = OFF")
+        cursor.execute("PRAGMA cache_size = -256000")
+        cursor.close()
+
+    return engine
+
+
+class Generator:
+    def __init__(self, spec: DatasetSpec, now: datetime) -> None:
+        self.spec = spec
+        self.now = now
+        self.rnd = random.Random(spec.seed)
+        self.stats = DatasetStats()
+
+    def user_batch(self, tg_ids: range) -> dict[type, list[dict]]:
+        rows: dict[type, list[dict]] = {
+            User: [],
+            Car: [],
+            MileageLog: [],
+            ServiceItem: [],
+            Reminder: [],
+        }
+        for tg_id in tg_ids:
+            rows[User].append(
+                {
+                    "tg_id": tg_id,
+                    "name": f"user {tg_id}",
+                    "username": f"user_{tg_id}" if self.rnd.random() < 0.7 else None,
+                    "is_premium": self.rnd.random() < 0.05,
+                }
+            )
+            for _ in range(self.rnd.randint(*self.spec.cars_per_user)):
+                self.car(tg_id, rows)
+        return rows
+
+    def car(self, tg_id: int, rows: dict[type, list[dict]]) -> None:
+        rnd = self.rnd
+        car_id = uuid7()
+        added_at = self.now - timedelta(days=rnd.uniform(1, self.spec.years * 365))
+        first_mileage = rnd.randint(0, 250_000)
+        brand = rnd.choice(list(BRANDS))
+        rows[Car].append(
+            {
+                "id": car_id,
+                "user_tg_id": tg_id,
+                "brand": brand,
+                "model": rnd.choice(BRANDS[brand]),
+                "year": rnd.randint(1995, self.now.year),
+                "first_mileage": first_mileage,
+                "created_at": added_at,
+            }
+        )
+
+        # Some drive to work every day, some once a month
+        km_per_day = rnd.lognormvariate(math.log(35), 0.6)
+        mean_gap = 30 / self.spec.logs_per_month
+        at, mileage = added_at, first_mileage
+        while True:
+            gap = rnd.expovariate(1 / mean_gap)
+            at += timedelta(days=gap)
+            if at >= self.now:
+                break
+            mileage += int(km_per_day * gap * rnd.uniform(0.7, 1.3))
+            rows[MileageLog].append(
+                {"id": uuid7(), "car_id": car_id, "mileage": mileage, "created_at": at}
+            )
+            self.stats.mileage_logs += 1
+
+        items = rnd.sample(SERVICE_ITEMS, rnd.randint(*self.spec.items_per_car))
+        for name, interval_mileage, interval_days in items:
+            item_id = uuid7()
+            days_ago = rnd.uniform(0, 1.2 * (interval_days or 730))
+            rows[ServiceItem].append(
+                {
+                    "id": item_id,
+                    "car_id": car_id,
+                    "name": name,
+                    "last_service_date": self.now - timedelta(days=days_ago),
+                    "last_service_mileage": max(
+                        mileage - int(km_per_day * days_ago), 0
+                    ),
+                }
+            )
+            rows[Reminder].append(
+                {
+                    "id": uuid7(),
+                    "car_id": car_id,
+                    "service_item_id": item_id,
+                    "is_active": rnd.random() < 0.95,
+                    "interval_mileage": interval_mileage,
+                    "interval_days": interval_days,
+                    "warning_mileage_before": rnd.choice([None, 0, 500, 1_000]),
+                    "warning_days_before": rnd.choice([None, 0, 14, 30]),
+                }
+            )
+        self.stats.cars += 1
+        self.stats.service_items += len(items)
+        self.stats.reminders += len(items)
+
+
+def generate(
+    path: Path,
+    spec: DatasetSpec,
+    batch_users: int = 1_000,
+    now: datetime | None = None,
+) -> DatasetStats:
+    """Migrate an empty database at `path` and fill it according to `spec`."""
+    migrate(path)
+    generator = Generator(spec, now or datetime.now(timezone.utc))
+    generator.stats.users = spec.users
+    engine = bulk_load_engine(path)
+    first_tg_id = 1_000_000
+    with Session(engine) as session:
+        for start in range(0, spec.users, batch_users):
+            stop = min(start + batch_users, spec.users)
+            batch = generator.user_batch(range(first_tg_id + start, first_tg_id + stop))
+            # Parents first, triggers on logs and reminders read them
+            for model, values in batch.items():
+                if values:
+                    session.execute(insert(model.__table__), values)
+            session.commit()
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    engine.dispose()
+    return generator.stats
+
+
+def main() -> None:
+    defaults = DatasetSpec()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--years", type=float, default=defaults.years)
+    parser.add_argument("--logs-per-month", type=float, default=defaults.logs_per_month)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args()
+
+    spec = DatasetSpec(
+        users=args.users,
+        years=args.years,
+        logs_per_month=args.logs_per_month,
+        seed=args.seed,
+    )
+    if args.out:
+        remove_db(args.out)
+    path = args.out or scratch_db("dataset.db")
+    with timer("generate"):
+        stats = generate(path, spec)
+    print(asdict(stats))
+    print(f"{path}: {path.stat().st_size / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
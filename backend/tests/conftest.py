@@ -0,0 +1,124 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterator
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import (
+    Connection,
+    Engine,
+    Executable,
+    create_engine,
+    event,
+)
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from core.config import get_settings
+from core.models import Base
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+
+# Settings are read on the first get_settings() call, which must find a
+# scratch database and not the developer's .env
+os.environ["APP__DB__FILE_PATH"] = str(
+    Path(tempfile.mkdtemp(prefix="car-minder-tests-")) / "test.db"
+)
+
+
+@pytest.fixture(scope="session")
+def metadata_engine() -> Iterator[Engine]:
+    """Schema built from the models."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def migrated_engine() -> Iterator[Engine]:
+    """Schema built by running every Alembic migration."""
+    command.upgrade(Config(str(APP_DIR / "alembic.ini")), "head")
+    engine = create_engine(f"sqlite:///{get_settings().db.file_path}")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(params=["metadata", "migrated"], scope="session")
+def schema_engine(request: pytest.FixtureRequest) -> Engine:
+    """Run the test against both ways of building the schema."""
+    return request.getfixturevalue(f"{request.param}_engine")
+
+
+def explain(connection: Connection, stmt: Executable) -> list[str]:
+    """Return the `EXPLAIN QUERY PLAN` lines SQLite chooses for `stmt`."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", capture)
+    try:
+        connection.execute(stmt).all()
+    finally:
+        event.remove(connection, "before_cursor_execute", capture)
+    statement, parameters = captured[-1]
+    plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    return [row.detail for row in plan]
+
+
+@pytest.fixture
+def query_plan(schema_engine: Engine) -> Iterator[Callable[[Executable], list[str]]]:
+    with schema_engine.connect() as connection:
+        yield lambda stmt: explain(connection, stmt)
+
+
+@pytest.fixture
+async def session_factory(tmp_path: Path) -> AsyncIterator[async_sessionmaker]:
+    """Sessions on a fresh database, configured like `DatabaseHelper`."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+async def session(session_factory: async_sessionmaker) -> AsyncIterator[AsyncSession]:
+    async with session_factory() as session:
+        yield session
+
+
+class QueryCounter:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@pytest.fixture
+def count_queries(session: AsyncSession) -> Callable:
+    """Count the statements `session` sends to the database inside a block."""
+    engine = session.bind.sync_engine
+
+    @contextmanager
+    def counting() -> Iterator[QueryCounter]:
+        counter = QueryCounter()
+        event.listen(engine, "before_cursor_execute", counter)
+        try:
+            yield counter
+        finally:
+            event.remove(engine, "before_cursor_execute", counter)
+
+    return counting
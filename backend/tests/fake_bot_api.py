@@ -0,0 +1,71 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class SentMessage:
+    chat_id: int
+    text: str
+    at: float = field(default_factory=time.monotonic)
+
+
+class FakeBotApi:
+    """
+    Stand-in for the Telegram Bot API on a local port.
+
+    Answers `sendMessage` like Telegram does and records the messages.
+    Responses queued in `failures` are returned first, one per request.
+    """
+
+    def __init__(self) -> None:
+        self.messages: list[SentMessage] = []
+        self.failures: list[tuple[int, dict]] = []
+        self.requests = 0
+        self.url = ""
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        self.url = f"http://{host}:{port}"
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _respond(self, path: str, body: dict) -> tuple[int, dict]:
+        self.requests += 1
+        if self.failures:
+            return self.failures.pop(0)
+        if not path.endswith("/sendMessage"):
+            return 404, {"ok": False, "error_code": 404, "description": "Not Found"}
+        self.messages.append(SentMessage(body["chat_id"], body["text"]))
+        return 200, {"ok": True, "result": {"chat": {"id": body["chat_id"]}}}
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            # Keep-alive: serve requests until the client closes the connection
+            while request_line := await reader.readline():
+                _, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, value = line.decode().split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                raw = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = self._respond(path, json.loads(raw or b"{}"))
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} X\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,135 @@
+import io
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from core.models import (
+    Base,
+    Car,
+    MileageLog,
+    MileageLogArchive,
+    Reminder,
+    ReminderState,
+    ServiceItem,
+    User,
+)
+from services import export_csv, export_ndjson, import_csv, import_ndjson
+from services.backup import MODELS, columns
+
+NOW = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+async def history(session) -> None:
+    for tg_id in (1, 2):
+        car = Car(
+            user=User(tg_id=tg_id, name="Иван", is_premium=tg_id == 1),
+            brand="Lada",
+            model="Vesta",
+            year=2020,
+            first_mileage=1_000,
+            created_at=NOW - timedelta(days=400),
+        )
+        session.add(car)
+        await session.flush()
+        session.add(
+            MileageLogArchive(
+                id=car.id,
+                car_id=car.id,
+                mileage=1_100,
+                created_at=NOW - timedelta(days=300),
+            )
+        )
+        for day in range(10):
+            session.add(
+                MileageLog(
+                    car=car,
+                    mileage=2_000 + day * 100,
+                    created_at=NOW - timedelta(days=100 - day),
+                )
+            )
+        item = ServiceItem(
+            car=car,
+            name="Engine oil",
+            last_service_date=NOW - timedelta(days=90),
+            last_service_mileage=2_000,
+        )
+        session.add(
+            Reminder(
+                car=car,
+                service_item=item,
+                interval_mileage=5_000,
+                interval_days=365,
+                comment="Shell 5W-30",
+                notified_state=ReminderState.due_soon,
+            )
+        )
+    await session.commit()
+
+
+async def snapshot(session_factory, user_tg_id: int) -> dict[str, list[tuple]]:
+    """Every column, the derived ones too, of the user's rows."""
+    tables = {}
+    async with session_factory() as session:
+        for model in MODELS:
+            if model is User:
+                stmt = select(model).where(User.tg_id == user_tg_id)
+            elif model is Car:
+                stmt = select(model).where(Car.user_tg_id == user_tg_id)
+            else:
+                stmt = select(model).join(Car).where(Car.user_tg_id == user_tg_id)
+            objects = (await session.scalars(stmt)).all()
+            keys = [column.key for column in model.__table__.columns]
+            tables[model.__tablename__] = sorted(
+                tuple(getattr(obj, key) for key in keys) for obj in objects
+            )
+    return tables
+
+
+@pytest.fixture
+async def empty_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'restore.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def test_ndjson_round_trip(session, session_factory, history, empty_factory):
+    out = io.StringIO()
+    exported = await export_ndjson(session, out, user_tg_id=1, batch_size=3)
+    assert exported.rows == {
+        "users": 1,
+        "cars": 1,
+        "mileage_log_archives": 1,
+        "mileage_logs": 10,
+        "service_items": 1,
+        "reminders": 1,
+    }
+    assert "Иван" in out.getvalue()
+
+    out.seek(0)
+    imported = await import_ndjson(empty_factory, out, batch_size=4)
+    assert imported.rows == exported.rows
+    assert await snapshot(empty_factory, 1) == await snapshot(session_factory, 1)
+    # Only the exported user
+    assert not any((await snapshot(empty_factory, 2)).values())
+
+
+async def test_csv_round_trip(
+    session, session_factory, history, empty_factory, tmp_path
+):
+    exported = await export_csv(session, tmp_path / "csv")
+    assert exported.total == 2 * 15
+    for model in MODELS:
+        header = (tmp_path / "csv" / f"{model.__tablename__}.csv").open().readline()
+        assert header.strip().split(",") == [column.key for column in columns(model)]
+
+    imported = await import_csv(empty_factory, tmp_path / "csv", batch_size=4)
+    assert imported.rows == exported.rows
+    for tg_id in (1, 2):
+        assert await snapshot(empty_factory, tg_id) == await snapshot(
+            session_factory, tg_id
+        )
@@ -0,0 +1,134 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert
+
+from core.cache import UserCache, get_user_cache
+from core.models import Car, MileageLog, User
+from repositories import CarRepository, MileageLogRepository, ReminderRepository
+from services import MileageRow, import_mileage
+
+user_cache = get_user_cache()
+
+
+async def test_lru_eviction_and_ttl(monkeypatch):
+    cache = UserCache(max_size=2, ttl=10)
+    cache.set(1, "cars", "a")
+    cache.set(2, "cars", "b")
+    assert cache.get(1, "cars") == "a"
+
+    cache.set(3, "cars", "c")  # user 2 is the least recently used
+    assert cache.get(2, "cars") is None
+    assert cache.stats.evictions == 1
+
+    clock = time.monotonic() + 11
+    monkeypatch.setattr("core.cache.time.monotonic", lambda: clock)
+    assert cache.get(1, "cars") is None
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.expirations) == (1, 2, 1)
+
+
+async def test_load_racing_an_invalidation_is_not_stored():
+    cache = UserCache()
+
+    async def loader():
+        cache.invalidate(1)
+        return "stale"
+
+    assert await cache.get_or_load(1, "cars", loader) == "stale"
+    assert len(cache) == 0
+
+
+async def test_invalidating_another_user_keeps_the_load():
+    cache = UserCache()
+
+    async def loader():
+        cache.invalidate(2)
+        return "fresh"
+
+    assert await cache.get_or_load(1, "cars", loader) == "fresh"
+    assert cache.get(1, "cars") == "fresh"
+    # Nothing is kept about users once their loads are done
+    assert not cache._loading and not cache._generations
+
+
+@pytest.fixture
+async def cars(session):
+    user_cache.clear()
+    session.add_all([User(tg_id=1, name="one"), User(tg_id=2, name="two")])
+    cars = [
+        Car(user_tg_id=tg_id, brand="Lada", model="Vesta", year=2020, first_mileage=0)
+        for tg_id in (1, 2)
+    ]
+    session.add_all(cars)
+    await session.commit()
+    for tg_id in (1, 2):
+        await CarRepository(session, user_cache).list_for_user(tg_id)
+    yield cars
+    user_cache.clear()
+
+
+async def test_commit_invalidates_only_the_owner(session, cars):
+    session.add(MileageLog(car_id=cars[0].id, mileage=100))
+    await session.commit()
+
+    assert user_cache.get(1, "cars") is None
+    assert user_cache.get(2, "cars") is not None
+
+
+async def test_rollback_keeps_entries(session, cars):
+    session.add(MileageLog(car_id=cars[0].id, mileage=100))
+    await session.flush()
+    await session.rollback()
+
+    assert user_cache.get(1, "cars") is not None
+
+
+async def test_bulk_statements_invalidate_the_owner(session, cars):
+    now = datetime.now(timezone.utc)
+    await import_mileage(session, [MileageRow(cars[1].id, now, 100)])
+    await session.commit()
+    assert user_cache.get(2, "cars") is None
+    assert user_cache.get(1, "cars") is not None
+
+    await session.execute(
+        insert(MileageLog).values(
+            car_id=cars[0].id, mileage=200, created_at=now + timedelta(days=1)
+        )
+    )
+    await session.commit()
+    assert user_cache.get(1, "cars") is None
+
+
+async def test_reminders_and_mileage_are_cached_until_a_write(session, cars):
+    reminders = ReminderRepository(session, user_cache)
+    mileage = MileageLogRepository(session, user_cache)
+    assert await reminders.list_for_user(1) == []
+    assert await mileage.latest_for_car(cars[0].id, user_tg_id=1) == []
+    assert user_cache.get(1, "reminders") is not None
+    assert user_cache.get(1, f"mileage:{cars[0].id}:5") is not None
+
+    session.add(MileageLog(car_id=cars[0].id, mileage=100))
+    await session.commit()
+    assert user_cache.get(1, "reminders") is None
+    assert [log.mileage for log in await mileage.latest_for_car(cars[0].id, 1)] == [100]
+
+
+async def test_cached_read_skips_the_database(session, cars, count_queries):
+    with count_queries() as counter:
+        result = await CarRepository(session, user_cache).list_for_user(1)
+
+    assert [car.id for car in result] == [cars[0].id]
+    assert counter.count == 0
+
+
+async def test_no_owner_lookups_without_a_cache(
+    session, cars, count_queries, monkeypatch
+):
+    # The car is not in the session, its owner would need a query
+    session.expunge(cars[0])
+    monkeypatch.setattr("core.cache._user_cache", None)
+    with count_queries() as counter:
+        session.add(MileageLog(car_id=cars[0].id, mileage=100))
+        await session.commit()
+    assert not any("cars.user_tg_id" in statement for statement in counter.statements)
@@ -0,0 +1,120 @@
+import asyncio
+import gc
+import logging
+
+import pytest
+from sqlalchemy import text
+
+from core.config import AppMode, get_settings
+from core.db_helper import DatabaseHelper
+
+
+@pytest.fixture
+async def helper(tmp_path):
+    helper = DatabaseHelper(
+        f"sqlite+aiosqlite:///{tmp_path / 'monitor.db'}",
+        long_transaction=0.05,
+        capture_session_stacks=True,
+    )
+    yield helper
+    await helper.dispose()
+
+
+async def test_session_lifetime_and_connections(helper):
+    monitor = helper.monitor
+
+    async with helper.session_factory() as session:
+        await session.execute(text("SELECT 1"))
+        assert monitor.open_sessions.get() == 1
+        assert monitor.checked_out.get(("main",)) == 1
+
+    assert monitor.open_sessions.get() == 0
+    assert monitor.checked_out.get(("main",)) == 0
+    assert monitor.session_lifetime.values[()].count == 1
+
+
+async def test_session_dependency_closes_once(helper):
+    dependency = helper.session_dependency()
+    await anext(dependency)
+    with pytest.raises(StopAsyncIteration):
+        await anext(dependency)
+
+    assert helper.monitor.open_sessions.get() == 0
+    assert helper.monitor.session_lifetime.values[()].count == 1
+
+
+async def test_scoped_session_is_removed_with_its_task(helper):
+    async def request():
+        dependency = helper.scoped_session_dependency()
+        scoped = await anext(dependency)
+        await scoped.execute(text("SELECT 1"))
+        await anext(dependency, None)
+
+    await asyncio.gather(request(), request())
+
+    assert helper.scoped_session.registry.registry == {}
+    assert helper.monitor.open_sessions.get() == 0
+
+
+async def test_long_transaction_is_reported(helper, caplog):
+    async with helper.session_factory() as session:
+        await session.execute(text("SELECT 1"))
+        await asyncio.sleep(0.06)
+        await session.commit()
+
+    assert helper.monitor.long_transactions.get() == 1
+    assert "Transaction held for" in caplog.text
+    assert "test_long_transaction_is_reported" in caplog.text
+
+
+async def test_leaked_session_is_reported(helper, caplog):
+    def leak():
+        helper.session_factory()
+
+    with caplog.at_level(logging.WARNING):
+        leak()
+        gc.collect()
+
+    assert helper.monitor.leaked_sessions.get() == 1
+    assert helper.monitor.open_sessions.get() == 0
+    assert "in leak" in caplog.text
+
+
+async def test_stacks_are_not_captured_by_default(tmp_path, caplog, monkeypatch):
+    helper = DatabaseHelper(
+        f"sqlite+aiosqlite:///{tmp_path / 'monitor.db'}", long_transaction=0
+    )
+
+    def no_stack_walks():
+        raise AssertionError("stack captured")
+
+    monkeypatch.setattr("core.db_monitor.traceback.extract_stack", no_stack_walks)
+    try:
+        with caplog.at_level(logging.WARNING):
+            async with helper.session_factory() as session:
+                await session.execute(text("SELECT 1"))
+                await session.commit()
+            helper.session_factory()
+            gc.collect()
+    finally:
+        await helper.dispose()
+
+    assert helper.monitor.long_transactions.get() == 1
+    assert helper.monitor.leaked_sessions.get() == 1
+    assert caplog.text.count("(stack capture is disabled)") == 2
+
+
+@pytest.mark.parametrize(
+    ("mode", "configured", "captured"),
+    [
+        (AppMode.dev, None, True),
+        (AppMode.prod, None, False),
+        (AppMode.prod, True, True),
+        (AppMode.dev, False, False),
+    ],
+)
+def test_stack_capture_follows_the_mode(mode, configured, captured):
+    settings = get_settings()
+    db = settings.db.model_copy(update={"capture_session_stacks": configured})
+    settings = settings.model_copy(update={"mode": mode, "db": db})
+    assert settings.capture_session_stacks is captured
@@ -0,0 +1,80 @@
+import asyncio
+from typing import Iterator
+
+import pytest
+from sqlalchemy import event, func, select
+
+from core.db_writer import WriteQueue
+from core.models import User
+
+
+@pytest.fixture
+def commits(session_factory) -> Iterator[list[None]]:
+    """One entry per transaction committed on the engine."""
+    engine = session_factory.kw["bind"].sync_engine
+    committed = []
+
+    def record(conn) -> None:
+        committed.append(None)
+
+    event.listen(engine, "commit", record)
+    yield committed
+    event.remove(engine, "commit", record)
+
+
+def add_user(tg_id: int):
+    async def job(session) -> int:
+        session.add(User(tg_id=tg_id, name=f"user {tg_id}"))
+        return tg_id
+
+    return job
+
+
+async def fail(session) -> None:
+    session.add(User(tg_id=99, name="user 99"))
+    raise ValueError("invalid")
+
+
+async def user_ids(session_factory) -> list[int]:
+    async with session_factory() as session:
+        return list(await session.scalars(select(User.tg_id).order_by(User.tg_id)))
+
+
+async def test_jobs_queued_together_share_a_transaction(session_factory, commits):
+    writer = WriteQueue(session_factory)
+    results = await asyncio.gather(*(writer.submit(add_user(i)) for i in range(5)))
+    await writer.close()
+
+    assert results == [0, 1, 2, 3, 4]
+    assert len(commits) == 1
+    assert await user_ids(session_factory) == [0, 1, 2, 3, 4]
+
+
+async def test_failing_job_fails_only_its_caller(session_factory, commits):
+    writer = WriteQueue(session_factory)
+    results = await asyncio.gather(
+        writer.submit(add_user(1)),
+        writer.submit(fail),
+        writer.submit(add_user(2)),
+        return_exceptions=True,
+    )
+    await writer.close()
+
+    assert results[0] == 1 and results[2] == 2
+    assert isinstance(results[1], ValueError)
+    # The shared transaction rolled back, the other jobs ran again alone
+    assert len(commits) == 2
+    assert await user_ids(session_factory) == [1, 2]
+
+
+async def test_close_drains_the_queue(session_factory):
+    writer = WriteQueue(session_factory, batch_size=2)
+    submitted = [asyncio.create_task(writer.submit(add_user(i))) for i in range(5)]
+    # Let every job reach the queue
+    await asyncio.sleep(0)
+    await writer.close()
+
+    assert all(task.done() for task in submitted)
+    assert [task.result() for task in submitted] == [0, 1, 2, 3, 4]
+    async with session_factory() as session:
+        assert await session.scalar(select(func.count()).select_from(User)) == 5
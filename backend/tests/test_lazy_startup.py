@@ -0,0 +1,29 @@
+import subprocess
+import sys
+
+from conftest import APP_DIR
+
+# Modules that processes import without running the web app
+PROBE = """
+import sys
+import core.models, core.cache, core.db_helper, repositories, services
+from core.config import get_settings
+from core import db_helper, cache
+assert get_settings.cache_info().currsize == 0, "settings were built"
+assert db_helper._db_helper is None, "engines were created"
+assert cache._user_cache is None, "user cache was created"
+"""
+
+
+def test_imports_have_no_side_effects(tmp_path):
+    # A settings read would create the file
+    db_file = tmp_path / "never.db"
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=APP_DIR,
+        env={"APP__DB__FILE_PATH": str(db_file), "PYTHONPATH": str(APP_DIR)},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert not db_file.exists()
@@ -0,0 +1,91 @@
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select, text
+
+from core.db_helper import DatabaseHelper
+from core.metrics import Counter, Histogram, Registry, render
+from core.models import Base, Car
+from core.query_metrics import normalize_statement
+
+
+def test_normalize_statement_collapses_parameter_lists():
+    assert (
+        normalize_statement("SELECT cars.id\nFROM cars\nWHERE cars.id IN (?, ?, ?)")
+        == "SELECT cars.id FROM cars WHERE cars.id IN (?, ...)"
+    )
+
+
+def test_render_prometheus_text():
+    registry = Registry()
+    counter = registry.register(Counter("jobs_total", "Jobs", labelnames=("kind",)))
+    counter.inc(labels=('say "hi"',))
+    histogram = registry.register(
+        Histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    )
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+
+    assert render(registry).splitlines() == [
+        "# HELP jobs_total Jobs",
+        "# TYPE jobs_total counter",
+        'jobs_total{kind="say \\"hi\\""} 1',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 2',
+        'latency_seconds_bucket{le="+Inf"} 2',
+        "latency_seconds_sum 0.55",
+        "latency_seconds_count 2",
+    ]
+
+
+@pytest.fixture
+async def helper(tmp_path):
+    helper = DatabaseHelper(f"sqlite+aiosqlite:///{tmp_path / 'm.db'}", slow_query=0)
+    async with helper.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield helper
+    await helper.dispose()
+
+
+async def test_statements_are_timed_per_normalized_sql(helper, caplog):
+    with caplog.at_level(logging.WARNING):
+        async with helper.session_factory() as session:
+            for ids in ([1], [1, 2, 3]):
+                await session.scalar(
+                    select(func.count()).select_from(Car).where(Car.user_tg_id.in_(ids))
+                )
+
+    metrics = helper.query_metrics
+    [label] = [
+        labels
+        for labels in metrics.statement_latency.values
+        if labels[0].startswith("SELECT count(*)")
+    ]
+    assert "IN (?, ...)" in label[0]
+    assert metrics.statement_latency.values[label].count == 2
+    assert metrics.slow_statements.get(label) == 2
+    assert "parameters=(1, 2, 3)" in caplog.text
+    assert metrics.pool_checkouts.get(("main",)) >= 1
+
+
+async def test_failed_statement_does_not_break_timing(helper):
+    async with helper.engine.connect() as conn:
+        with pytest.raises(Exception):
+            await conn.execute(text("SELECT * FROM missing_table"))
+        await conn.execute(text("SELECT 1"))
+
+
+def test_metrics_endpoint():
+    from core.config import get_settings
+    from main import main_app
+
+    with TestClient(main_app) as client:
+        response = client.get(f"{get_settings().api.prefix}/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE db_statement_seconds histogram" in response.text
+    assert "user_cache_hits_total" in response.text
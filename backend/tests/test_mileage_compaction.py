@@ -0,0 +1,123 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, insert, select, text
+
+from core.models import Car, MileageLog, MileageLogArchive, Reminder, ServiceItem, User
+from services import MileageCompactor
+from utils import as_utc
+
+NOW = datetime(2026, 10, 18, 12, tzinfo=timezone.utc)
+KEEP = timedelta(days=90)
+
+
+async def populate(session, days: int) -> Car:
+    session.add(User(tg_id=1, name="user"))
+    car = Car(user_tg_id=1, brand="Lada", model="Vesta", year=2020, first_mileage=0)
+    session.add(car)
+    await session.flush()
+    await session.execute(
+        insert(MileageLog),
+        [
+            {
+                "car_id": car.id,
+                "mileage": 50 * day,
+                "created_at": NOW - timedelta(days=days - day),
+            }
+            for day in range(days)
+        ],
+    )
+    await session.commit()
+    return car
+
+
+async def test_compaction_keeps_recent_logs_and_monthly_maximum(session_factory):
+    async with session_factory() as session:
+        car = await populate(session, days=400)
+        before = await session.scalar(select(Car.current_mileage))
+
+    stats = await MileageCompactor(session_factory, keep=KEEP).run_once(NOW)
+
+    async with session_factory() as session:
+        logs = (await session.execute(select(MileageLog))).scalars().all()
+        archived = await session.scalar(select(func.count(MileageLogArchive.id)))
+        car = await session.get(Car, car.id)
+
+    cutoff = NOW - KEEP
+    recent = [log for log in logs if as_utc(log.created_at) >= cutoff]
+    old = [log for log in logs if as_utc(log.created_at) < cutoff]
+    months = Counter(as_utc(log.created_at).strftime("%Y-%m") for log in old)
+
+    assert len(recent) == 90
+    assert set(months.values()) == {1}
+    assert archived == stats.archived == 400 - len(logs)
+    assert car.current_mileage == before == 50 * 399
+
+    # Already compacted history stays as it is
+    assert (
+        await MileageCompactor(session_factory, keep=KEEP).run_once(NOW)
+    ).archived == 0
+
+
+async def test_compaction_keeps_the_highest_reading_of_a_week(session_factory):
+    async with session_factory() as session:
+        await populate(session, days=200)
+
+    await MileageCompactor(session_factory, keep=KEEP, bucket="week").run_once(NOW)
+
+    async with session_factory() as session:
+        old = (
+            await session.scalars(
+                select(MileageLog)
+                .where(MileageLog.created_at < NOW - KEEP)
+                .order_by(MileageLog.created_at)
+            )
+        ).all()
+
+    # Every Sunday closes a week and holds its highest reading
+    assert {as_utc(log.created_at).isoweekday() for log in old[:-1]} == {7}
+
+
+async def count_writes(session) -> None:
+    """Log every UPDATE of cars and reminders, triggers' included, to `writes`."""
+    await session.execute(text("CREATE TABLE writes (tbl TEXT)"))
+    for table in ("cars", "reminders"):
+        await session.execute(text(f"""
+            CREATE TRIGGER count_{table}_writes AFTER UPDATE ON {table}
+            BEGIN INSERT INTO writes VALUES ('{table}'); END
+            """))
+
+
+async def writes(session) -> Counter:
+    rows = await session.execute(text("SELECT tbl, count(*) FROM writes GROUP BY tbl"))
+    await session.execute(text("DELETE FROM writes"))
+    return Counter(dict(rows.all()))
+
+
+async def test_compaction_rewrites_no_car_or_reminder(session_factory):
+    async with session_factory() as session:
+        car = await populate(session, days=400)
+        item = ServiceItem(
+            car_id=car.id,
+            name="Engine oil",
+            last_service_date=NOW,
+            last_service_mileage=0,
+        )
+        for interval in (10_000, 15_000, 30_000):
+            session.add(
+                Reminder(car_id=car.id, service_item=item, interval_mileage=interval)
+            )
+        await session.commit()
+        await count_writes(session)
+        await session.commit()
+
+    stats = await MileageCompactor(session_factory, keep=KEEP).run_once(NOW)
+
+    async with session_factory() as session:
+        assert stats.archived > 250
+        # Every deleted log is below the maximum and before the latest one
+        assert await writes(session) == Counter()
+
+        # The latest log moves the car, and the car its projections, once
+        await session.execute(delete(MileageLog).where(MileageLog.mileage == 50 * 399))
+        assert await writes(session) == Counter(cars=1, reminders=3)
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from core.models import Car, MileageLog, Reminder, ServiceItem, User
+from services import ReminderScheduler
+from utils import as_utc
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+class Collector:
+    def __init__(self) -> None:
+        self.forecasts = []
+
+    async def __call__(self, forecasts) -> None:
+        self.forecasts.extend(forecasts)
+
+
+async def sink(reminders):
+    return reminders
+
+
+@pytest.fixture
+async def reminder(session) -> Reminder:
+    car = Car(
+        user=User(tg_id=1, name="user"),
+        brand="Lada",
+        model="Vesta",
+        year=2020,
+        first_mileage=0,
+        created_at=NOW - timedelta(days=30),
+    )
+    item = ServiceItem(
+        car=car, name="Engine oil", last_service_date=NOW, last_service_mileage=0
+    )
+    reminder = Reminder(car=car, service_item=item, interval_mileage=3_000)
+    session.add(reminder)
+    await session.commit()
+    return reminder
+
+
+async def log(session, car_id, mileage: int, days_ago: float) -> None:
+    at = NOW - timedelta(days=days_ago)
+    session.add(MileageLog(car_id=car_id, mileage=mileage, created_at=at))
+    await session.commit()
+
+
+async def stored_rate(session, car_id) -> float | None:
+    stmt = select(Car.mileage_rate).where(Car.id == car_id)
+    return await session.scalar(stmt.execution_options(populate_existing=True))
+
+
+async def test_rate_is_smoothed_per_reading(session, reminder):
+    car = await session.get(Car, reminder.car_id)
+
+    # 1 000 km in the first 10 days: the first estimate is the plain average
+    await log(session, car.id, 1_000, days_ago=20)
+    assert await stored_rate(session, car.id) == pytest.approx(100.0)
+
+    # 500 km in the next 10 days: (30 * 100 + 500) / (30 + 10)
+    await log(session, car.id, 1_500, days_ago=10)
+    assert await stored_rate(session, car.id) == pytest.approx(87.5)
+    # The loaded car mirrors the trigger
+    assert car.mileage_rate == pytest.approx(87.5)
+
+    # A reading older than the latest one leaves the rate
+    await log(session, car.id, 1_500, days_ago=15)
+    assert await stored_rate(session, car.id) == pytest.approx(87.5)
+
+
+async def test_projection_follows_rate_and_service(session, reminder):
+    await log(session, reminder.car_id, 1_000, days_ago=20)
+    await log(session, reminder.car_id, 1_500, days_ago=10)
+    car = await session.get(Car, reminder.car_id)
+    await session.refresh(reminder)
+
+    # 1 500 km left at 87.5 km/day, from the latest reading
+    expected = NOW - timedelta(days=10) + timedelta(days=1_500 / 87.5)
+    assert abs(as_utc(reminder.mileage_due_at) - expected) < timedelta(seconds=1)
+    projected = car.date_at_mileage(reminder.next_due_mileage)
+    assert abs(projected - expected) < timedelta(seconds=1)
+    assert reminder.expected_due_at == as_utc(reminder.mileage_due_at)
+
+    item = await session.get(ServiceItem, reminder.service_item_id)
+    item.last_service_mileage = 1_500
+    await session.commit()
+    await session.refresh(reminder)
+    expected = NOW - timedelta(days=10) + timedelta(days=3_000 / 87.5)
+    assert abs(as_utc(reminder.mileage_due_at) - expected) < timedelta(seconds=1)
+
+
+async def test_scheduler_nudges_at_projection(session, session_factory, reminder):
+    await log(session, reminder.car_id, 1_000, days_ago=20)
+    await log(session, reminder.car_id, 1_500, days_ago=10)
+    await session.refresh(reminder)
+
+    nudge = Collector()
+    scheduler = ReminderScheduler(
+        session_factory, sink, horizon=timedelta(days=10), nudge=nudge
+    )
+    await scheduler.load(NOW)
+    assert scheduler.next_wakeup == as_utc(reminder.mileage_due_at)
+
+    later = as_utc(reminder.mileage_due_at) + timedelta(seconds=2)
+    await scheduler._nudge(set(scheduler.pop_due(later)), later)
+    assert [f.reminder_id for f in nudge.forecasts] == [reminder.id]
+    assert len(scheduler) == 0
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+import pytest
+from sqlalchemy import inspect, select
+
+from core.models import Car, MileageLog, User
+from services import MileageRow, import_mileage, mileage_import
+from services.mileage_import import CAR_MILEAGE
+from utils import as_utc, uuid7
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def days_ago(days: int) -> datetime:
+    return NOW - timedelta(days=days)
+
+
+@pytest.fixture
+async def cars(session) -> list[Car]:
+    cars = [
+        Car(
+            user=User(tg_id=tg_id, name=f"user {tg_id}"),
+            brand="Lada",
+            model="Vesta",
+            year=2020,
+            first_mileage=1_000,
+            created_at=days_ago(100),
+        )
+        for tg_id in range(5)
+    ]
+    session.add_all(cars)
+    await session.commit()
+    return cars
+
+
+async def logs(session, car_id: UUID) -> list[tuple[int, datetime]]:
+    stmt = (
+        select(MileageLog.mileage, MileageLog.created_at)
+        .where(MileageLog.car_id == car_id)
+        .order_by(MileageLog.created_at)
+    )
+    return [(mileage, as_utc(at)) for mileage, at in await session.execute(stmt)]
+
+
+async def test_rejected_rows_are_reported(session, cars):
+    car_id = cars[0].id
+    session.add(MileageLog(car_id=car_id, mileage=2_000, created_at=days_ago(10)))
+    await session.commit()
+
+    unknown = MileageRow(uuid7(), days_ago(5), 5_000)
+    decreased = MileageRow(car_id, days_ago(5), 1_500)
+    older = MileageRow(car_id, days_ago(20), 2_500)
+    valid = MileageRow(car_id, days_ago(1), 3_000)
+    report = await import_mileage(session, [unknown, decreased, older, valid])
+    await session.commit()
+
+    assert report.inserted == 1
+    assert {(r.row, r.reason) for r in report.rejected} == {
+        (unknown, "unknown car"),
+        (decreased, "odometer decreased"),
+        (older, "older than the latest log"),
+    }
+    assert await logs(session, car_id) == [(2_000, days_ago(10)), (3_000, days_ago(1))]
+
+
+async def test_unsorted_rows_of_several_cars(session, cars):
+    first, second = cars[0].id, cars[1].id
+    rows = [
+        MileageRow(first, days_ago(1), 3_000),
+        MileageRow(second, days_ago(3), 1_500),
+        MileageRow(first, days_ago(5), 2_000),
+        # Lower than the row before it in time, once sorted
+        MileageRow(first, days_ago(2), 2_200),
+        MileageRow(second, days_ago(4), 1_200),
+        MileageRow(first, days_ago(3), 2_500),
+    ]
+    report = await import_mileage(session, rows)
+    await session.commit()
+
+    assert report.inserted == 5
+    assert [(r.row, r.reason) for r in report.rejected] == [
+        (rows[3], "odometer decreased")
+    ]
+    assert await logs(session, first) == [
+        (2_000, days_ago(5)),
+        (2_500, days_ago(3)),
+        (3_000, days_ago(1)),
+    ]
+    assert await logs(session, second) == [(1_200, days_ago(4)), (1_500, days_ago(3))]
+    stmt = select(Car.id, Car.current_mileage).where(Car.id.in_([first, second]))
+    assert dict((await session.execute(stmt)).all()) == {first: 3_000, second: 1_500}
+
+
+async def test_cars_are_looked_up_in_chunks(session, cars, count_queries, monkeypatch):
+    monkeypatch.setattr(mileage_import, "LOOKUP_CHUNK_SIZE", 2)
+    rows = [MileageRow(car.id, days_ago(1), 2_000) for car in cars]
+
+    with count_queries() as counter:
+        report = await import_mileage(session, rows)
+
+    lookups = [s for s in counter.statements if s.startswith("SELECT cars.id")]
+    assert len(lookups) == 3
+    assert report.inserted == len(cars)
+    assert report.rejected == []
+
+
+async def test_loaded_cars_are_expired(session, cars):
+    car, untouched = cars[0], cars[1]
+    assert car.current_mileage is None
+
+    await import_mileage(session, [MileageRow(car.id, days_ago(1), 2_000)])
+
+    assert set(CAR_MILEAGE) <= set(inspect(car).expired_attributes)
+    assert not inspect(untouched).expired_attributes
+    await session.refresh(car)
+    assert (car.current_mileage, as_utc(car.last_mileage_at)) == (2_000, days_ago(1))
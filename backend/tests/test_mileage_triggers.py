@@ -0,0 +1,188 @@
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+from uuid import UUID
+
+import pytest
+from sqlalchemy import Connection, Engine, delete, insert, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+
+from core.models import Car, MileageLog, User
+from utils import as_utc
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+@pytest.fixture
+def db(schema_engine: Engine) -> Iterator[Connection]:
+    """A connection to either schema, everything written is rolled back."""
+    with schema_engine.connect() as connection:
+        transaction = connection.begin()
+        yield connection
+        transaction.rollback()
+
+
+def add_car(db: Connection, tg_id: int = 1, first_mileage: int = 1_000) -> UUID:
+    db.execute(insert(User).values(tg_id=tg_id, name=f"user {tg_id}"))
+    stmt = insert(Car).values(
+        user_tg_id=tg_id,
+        brand="Lada",
+        model="Vesta",
+        year=2020,
+        first_mileage=first_mileage,
+        created_at=NOW - timedelta(days=100),
+    )
+    return db.execute(stmt.returning(Car.id)).scalar_one()
+
+
+def add_log(db: Connection, car_id: UUID, mileage: int, days_ago: int) -> UUID:
+    stmt = insert(MileageLog).values(
+        car_id=car_id, mileage=mileage, created_at=NOW - timedelta(days=days_ago)
+    )
+    return db.execute(stmt.returning(MileageLog.id)).scalar_one()
+
+
+def update_log(db: Connection, log_id: UUID, **values) -> None:
+    db.execute(update(MileageLog).where(MileageLog.id == log_id).values(**values))
+
+
+def rejected():
+    return pytest.raises(IntegrityError, match="odometer must not decrease")
+
+
+def test_insert_below_the_latest_reading_is_rejected(db):
+    car_id = add_car(db)
+    add_log(db, car_id, 2_000, days_ago=10)
+    with rejected():
+        add_log(db, car_id, 1_999, days_ago=5)
+    # The same reading again is fine
+    add_log(db, car_id, 2_000, days_ago=5)
+
+
+def test_insert_below_the_first_mileage_is_rejected(db):
+    car_id = add_car(db, first_mileage=1_000)
+    with rejected():
+        add_log(db, car_id, 999, days_ago=5)
+    add_log(db, car_id, 1_000, days_ago=5)
+
+
+def test_update_keeps_the_order_of_neighbouring_readings(db):
+    car_id = add_car(db)
+    add_log(db, car_id, 2_000, days_ago=20)
+    middle = add_log(db, car_id, 3_000, days_ago=10)
+    add_log(db, car_id, 4_000, days_ago=0)
+
+    with rejected():
+        update_log(db, middle, mileage=1_999)
+    with rejected():
+        update_log(db, middle, mileage=4_001)
+    # Moved in time past a neighbouring reading
+    with rejected():
+        update_log(db, middle, created_at=NOW + timedelta(days=1))
+    with rejected():
+        update_log(db, middle, created_at=NOW - timedelta(days=30))
+
+    update_log(db, middle, mileage=2_500, created_at=NOW - timedelta(days=15))
+
+
+def test_moving_a_log_checks_the_readings_of_the_other_car(db):
+    car_id = add_car(db, tg_id=1, first_mileage=0)
+    other_id = add_car(db, tg_id=2, first_mileage=0)
+    add_log(db, other_id, 1_000, days_ago=10)
+    add_log(db, other_id, 2_000, days_ago=0)
+    fits = add_log(db, car_id, 1_500, days_ago=6)
+    too_high = add_log(db, car_id, 5_000, days_ago=5)
+
+    # Higher than the other car's next reading
+    with rejected():
+        update_log(db, too_high, car_id=other_id)
+    update_log(db, fits, car_id=other_id)
+
+
+def car_mileage(
+    db: Connection, car_id: UUID
+) -> tuple[int | None, datetime | None, int]:
+    stmt = select(Car.current_mileage, Car.last_mileage_at, Car.mileage).where(
+        Car.id == car_id
+    )
+    current, last_at, mileage = db.execute(stmt).one()
+    return current, last_at and as_utc(last_at), mileage
+
+
+def test_car_mileage_follows_updates_and_deletes(db):
+    car_id = add_car(db, first_mileage=1_000)
+    first = add_log(db, car_id, 2_000, days_ago=20)
+    latest = add_log(db, car_id, 3_000, days_ago=10)
+    assert car_mileage(db, car_id) == (3_000, NOW - timedelta(days=10), 3_000)
+
+    update_log(db, latest, mileage=3_500, created_at=NOW - timedelta(days=5))
+    assert car_mileage(db, car_id) == (3_500, NOW - timedelta(days=5), 3_500)
+
+    db.execute(delete(MileageLog).where(MileageLog.id == latest))
+    assert car_mileage(db, car_id) == (2_000, NOW - timedelta(days=20), 2_000)
+
+    # Without logs the car is back at the mileage it was added with
+    db.execute(delete(MileageLog).where(MileageLog.id == first))
+    assert car_mileage(db, car_id) == (None, None, 1_000)
+
+
+def test_moved_log_updates_both_cars(db):
+    car_id = add_car(db, tg_id=1, first_mileage=0)
+    other_id = add_car(db, tg_id=2, first_mileage=0)
+    add_log(db, car_id, 1_000, days_ago=10)
+    moved = add_log(db, car_id, 2_000, days_ago=5)
+
+    update_log(db, moved, car_id=other_id)
+    assert car_mileage(db, car_id) == (1_000, NOW - timedelta(days=10), 1_000)
+    assert car_mileage(db, other_id) == (2_000, NOW - timedelta(days=5), 2_000)
+
+
+def expired(obj) -> set[str]:
+    return set(inspect(obj).expired_attributes)
+
+
+async def test_loaded_car_mirrors_the_triggers(session):
+    car = Car(
+        user=User(tg_id=1, name="user"),
+        brand="Lada",
+        model="Vesta",
+        year=2020,
+        first_mileage=1_000,
+        created_at=NOW - timedelta(days=100),
+    )
+    other = Car(
+        user=User(tg_id=2, name="user 2"),
+        brand="Kia",
+        model="Rio",
+        year=2019,
+        first_mileage=0,
+    )
+    session.add_all([car, other])
+    await session.commit()
+
+    # A new reading is mirrored on the loaded car without a query
+    log = MileageLog(car_id=car.id, mileage=2_000, created_at=NOW - timedelta(days=5))
+    session.add(log)
+    await session.flush()
+    assert car.current_mileage == 2_000
+    assert as_utc(car.last_mileage_at) == NOW - timedelta(days=5)
+    assert car.mileage == 2_000
+    await session.commit()
+
+    # A moved or deleted reading expires the values of the cars it leaves
+    # and joins, they are read again on refresh
+    log.car_id = other.id
+    await session.flush()
+    for obj in (car, other):
+        assert {"current_mileage", "last_mileage_at"} <= expired(obj)
+    await session.commit()
+    await session.refresh(car)
+    await session.refresh(other)
+    assert (car.current_mileage, car.mileage) == (None, 1_000)
+    assert (other.current_mileage, other.mileage) == (2_000, 2_000)
+
+    await session.delete(log)
+    await session.flush()
+    assert {"current_mileage", "last_mileage_at"} <= expired(other)
+    await session.commit()
+    await session.refresh(other)
+    assert (other.current_mileage, other.last_mileage_at) == (None, None)
@@ -0,0 +1,229 @@
+import asyncio
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+from fake_bot_api import FakeBotApi
+
+from core.metrics import Registry
+from core.models import Car, Reminder, ReminderState, ServiceItem, User
+from services import (
+    DueNotice,
+    EvaluatedReminder,
+    NotificationDispatcher,
+    NotificationSink,
+    ReminderSweeper,
+    TelegramSender,
+)
+from utils import TokenBucket, uuid7
+
+
+@pytest.fixture
+async def bot_api():
+    api = FakeBotApi()
+    await api.start()
+    yield api
+    await api.close()
+
+
+@pytest.fixture
+async def sender(bot_api):
+    async with httpx.AsyncClient() as client:
+        yield TelegramSender(client, token="123:abc", api_url=bot_api.url)
+
+
+def make_dispatcher(sender, **kwargs) -> NotificationDispatcher:
+    kwargs = {"global_rate": 1000, "chat_rate": 1000, "backoff": 0.01, **kwargs}
+    return NotificationDispatcher(sender, Registry(), **kwargs)
+
+
+def notice(chat_id: int, item: str, is_overdue: bool = False) -> DueNotice:
+    return DueNotice(
+        chat_id=chat_id,
+        reminder_id=uuid7(),
+        car="Lada Vesta",
+        item=item,
+        state=ReminderState.overdue if is_overdue else ReminderState.due_soon,
+    )
+
+
+class GatedSender:
+    """Holds every send until `gate` is set."""
+
+    def __init__(self) -> None:
+        self.gate = asyncio.Event()
+        self.chats: list[int] = []
+
+    async def __call__(self, chat_id: int, text: str) -> None:
+        await self.gate.wait()
+        self.chats.append(chat_id)
+
+
+@pytest.fixture
+async def reminder(session) -> Reminder:
+    user = User(tg_id=7, name="seven")
+    car = Car(user=user, brand="Kia", model="Rio", year=2019, first_mileage=0)
+    item = ServiceItem(
+        car=car,
+        name="Engine oil",
+        last_service_date=datetime(2020, 1, 1, tzinfo=timezone.utc),
+        last_service_mileage=0,
+    )
+    reminder = Reminder(car=car, service_item=item, interval_days=365)
+    session.add(reminder)
+    await session.commit()
+    return reminder
+
+
+async def notified_state(session, reminder: Reminder) -> ReminderState:
+    await session.refresh(reminder, ["notified_state"])
+    return reminder.notified_state
+
+
+async def test_due_items_of_one_user_are_grouped(bot_api, sender):
+    dispatcher = make_dispatcher(sender)
+    dispatcher.submit(notice(1, "Engine oil", is_overdue=True))
+    dispatcher.submit(notice(1, "Air filter"))
+    dispatcher.submit(notice(2, "Coolant"))
+    await dispatcher.close()
+
+    texts = {message.chat_id: message.text for message in bot_api.messages}
+    assert len(bot_api.messages) == 2
+    assert "Lada Vesta: Air filter\n" in texts[1]
+    assert "Lada Vesta: Engine oil (просрочено)" in texts[1]
+    assert "Coolant" in texts[2]
+    assert dispatcher.sent.get() == 2
+    assert dispatcher.notices_sent.get() == 3
+    assert dispatcher.queue_depth.get() == 0
+
+
+async def test_retries_server_errors_and_flood_control(bot_api, sender):
+    bot_api.failures = [
+        (500, {"ok": False, "description": "Internal Server Error"}),
+        (429, {"ok": False, "parameters": {"retry_after": 0}}),
+    ]
+    dispatcher = make_dispatcher(sender)
+    dispatcher.submit(notice(1, "Engine oil"))
+    await dispatcher.close()
+
+    assert len(bot_api.messages) == 1
+    assert bot_api.requests == 3
+    assert dispatcher.retries.get() == 2
+    assert dispatcher.send_seconds.values[()].count == 3
+
+
+async def test_permanent_errors_are_dropped(bot_api, sender):
+    bot_api.failures = [(403, {"ok": False, "description": "bot was blocked"})]
+    dispatcher = make_dispatcher(sender)
+    dispatcher.submit(notice(1, "Engine oil"))
+    dispatcher.submit(notice(1, "Air filter"))
+    await dispatcher.close()
+
+    assert bot_api.requests == 1
+    assert dispatcher.retries.get() == 0
+    assert dispatcher.dropped.get(("send_failed",)) == 2
+
+
+async def test_full_queue_drops_notices(bot_api, sender):
+    dispatcher = make_dispatcher(sender, queue_size=1)
+    assert dispatcher.submit(notice(1, "Engine oil"))
+    # Joins the queued chat, takes no slot
+    assert dispatcher.submit(notice(1, "Air filter"))
+    assert not dispatcher.submit(notice(2, "Coolant"))
+    await dispatcher.close()
+
+    assert dispatcher.dropped.get(("queue_full",)) == 1
+    assert [message.chat_id for message in bot_api.messages] == [1]
+
+
+async def test_messages_to_one_chat_are_paced(bot_api, sender):
+    dispatcher = make_dispatcher(sender, chat_rate=20)
+    for sent, item in enumerate(("Engine oil", "Air filter", "Coolant")):
+        # Once the previous message is out, the next notice is a new message
+        while len(bot_api.messages) < sent:
+            await asyncio.sleep(0.001)
+        dispatcher.submit(notice(1, item))
+    await dispatcher.close()
+
+    times = [message.at for message in bot_api.messages]
+    assert len(times) == 3
+    assert all(b - a >= 0.04 for a, b in zip(times, times[1:]))
+
+
+async def test_token_bucket_spaces_waiters():
+    bucket = TokenBucket(rate=100)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.01, abs=0.002)
+    assert bucket.reserve() == pytest.approx(0.02, abs=0.002)
+    assert not bucket.is_full
+
+
+async def test_sink_resolves_owner_car_and_item(
+    session, session_factory, bot_api, sender, reminder
+):
+    dispatcher = make_dispatcher(sender)
+    sink = NotificationSink(session_factory, dispatcher)
+    delivered = await sink(
+        [
+            EvaluatedReminder(
+                id=reminder.id, car_id=reminder.car_id, state=ReminderState.overdue
+            )
+        ]
+    )
+    # Recorded once the message is out, not when it is queued
+    assert delivered == []
+    await dispatcher.close()
+
+    assert [(m.chat_id, m.text) for m in bot_api.messages] == [
+        (7, "Пора на обслуживание:\n• Kia Rio: Engine oil (просрочено)")
+    ]
+    assert await notified_state(session, reminder) == ReminderState.overdue
+
+
+async def test_failed_send_is_notified_by_the_next_sweep(
+    session, session_factory, bot_api, sender, reminder
+):
+    bot_api.failures = [(403, {"ok": False, "description": "bot was blocked"})]
+    dispatcher = make_dispatcher(sender)
+    sweeper = ReminderSweeper(
+        session_factory, NotificationSink(session_factory, dispatcher)
+    )
+
+    await sweeper.run_once()
+    await dispatcher.close()
+    assert bot_api.messages == []
+    assert await notified_state(session, reminder) == ReminderState.ok
+
+    for _ in range(2):
+        await sweeper.run_once()
+        await dispatcher.close()
+    # Sent by the second sweep, the third one has nothing new to say
+    assert [message.chat_id for message in bot_api.messages] == [7]
+    assert await notified_state(session, reminder) == ReminderState.overdue
+
+
+async def test_notice_dropped_by_a_full_queue_is_notified_by_the_next_sweep(
+    session, session_factory, reminder
+):
+    sender = GatedSender()
+    dispatcher = make_dispatcher(sender, workers=1, queue_size=1)
+    sweeper = ReminderSweeper(
+        session_factory, NotificationSink(session_factory, dispatcher)
+    )
+    # One chat is being sent to, another one fills the queue
+    dispatcher.submit(notice(1, "Air filter"))
+    while dispatcher.depth:
+        await asyncio.sleep(0)
+    dispatcher.submit(notice(2, "Coolant"))
+
+    await sweeper.run_once()
+    assert dispatcher.dropped.get(("queue_full",)) == 1
+    sender.gate.set()
+    await dispatcher.close()
+    assert sender.chats == [1, 2]
+    assert await notified_state(session, reminder) == ReminderState.ok
+
+    await sweeper.run_once()
+    await dispatcher.close()
+    assert sender.chats == [1, 2, 7]
+    assert await notified_state(session, reminder) == ReminderState.overdue
@@ -0,0 +1,146 @@
+"""
+Hot queries must be served by the hand-written indexes.
+
+Each query runs against the schema built from the models and from the
+migrations; a full table scan, a temp b-tree sort or a missing index in the
+plan fails the test.
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import and_, func, or_, select
+
+from core.models import Car, MileageLog, Reminder, ServiceItem
+from repositories import ReminderRepository
+from services import ReminderIndex, ReminderSweeper, ReminderWatcher
+
+CAR_ID = uuid4()
+NOW = datetime.now(timezone.utc)
+
+
+def sweep_chunk(after, only_changes=True, check_mileage=True):
+    sweeper = ReminderSweeper(
+        session_factory=None,
+        sink=None,
+        chunk_size=1000,
+        only_changes=only_changes,
+        check_mileage=check_mileage,
+    )
+    return sweeper._chunk_statement(after, NOW)
+
+
+HOT_QUERIES = {
+    "current_mileage": (
+        select(Car.mileage).where(Car.id == CAR_ID),
+        {"sqlite_autoindex_cars_1"},
+    ),
+    "max_logged_mileage": (
+        select(func.max(MileageLog.mileage)).where(MileageLog.car_id == CAR_ID),
+        {"ix_mileage_logs_car_mileage"},
+    ),
+    "due_reminders_of_car": (
+        select(Reminder).where(
+            Reminder.car_id == CAR_ID,
+            Reminder.is_active.is_not(False),
+            Reminder.is_due,
+        ),
+        {"ix_reminders_car_active", "sqlite_autoindex_cars_1"},
+    ),
+    "due_of_user": (
+        ReminderRepository._due_statement(1),
+        {"ix_cars_user_tg_id", "ix_reminders_car_active"},
+    ),
+    "reminders_of_user": (
+        ReminderRepository._user_statement(1),
+        {"ix_cars_user_tg_id", "ix_reminders_car_active"},
+    ),
+    "sweep_first_chunk": (
+        sweep_chunk(None),
+        {"ix_reminders_car_pending"},
+    ),
+    "sweep_next_chunk": (
+        sweep_chunk((CAR_ID, uuid4())),
+        {"ix_reminders_car_pending"},
+    ),
+    "date_sweep_next_chunk": (
+        sweep_chunk((CAR_ID, uuid4()), check_mileage=False),
+        {"ix_reminders_car_pending"},
+    ),
+    "watched_cars": (
+        ReminderWatcher(session_factory=None, sink=None)._statement(
+            [CAR_ID, uuid4()], NOW
+        ),
+        {"ix_reminders_car_pending"},
+    ),
+    "indexed_cars": (
+        ReminderIndex(session_factory=None)._cars_statement([CAR_ID, uuid4()]),
+        {"ix_reminders_car_active"},
+    ),
+    "full_sweep_next_chunk": (
+        sweep_chunk((CAR_ID, uuid4()), only_changes=False),
+        {"ix_reminders_car_active"},
+    ),
+    "scheduler_window": (
+        select(Reminder.id, Reminder.next_due_at, Reminder.mileage_due_at).where(
+            Reminder.is_active.is_(True),
+            or_(
+                *(
+                    and_(column > NOW, column <= NOW + timedelta(days=1))
+                    for column in (Reminder.next_due_at, Reminder.mileage_due_at)
+                )
+            ),
+        ),
+        {"ix_reminders_next_due_at", "ix_reminders_mileage_due_at"},
+    ),
+    "projections_of_car": (
+        select(Reminder.id).where(
+            Reminder.car_id == CAR_ID, Reminder.next_due_mileage.is_not(None)
+        ),
+        {"ix_reminders_car_active"},
+    ),
+    "cars_of_user": (
+        select(Car).where(Car.user_tg_id == 1),
+        {"ix_cars_user_tg_id"},
+    ),
+    "last_mileage_logs": (
+        select(MileageLog)
+        .where(MileageLog.car_id == CAR_ID)
+        .order_by(MileageLog.created_at.desc())
+        .limit(5),
+        {"ix_mileage_logs_car_created_at_desc"},
+    ),
+    "service_items_of_car": (
+        select(ServiceItem).where(ServiceItem.car_id == CAR_ID),
+        {"ix_service_items_car"},
+    ),
+}
+
+
+# Queries allowed to sort in a temp b-tree, with why the sort stays small.
+# /due returns the triggered reminders of one user's cars: no index orders
+# rows of several cars by next_due_at, and there are only tens of rows.
+SMALL_SORTS = {"due_of_user"}
+
+
+def is_table_scan(detail: str) -> bool:
+    return (
+        detail.startswith("SCAN ")
+        and "USING" not in detail
+        and "CONSTANT ROW" not in detail
+    )
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_indexes(query_plan, name):
+    stmt, indexes = HOT_QUERIES[name]
+    plan = query_plan(stmt)
+    rendered = "\n".join(plan)
+
+    assert not [d for d in plan if is_table_scan(d)], f"full scan:\n{rendered}"
+    if name not in SMALL_SORTS:
+        assert "TEMP B-TREE" not in rendered, f"temp b-tree:\n{rendered}"
+    for index in indexes:
+        assert re.search(rf"INDEX {index}\b", rendered), f"{index} unused:\n{rendered}"
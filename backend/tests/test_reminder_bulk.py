@@ -0,0 +1,76 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from core.models import Car, MileageLog, Reminder, ServiceItem, User
+
+pytest.importorskip("numpy")
+
+from services.reminder_bulk import due_reminders  # noqa: E402
+
+NOW = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+async def population(session) -> None:
+    rnd = random.Random(7)
+    user = User(tg_id=1, name="user")
+    for _ in range(20):
+        car = Car(user=user, brand="Lada", model="Vesta", year=2020, first_mileage=0)
+        session.add(car)
+        if rnd.random() < 0.8:
+            # Cars without logs fall back to first_mileage
+            car.mileage_logs.append(MileageLog(mileage=rnd.randint(0, 60_000)))
+        for n in range(15):
+            # Half a day off whole days, far from the boundaries the
+            # two evaluations could see at slightly different moments
+            days_ago = rnd.randint(0, 500) + 0.5
+            item = ServiceItem(
+                car=car,
+                name=f"item {n}",
+                last_service_date=NOW - timedelta(days=days_ago),
+                last_service_mileage=rnd.randint(0, 50_000),
+            )
+            interval_mileage = rnd.choice([None, 5_000, 10_000])
+            interval_days = rnd.choice([None, 180, 365])
+            if interval_mileage is None and interval_days is None:
+                interval_days = 365
+            reminder = Reminder(
+                car=car,
+                service_item=item,
+                is_active=rnd.random() < 0.9,
+                interval_mileage=interval_mileage,
+                interval_days=interval_days,
+                warning_mileage_before=rnd.choice([None, 0, 500, 1_000]),
+                warning_days_before=rnd.choice([None, 0, 14, 30]),
+            )
+            session.add(reminder)
+    await session.commit()
+
+
+async def test_bulk_evaluation_matches_hybrids(session, population):
+    stmt = (
+        select(Reminder)
+        .where(Reminder.is_active)
+        .options(selectinload(Reminder.car), selectinload(Reminder.service_item))
+    )
+    reminders = (await session.scalars(stmt)).all()
+    overdue = {r.id for r in reminders if r.is_overdue}
+    due_soon = {r.id for r in reminders if r.is_due_soon}
+
+    result = await due_reminders(session, datetime.now(timezone.utc))
+
+    assert len(result.ids) == len(reminders)
+    assert set(result.overdue_ids()) == overdue
+    assert set(result.due_soon_ids()) == due_soon
+    assert set(result.due_ids()) == overdue | due_soon
+    # Both kinds are present, or the comparison proves little
+    assert overdue and due_soon - overdue
+
+
+async def test_empty_table(session):
+    result = await due_reminders(session)
+    assert result.due_ids() == []
@@ -0,0 +1,104 @@
+import importlib
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from core.models import Car, Reminder, ReminderState, ServiceItem, User
+
+reminder_module = importlib.import_module("core.models.reminder")
+
+# A whole second, the clock of the hybrids never has a fraction
+NOW = datetime(2026, 5, 1, 12, 0, tzinfo=timezone.utc)
+SECOND = timedelta(seconds=1)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Set the time both the instance and SQL forms of the hybrids read."""
+
+    def set_clock(now: datetime) -> None:
+        monkeypatch.setattr(reminder_module, "utcnow", lambda: now)
+
+    return set_clock
+
+
+@pytest.fixture
+async def reminders(session) -> list[Reminder]:
+    car = Car(
+        user=User(tg_id=1, name="user"),
+        brand="Lada",
+        model="Vesta",
+        year=2020,
+        first_mileage=0,
+    )
+    # Both trigger 0.3 s into the second of NOW: the overdue date of the
+    # first one, the warning date of the second one
+    item = ServiceItem(
+        car=car,
+        name="Engine oil",
+        last_service_date=NOW - timedelta(days=30) + timedelta(milliseconds=300),
+        last_service_mileage=0,
+    )
+    reminders = [
+        Reminder(car=car, service_item=item, interval_days=30),
+        Reminder(car=car, service_item=item, interval_days=40, warning_days_before=10),
+    ]
+    session.add_all(reminders)
+    await session.commit()
+    return reminders
+
+
+async def evaluate(session) -> tuple[list[tuple], list[tuple]]:
+    """Hybrids of every reminder evaluated on instances and in SQL."""
+    columns = (
+        Reminder.is_overdue,
+        Reminder.is_due_soon,
+        Reminder.is_due,
+        Reminder.state,
+    )
+    stmt = select(*columns).order_by(Reminder.id)
+    in_sql = [tuple(row) for row in await session.execute(stmt)]
+
+    stmt = (
+        select(Reminder)
+        .order_by(Reminder.id)
+        .options(selectinload(Reminder.car), selectinload(Reminder.service_item))
+        .execution_options(populate_existing=True)
+    )
+    on_instances = [
+        (r.is_overdue, r.is_due_soon, r.is_due, r.state)
+        for r in await session.scalars(stmt)
+    ]
+    return on_instances, in_sql
+
+
+async def test_hybrids_agree_within_the_second_a_reminder_triggers(
+    session, reminders, clock
+):
+    clock(NOW - SECOND)
+    on_instances, in_sql = await evaluate(session)
+    assert on_instances == in_sql
+    assert in_sql == [
+        (False, False, False, ReminderState.ok),
+        (False, False, False, ReminderState.ok),
+    ]
+
+    # The dates are truncated to the second of NOW on both sides, so
+    # the reminders are due but not overdue yet
+    clock(NOW)
+    on_instances, in_sql = await evaluate(session)
+    assert on_instances == in_sql
+    assert in_sql == [
+        (False, False, True, ReminderState.due_soon),
+        (False, True, True, ReminderState.due_soon),
+    ]
+
+    clock(NOW + SECOND)
+    on_instances, in_sql = await evaluate(session)
+    assert on_instances == in_sql
+    assert in_sql == [
+        (True, False, True, ReminderState.overdue),
+        (False, True, True, ReminderState.due_soon),
+    ]
@@ -0,0 +1,150 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from core.models import Car, MileageLog, Reminder, ServiceItem, User
+from repositories import ReminderRepository
+from services import ReminderIndex
+from utils import as_utc
+
+NOW = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+async def population(session) -> None:
+    rnd = random.Random(11)
+    for tg_id in (1, 2, 3):
+        user = User(tg_id=tg_id, name=f"user {tg_id}")
+        for _ in range(4):
+            car = Car(
+                user=user, brand="Lada", model="Vesta", year=2020, first_mileage=0
+            )
+            session.add(car)
+            car.mileage_logs.append(MileageLog(mileage=rnd.randint(0, 30_000)))
+            for n in range(10):
+                # Half a day off whole days, away from the trigger boundaries
+                item = ServiceItem(
+                    car=car,
+                    name=f"item {n}",
+                    last_service_date=NOW - timedelta(days=rnd.randint(0, 400) + 0.5),
+                    last_service_mileage=rnd.randint(0, 25_000),
+                )
+                reminder = Reminder(
+                    car=car,
+                    service_item=item,
+                    is_active=rnd.random() < 0.9,
+                    interval_mileage=rnd.choice([None, 5_000, 10_000]),
+                    interval_days=rnd.choice([None, 180, 365]),
+                )
+                if reminder.interval_mileage is None:
+                    reminder.interval_days = reminder.interval_days or 365
+                session.add(reminder)
+    await session.commit()
+
+
+@pytest.fixture
+async def index(session_factory):
+    index = ReminderIndex(session_factory, stream_size=7)
+    index.install()
+    yield index
+    index.uninstall()
+
+
+async def test_due_matches_repository(session, population, index):
+    await index.load()
+    repository = ReminderRepository(session)
+
+    active = select(func.count()).where(Reminder.is_active)
+    assert len(index) == await session.scalar(active)
+    for tg_id in (1, 2, 3, 4):
+        expected = [r.id for r in await repository.list_due(tg_id)]
+        assert [r.id for r in index.due_for_user(tg_id)] == expected
+    assert index.due_for_user(1)
+
+
+async def test_commits_reach_the_index(session, population, index):
+    await index.load()
+    stmt = (
+        select(Reminder)
+        .where(Reminder.is_active, ~Reminder.is_due)
+        .order_by(Reminder.next_due_mileage.desc())
+    )
+    target = await session.scalar(stmt)
+    car = await session.get(Car, target.car_id)
+    assert target.id not in {r.id for r in index.due_for_user(car.user_tg_id)}
+
+    session.add(MileageLog(car_id=car.id, mileage=target.next_due_mileage))
+    await session.commit()
+    await index.drain()
+    assert target.id in {r.id for r in index.due_for_user(car.user_tg_id)}
+
+    target.is_active = False
+    await session.commit()
+    await index.drain()
+    assert target.id not in {r.id for r in index.due_for_user(car.user_tg_id)}
+
+    await session.delete(car)
+    await session.commit()
+    await index.drain()
+    assert all(r.car.id != car.id for r in index._reminders.values())
+
+
+async def test_due_within_window(session, index):
+    car = Car(
+        user=User(tg_id=1, name="user"),
+        brand="Lada",
+        model="Vesta",
+        year=2020,
+        first_mileage=0,
+    )
+    soon, later = (
+        Reminder(
+            car=car,
+            service_item=ServiceItem(
+                car=car,
+                name=name,
+                last_service_date=NOW - timedelta(days=30) + offset,
+                last_service_mileage=0,
+            ),
+            interval_days=30,
+        )
+        for name, offset in (
+            ("soon", timedelta(minutes=5)),
+            ("later", timedelta(hours=2)),
+        )
+    )
+    session.add_all([soon, later])
+    await session.commit()
+    await session.refresh(soon)
+    await index.load()
+
+    assert [r.id for r in index.due_within(timedelta(minutes=10), NOW)] == [soon.id]
+    assert [r.id for r in index.due_within(timedelta(hours=3), NOW)] == [
+        soon.id,
+        later.id,
+    ]
+    in_a_day = NOW + timedelta(days=1)
+    assert index.due_within(timedelta(hours=3), in_a_day) == []
+    assert [r.id for r in index.due_for_user(1, in_a_day)] == [soon.id, later.id]
+    assert index.due_for_user(1, in_a_day)[0].next_due_at == as_utc(soon.next_due_at)
+
+
+async def test_reload_keeps_serving_the_old_contents(session, population, index):
+    await index.load()
+    expected = [r.id for r in index.due_for_user(1)]
+    soon = index.due_within(timedelta(days=365))
+
+    loading = asyncio.create_task(index.load())
+    reads = 0
+    while not loading.done():
+        assert [r.id for r in index.due_for_user(1)] == expected
+        assert len(index.due_within(timedelta(days=365))) == len(soon)
+        reads += 1
+        await asyncio.sleep(0)
+    await loading
+    # The stream was read in several partitions, readers ran in between
+    assert reads > 1
+    assert [r.id for r in index.due_for_user(1)] == expected
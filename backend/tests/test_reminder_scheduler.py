@@ -0,0 +1,139 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+import pytest
+
+from core.models import Car, Reminder, ServiceItem, User
+from services import ReminderScheduler
+from services.reminder_scheduler import CLOCK_RESOLUTION
+from utils import as_utc
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+HORIZON = timedelta(days=1)
+SECOND = timedelta(seconds=1)
+
+
+async def sink(reminders):
+    return reminders
+
+
+@pytest.fixture
+async def reminders(session) -> dict[str, Reminder]:
+    car = Car(
+        user=User(tg_id=1, name="user"),
+        brand="Lada",
+        model="Vesta",
+        year=2020,
+        first_mileage=0,
+    )
+    due = {
+        # On the last second of the first window
+        "edge": NOW + HORIZON,
+        # After the first window, passed while the loop oversleeps
+        "late": NOW + HORIZON + timedelta(hours=1),
+    }
+    reminders = {}
+    for name, due_at in due.items():
+        item = ServiceItem(
+            car=car,
+            name=name,
+            last_service_date=due_at - timedelta(days=365),
+            last_service_mileage=0,
+        )
+        reminders[name] = Reminder(car=car, service_item=item, interval_days=365)
+    session.add_all(reminders.values())
+    await session.commit()
+    for name, reminder in reminders.items():
+        await session.refresh(reminder)
+        assert as_utc(reminder.next_due_at) == due[name]
+    return reminders
+
+
+async def test_reload_keeps_the_end_of_the_window(session_factory, reminders):
+    scheduler = ReminderScheduler(session_factory, sink, horizon=HORIZON)
+    await scheduler.load(NOW)
+    window_end = NOW + HORIZON
+    assert scheduler.next_wakeup == window_end
+
+    # The loop wakes up at the end of the window, a second too early to fire
+    assert scheduler.pop_due(window_end) == []
+    await scheduler.load(window_end)
+    assert scheduler.pop_due(window_end + SECOND) == [reminders["edge"].id]
+
+
+async def test_reload_after_oversleeping_fires_what_passed(session_factory, reminders):
+    scheduler = ReminderScheduler(session_factory, sink, horizon=HORIZON)
+    await scheduler.load(NOW)
+    assert len(scheduler) == 1
+
+    late = NOW + HORIZON + timedelta(hours=2)
+    await scheduler.load(late)
+    assert set(scheduler.pop_due(late)) == {
+        reminders["edge"].id,
+        reminders["late"].id,
+    }
+    assert len(scheduler) == 0
+
+
+@pytest.fixture
+async def installed(session_factory):
+    fired: list[tuple[datetime, UUID]] = []
+    wakeup = asyncio.Event()
+
+    async def record(reminders):
+        fired.extend((datetime.now(timezone.utc), r.id) for r in reminders)
+        wakeup.set()
+        return reminders
+
+    scheduler = ReminderScheduler(session_factory, record, horizon=HORIZON)
+    scheduler.install()
+    yield scheduler, fired, wakeup
+    scheduler.uninstall()
+
+
+async def test_edit_moves_a_reminder_into_the_running_window(
+    session, reminders, installed
+):
+    scheduler, fired, wakeup = installed
+    await scheduler.load(datetime.now(timezone.utc))
+    task = asyncio.create_task(scheduler.run())
+    try:
+        # Due in two seconds instead of after the window
+        due_at = datetime.now(timezone.utc).replace(microsecond=0) + 2 * SECOND
+        item = await session.get(ServiceItem, reminders["late"].service_item_id)
+        item.last_service_date = due_at - timedelta(days=365)
+        await session.commit()
+        await scheduler.drain()
+        assert scheduler.next_wakeup == due_at
+
+        await asyncio.wait_for(wakeup.wait(), timeout=5)
+    finally:
+        task.cancel()
+    [(fired_at, reminder_id)] = fired
+    assert reminder_id == reminders["late"].id
+    assert due_at <= fired_at < due_at + CLOCK_RESOLUTION + SECOND
+
+
+async def test_deactivated_and_deleted_reminders_are_cancelled(
+    session, reminders, installed
+):
+    scheduler, _, _ = installed
+    edge = reminders["edge"]
+    await scheduler.load(NOW)
+    assert len(scheduler) == 1
+
+    edge.is_active = False
+    await session.commit()
+    await scheduler.drain()
+    assert len(scheduler) == 0 and scheduler.next_wakeup is None
+
+    edge.is_active = True
+    await session.commit()
+    await scheduler.drain()
+    assert scheduler.next_wakeup == NOW + HORIZON
+
+    await session.delete(edge)
+    await session.commit()
+    await scheduler.drain()
+    assert len(scheduler) == 0 and scheduler.next_wakeup is None
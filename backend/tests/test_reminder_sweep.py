@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core.models import Car, MileageLog, Reminder, ReminderState, ServiceItem, User
+from services import MileageRow, ReminderSweeper, ReminderWatcher, import_mileage
+
+NOW = datetime.now(timezone.utc)
+
+
+class Collector:
+    def __init__(self) -> None:
+        self.batches = []
+
+    async def __call__(self, reminders):
+        self.batches.append(reminders)
+        return reminders
+
+    def take(self) -> list[tuple[ReminderState, ReminderState]]:
+        """(previous_state, state) of everything emitted since the last call."""
+        emitted = [(r.previous_state, r.state) for b in self.batches for r in b]
+        self.batches.clear()
+        return emitted
+
+
+@pytest.fixture
+async def reminder(session) -> Reminder:
+    car = Car(
+        user=User(tg_id=1, name="user"),
+        brand="Lada",
+        model="Vesta",
+        year=2020,
+        first_mileage=0,
+    )
+    item = ServiceItem(
+        car=car, name="Engine oil", last_service_date=NOW, last_service_mileage=0
+    )
+    # Due soon from 9 000 km, overdue after 10 000 km
+    reminder = Reminder(
+        car=car,
+        service_item=item,
+        interval_mileage=10_000,
+        interval_days=3650,
+        warning_mileage_before=1_000,
+    )
+    session.add(reminder)
+    await session.commit()
+    return reminder
+
+
+@pytest.fixture
+def watched(session_factory):
+    sink = Collector()
+    watcher = ReminderWatcher(session_factory, sink)
+    watcher.install()
+    yield watcher, sink
+    watcher.uninstall()
+
+
+async def drive(session, reminder: Reminder, mileage: int) -> None:
+    session.add(MileageLog(car_id=reminder.car_id, mileage=mileage))
+    await session.commit()
+
+
+async def test_sweep_emits_each_transition_once(session, session_factory, reminder):
+    sink = Collector()
+    sweeper = ReminderSweeper(session_factory, sink)
+
+    await sweeper.run_once()
+    assert sink.take() == []
+
+    await drive(session, reminder, 9_500)
+    await sweeper.run_once()
+    await sweeper.run_once()
+    assert sink.take() == [(ReminderState.ok, ReminderState.due_soon)]
+
+    await drive(session, reminder, 10_500)
+    stats = await sweeper.run_once()
+    assert sink.take() == [(ReminderState.due_soon, ReminderState.overdue)]
+    assert stats.due == 1
+
+    # Reported as overdue, no longer read by sweeps at all
+    assert (await sweeper.run_once()).reminders == 0
+    await session.refresh(reminder)
+    assert reminder.notified_state is ReminderState.overdue
+    assert reminder.notified_at is not None
+
+
+async def test_service_starts_a_new_cycle(session, session_factory, reminder):
+    sink = Collector()
+    sweeper = ReminderSweeper(session_factory, sink)
+    await drive(session, reminder, 10_500)
+    await sweeper.run_once()
+    assert sink.take() == [(ReminderState.ok, ReminderState.overdue)]
+
+    item = await session.get(ServiceItem, reminder.service_item_id)
+    item.last_service_mileage = 10_500
+    await session.commit()
+
+    # Reset by the service_items trigger
+    await session.refresh(reminder)
+    assert reminder.notified_state is ReminderState.ok
+    assert reminder.notified_at is None
+
+    await drive(session, reminder, 19_600)
+    await sweeper.run_once()
+    assert sink.take() == [(ReminderState.ok, ReminderState.due_soon)]
+
+
+async def test_snoozed_reminder_waits(session, session_factory, reminder):
+    sink = Collector()
+    sweeper = ReminderSweeper(session_factory, sink)
+    reminder.snoozed_until = NOW + timedelta(days=1)
+    await session.commit()
+    await drive(session, reminder, 9_500)
+
+    await sweeper.run_once(NOW)
+    assert sink.take() == []
+
+    await sweeper.run_once(NOW + timedelta(days=2))
+    assert sink.take() == [(ReminderState.ok, ReminderState.due_soon)]
+
+
+async def test_full_sweep_reports_everything_and_records_nothing(
+    session, session_factory, reminder
+):
+    sink = Collector()
+    sweeper = ReminderSweeper(session_factory, sink, only_changes=False)
+    await drive(session, reminder, 9_500)
+
+    await sweeper.run_once()
+    await sweeper.run_once()
+
+    assert sink.take() == [(ReminderState.ok, ReminderState.due_soon)] * 2
+    await session.refresh(reminder)
+    assert reminder.notified_state is ReminderState.ok
+
+
+async def test_date_sweep_leaves_mileage_out(session, session_factory, reminder):
+    sink = Collector()
+    sweeper = ReminderSweeper(session_factory, sink, check_mileage=False)
+    await drive(session, reminder, 9_500)
+
+    await sweeper.run_once(NOW)
+    assert sink.take() == []
+
+    # Past the trigger date the reminder is evaluated, mileage included
+    await sweeper.run_once(NOW + timedelta(days=3651))
+    assert sink.take() == [(ReminderState.ok, ReminderState.due_soon)]
+
+
+async def test_watcher_reports_right_after_commit(
+    session, session_factory, reminder, watched
+):
+    watcher, sink = watched
+    await drive(session, reminder, 5_000)
+    await watcher.drain()
+    assert sink.take() == []
+
+    await drive(session, reminder, 9_500)
+    await watcher.drain()
+    assert sink.take() == [(ReminderState.ok, ReminderState.due_soon)]
+
+    # Recorded, the sweep has nothing left to report
+    sweep = Collector()
+    await ReminderSweeper(session_factory, sweep).run_once()
+    assert sweep.take() == []
+
+
+async def test_watcher_sees_bulk_imports(session, session_factory, reminder, watched):
+    watcher, sink = watched
+    rows = [MileageRow(reminder.car_id, NOW, 10_500)]
+    report = await import_mileage(session, rows)
+    assert report.inserted == 1
+    await session.commit()
+
+    await watcher.drain()
+    assert sink.take() == [(ReminderState.ok, ReminderState.overdue)]
+
+
+async def test_watcher_forgets_rolled_back_writes(
+    session, session_factory, reminder, watched
+):
+    watcher, sink = watched
+    session.add(MileageLog(car_id=reminder.car_id, mileage=10_500))
+    await session.flush()
+    await session.rollback()
+    await session.commit()
+
+    await watcher.drain()
+    assert sink.take() == []
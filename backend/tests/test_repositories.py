@@ -0,0 +1,126 @@
+"""
+Every loading profile issues a fixed number of queries, however many rows
+it returns, and leaves nothing for the caller to lazy load.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core.models import Car, MileageLog, Reminder, ServiceItem, User
+from repositories import (
+    CarRepository,
+    MileageLogRepository,
+    ReminderRepository,
+    ServiceItemRepository,
+)
+
+SIZES = [1, 5, 20]
+
+
+async def populate(session, cars: int, items: int) -> list[Car]:
+    """One user with `cars` cars, each with `items` overdue items and reminders."""
+    long_ago = datetime.now(timezone.utc) - timedelta(days=400)
+    session.add(User(tg_id=1, name="user"))
+    result = []
+    for car_idx in range(cars):
+        car = Car(
+            user_tg_id=1,
+            brand="Lada",
+            model=f"Vesta {car_idx}",
+            year=2020,
+            first_mileage=10_000,
+        )
+        for item_idx in range(items):
+            item = ServiceItem(
+                car=car,
+                name=f"item {item_idx}",
+                last_service_date=long_ago,
+                last_service_mileage=5_000,
+            )
+            Reminder(car=car, service_item=item, interval_days=365)
+        session.add(car)
+        result.append(car)
+    await session.commit()
+    session.expunge_all()
+    return result
+
+
+@pytest.mark.parametrize("cars", SIZES)
+async def test_cars_profile(session, count_queries, cars):
+    await populate(session, cars=cars, items=1)
+
+    with count_queries() as counter:
+        result = await CarRepository(session).list_for_user(1)
+        rendered = [(car.model, car.mileage) for car in result]
+
+    assert len(rendered) == cars
+    assert counter.count == 1
+
+
+@pytest.mark.parametrize("items", SIZES)
+async def test_items_profile(session, count_queries, items):
+    [car] = await populate(session, cars=1, items=items)
+
+    with count_queries() as counter:
+        result = await ServiceItemRepository(session).list_for_car(car.id)
+        rendered = [
+            (item.name, [r.is_overdue for r in item.reminders]) for item in result
+        ]
+
+    assert len(rendered) == items
+    assert all(overdue == [True] for _, overdue in rendered)
+    assert counter.count == 2
+
+
+@pytest.mark.parametrize("cars", SIZES)
+async def test_due_profile(session, count_queries, cars):
+    await populate(session, cars=cars, items=3)
+
+    with count_queries() as counter:
+        result = await ReminderRepository(session).list_due(1)
+        rendered = [(r.service_item.name, r.car.mileage, r.is_overdue) for r in result]
+
+    assert len(rendered) == cars * 3
+    assert counter.count == 1
+
+
+@pytest.mark.parametrize("cars", SIZES)
+async def test_reminders_profile(session, count_queries, cars):
+    await populate(session, cars=cars, items=3)
+
+    with count_queries() as counter:
+        result = await ReminderRepository(session).list_for_user(1)
+        rendered = [(r.service_item.name, r.is_active, r.state) for r in result]
+
+    assert len(rendered) == cars * 3
+    assert counter.count == 1
+
+
+async def test_mileage_profile(session, count_queries):
+    [car] = await populate(session, cars=1, items=1)
+    now = datetime.now(timezone.utc)
+    session.add_all(
+        MileageLog(
+            car_id=car.id, mileage=11_000 - day, created_at=now - timedelta(days=day)
+        )
+        for day in range(10, 0, -1)
+    )
+    await session.commit()
+    session.expunge_all()
+
+    with count_queries() as counter:
+        result = await MileageLogRepository(session).latest_for_car(car.id)
+        rendered = [(log.mileage, log.created_at) for log in result]
+
+    assert [mileage for mileage, _ in rendered] == list(range(10_999, 10_994, -1))
+    assert counter.count == 1
+
+
+async def test_unplanned_relationship_raises(session):
+    await populate(session, cars=1, items=1)
+
+    [car] = await CarRepository(session).list_for_user(1)
+
+    with pytest.raises(Exception, match="lazy='raise"):
+        car.service_items
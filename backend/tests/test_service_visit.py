@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from core.models import Car, Reminder, ReminderState, ServiceItem, User
+from services import record_service_visit
+from utils import as_utc
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+VISIT = NOW - timedelta(days=1)
+
+
+@pytest.fixture
+async def car(session) -> Car:
+    car = Car(
+        user=User(tg_id=1, name="user"),
+        brand="Lada",
+        model="Vesta",
+        year=2020,
+        first_mileage=0,
+    )
+    for name in ("Engine oil", "Air filter", "Brake fluid"):
+        item = ServiceItem(
+            car=car,
+            name=name,
+            last_service_date=NOW - timedelta(days=400),
+            last_service_mileage=10_000,
+        )
+        session.add(
+            Reminder(
+                car=car,
+                service_item=item,
+                interval_mileage=10_000,
+                interval_days=365,
+                notified_state=ReminderState.overdue,
+            )
+        )
+    await session.commit()
+    return car
+
+
+async def test_visit_updates_items_and_reminders(session, car, count_queries):
+    with count_queries() as counter:
+        reminders = await record_service_visit(
+            session,
+            car.id,
+            ["Engine oil", "Air filter", "Spark plugs", "Engine oil"],
+            VISIT,
+            42_000,
+        )
+        await session.commit()
+
+    # Upsert, owner lookup for the cache, reminders, commit: not one per item
+    assert counter.count <= 4
+    items = {
+        item.name: item
+        for item in await session.scalars(
+            select(ServiceItem).where(ServiceItem.car_id == car.id)
+        )
+    }
+    assert set(items) == {"Engine oil", "Air filter", "Brake fluid", "Spark plugs"}
+    for name in ("Engine oil", "Air filter", "Spark plugs"):
+        assert as_utc(items[name].last_service_date) == VISIT
+        assert items[name].last_service_mileage == 42_000
+    assert items["Brake fluid"].last_service_mileage == 10_000
+
+    # Spark plugs are new and have no reminder yet
+    assert {r.service_item_id for r in reminders} == {
+        items["Engine oil"].id,
+        items["Air filter"].id,
+    }
+    for reminder in reminders:
+        assert reminder.next_due_mileage == 52_000
+        assert as_utc(reminder.next_due_at) == VISIT + timedelta(days=365)
+        assert reminder.notified_state == ReminderState.ok
+
+
+async def test_empty_visit(session, car):
+    assert await record_service_visit(session, car.id, [], VISIT, 42_000) == []
@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core.config import SQLITE_PROFILES, AppMode, SqliteProfile
+from core.db_helper import DatabaseHelper
+
+SYNCHRONOUS = {"OFF": 0, "NORMAL": 1, "FULL": 2, "EXTRA": 3}
+
+
+async def pragmas(engine: AsyncEngine) -> dict[str, object]:
+    names = ("journal_mode", "synchronous", "busy_timeout", "foreign_keys")
+    async with engine.connect() as connection:
+        return {name: await connection.scalar(text(f"PRAGMA {name}")) for name in names}
+
+
+def expected(profile: SqliteProfile, journal_mode: str) -> dict[str, object]:
+    return {
+        "journal_mode": journal_mode,
+        "synchronous": SYNCHRONOUS[profile.synchronous],
+        "busy_timeout": profile.busy_timeout,
+        "foreign_keys": int(profile.foreign_keys),
+    }
+
+
+@pytest.mark.parametrize("mode", list(AppMode))
+async def test_profile_is_applied_to_every_engine(tmp_path, mode):
+    profile = SQLITE_PROFILES[mode]
+    path = tmp_path / "profile.db"
+    # A file in the default rollback journal, like a fresh database
+    sqlite3.connect(path).close()
+    helper = DatabaseHelper(
+        url=f"sqlite+aiosqlite:///{path}",
+        sqlite_profile=profile,
+        read_url=f"sqlite+aiosqlite:///file:{path}?mode=ro&uri=true",
+    )
+    try:
+        # Opened first: switching the journal mode would fail on a read-only
+        # connection, the profile leaves it as the file has it
+        assert await pragmas(helper.read_engine) == expected(profile, "delete")
+
+        journal_mode = profile.journal_mode.lower()
+        assert await pragmas(helper.engine) == expected(profile, journal_mode)
+        assert await pragmas(helper.write_engine) == expected(profile, journal_mode)
+    finally:
+        await helper.dispose()
+
+
+def test_read_only_connections_skip_journal_mode():
+    profile = SqliteProfile()
+    assert "journal_mode" in dict(profile.pragmas())
+    assert "journal_mode" not in dict(profile.pragmas(read_only=True))
@@ -0,0 +1,92 @@
+import importlib
+import time
+import uuid
+
+import pytest
+from sqlalchemy import select, text
+
+from core.models import Car, User
+from utils import uuid7
+
+uuid7_module = importlib.import_module("utils.uuid7")
+
+FROZEN_MS = 1_760_000_000_000
+
+
+@pytest.fixture
+def frozen_clock(monkeypatch):
+    """Every key is generated in the same millisecond."""
+
+    class Clock:
+        @staticmethod
+        def time_ns() -> int:
+            return FROZEN_MS * 1_000_000
+
+    monkeypatch.setattr(uuid7_module, "time", Clock)
+    monkeypatch.setattr(uuid7_module, "_last_ms", 0)
+    monkeypatch.setattr(uuid7_module, "_counter", 0)
+
+
+def timestamp_ms(key: uuid.UUID) -> int:
+    return key.int >> 80
+
+
+def counter(key: uuid.UUID) -> int:
+    return key.int >> 64 & 0xFFF
+
+
+def test_version_variant_and_timestamp():
+    before = time.time_ns() // 1_000_000
+    key = uuid7()
+    after = time.time_ns() // 1_000_000
+
+    assert key.version == 7
+    assert key.variant == uuid.RFC_4122
+    assert before <= timestamp_ms(key) <= after + 1
+
+
+def test_keys_of_one_millisecond_are_strictly_increasing(frozen_clock):
+    keys = [uuid7() for _ in range(1_000)]
+
+    assert keys == sorted(keys) and len(set(keys)) == len(keys)
+    assert {timestamp_ms(key) for key in keys} <= {FROZEN_MS, FROZEN_MS + 1}
+    # The counter starts in its lower half and counts up
+    assert counter(keys[0]) <= 0x7FF
+    assert all(key.version == 7 and key.variant == uuid.RFC_4122 for key in keys)
+
+
+def test_counter_rollover_moves_to_the_next_millisecond(frozen_clock, monkeypatch):
+    monkeypatch.setattr(uuid7_module, "_last_ms", FROZEN_MS)
+    monkeypatch.setattr(uuid7_module, "_counter", 0xFFE)
+
+    keys = [uuid7() for _ in range(3)]
+
+    assert [(timestamp_ms(k), counter(k)) for k in keys] == [
+        (FROZEN_MS, 0xFFF),
+        (FROZEN_MS + 1, 0),
+        (FROZEN_MS + 1, 1),
+    ]
+    assert keys == sorted(keys)
+
+
+async def test_binary_uuid_round_trip(session):
+    cars = [
+        Car(
+            user=User(tg_id=tg_id, name="user"),
+            brand="Lada",
+            model="Vesta",
+            year=2020,
+            first_mileage=0,
+        )
+        for tg_id in range(3)
+    ]
+    session.add_all(cars)
+    await session.commit()
+    ids = [car.id for car in cars]
+
+    stored = await session.execute(text("SELECT typeof(id), length(id) FROM cars"))
+    assert set(stored) == {("blob", 16)}
+    # Loaded back as UUIDs, in creation order by the stored bytes
+    assert list(await session.scalars(select(Car.id).order_by(Car.id))) == ids
+    # A key given as a string binds to the same bytes
+    assert await session.scalar(select(Car.id).where(Car.id == str(ids[1]))) == ids[1]